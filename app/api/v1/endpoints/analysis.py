@@ -1,6 +1,7 @@
 """Analysis endpoints for patent infringement investigation."""
 
 import uuid
+from datetime import UTC, datetime, timedelta
 from typing import Annotated, Literal
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -27,6 +28,7 @@ class StartAnalysisRequest(BaseModel):
     product_id: str | None = None
     pipeline: Literal["A", "B", "C", "full"] = "C"
     claim_nos: list[int] | None = None
+    force_refresh: bool = False  # bypass the LLM response cache
 
 
 class StartAnalysisResponse(BaseModel):
@@ -63,6 +65,14 @@ class StageResultResponse(BaseModel):
     tokens_output: int | None
     latency_ms: int | None
     created_at: str
+    tokens_cached: int | None = None
+    queue_wait_ms: int | None = None
+    render_ms: int | None = None
+    cost_usd: float | None = None
+    cache_hit: bool = False
+    tokens_saved_input: int | None = None
+    tokens_saved_output: int | None = None
+    skip_reason: str | None = None  # stage short-circuited because the claim was decided
 
 
 class JobResultsResponse(BaseModel):
@@ -94,6 +104,64 @@ class JobListResponse(BaseModel):
     per_page: int
 
 
+class StageMetricsRow(BaseModel):
+    """Aggregated telemetry for one group; grouping fields are None when not grouped by."""
+
+    day: str | None = None
+    stage: str | None = None
+    model: str | None = None
+    calls: int
+    cache_hits: int
+    error_calls: int
+    unpriced_calls: int  # calls whose model has no price; excluded from cost_usd
+    tokens_input: int
+    tokens_output: int
+    tokens_cached: int
+    cost_usd: float
+    latency_p50_ms: int | None
+    latency_p95_ms: int | None
+    queue_wait_ms_avg: int | None
+    render_ms_avg: int | None
+    llm_ms_avg: int | None
+    persist_ms_avg: int | None
+
+
+class MetricsResponse(BaseModel):
+    """Response for analysis metrics."""
+
+    since: str
+    until: str
+    group_by: list[str]
+    rows: list[StageMetricsRow]
+
+
+class QueueTenantRow(BaseModel):
+    """Queue state of one tenant; queue waits cover jobs started today (UTC)."""
+
+    tenant_id: str
+    weight: float
+    max_concurrent_jobs: int  # 0 = no cap
+    daily_token_budget: int  # 0 = no budget
+    pending: int
+    pending_by_priority: dict[str, int]
+    running: int
+    tokens_today: int
+    blocked: str | None  # "concurrency" or "token_budget" while jobs are held back
+    oldest_pending_wait_s: int | None
+    jobs_started_today: int
+    queue_wait_avg_ms: int | None
+    queue_wait_p50_ms: int | None
+    queue_wait_p95_ms: int | None
+
+
+class QueueResponse(BaseModel):
+    """Response for analysis queue metrics."""
+
+    pending: int
+    running: int
+    tenants: list[QueueTenantRow]
+
+
 class RetryResponse(BaseModel):
     """Response for retry endpoint."""
 
@@ -125,6 +193,7 @@ def start_analysis(
             company_id=company_uuid,
             product_id=product_uuid,
             claim_nos=request.claim_nos,
+            force_refresh=request.force_refresh,
         )
         db.commit()
 
@@ -197,6 +266,52 @@ def list_prompts() -> list[dict]:
     return pm.list_prompts()
 
 
+@router.get("/metrics", response_model=MetricsResponse)
+def get_metrics(
+    db: Annotated[Session, Depends(get_db)],
+    days: int = 7,
+    group_by: str = "stage,model",
+) -> MetricsResponse:
+    """Stage latency (p50/p95), token and cost aggregates over the last ``days`` days.
+
+    ``group_by`` is a comma-separated subset of ``day``, ``stage`` and ``model``.
+    """
+    from app.services.analysis_metrics import GROUP_BY_FIELDS, query_metrics
+
+    fields = [field.strip() for field in group_by.split(",") if field.strip()]
+    invalid = [field for field in fields if field not in GROUP_BY_FIELDS]
+    if invalid or len(set(fields)) != len(fields):
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by must be a subset of {', '.join(GROUP_BY_FIELDS)}",
+        )
+    if days < 1:
+        raise HTTPException(status_code=400, detail="days must be at least 1")
+
+    until = datetime.now(UTC).date()
+    since = until - timedelta(days=days - 1)
+    rows = query_metrics(db, since, until, fields)
+    return MetricsResponse(
+        since=since.isoformat(),
+        until=until.isoformat(),
+        group_by=fields,
+        rows=[StageMetricsRow(**row) for row in rows],
+    )
+
+
+@router.get("/queue", response_model=QueueResponse)
+def get_queue(db: Annotated[Session, Depends(get_db)]) -> QueueResponse:
+    """Queue depth, running jobs, caps and queue wait time per tenant."""
+    from app.services.job_scheduler import queue_snapshot
+
+    tenants = [QueueTenantRow(**row) for row in queue_snapshot(db)]
+    return QueueResponse(
+        pending=sum(row.pending for row in tenants),
+        running=sum(row.running for row in tenants),
+        tenants=tenants,
+    )
+
+
 # =============================================================================
 # DYNAMIC ROUTES (must be defined after static routes)
 # =============================================================================
@@ -331,6 +446,14 @@ def get_job_results(
                 tokens_output=r.tokens_output,
                 latency_ms=r.latency_ms,
                 created_at=r.created_at.isoformat() if r.created_at else "",
+                tokens_cached=r.tokens_cached,
+                queue_wait_ms=r.queue_wait_ms,
+                render_ms=r.render_ms,
+                cost_usd=r.cost_usd,
+                cache_hit=bool(r.cache_hit),
+                tokens_saved_input=r.tokens_saved_input,
+                tokens_saved_output=r.tokens_saved_output,
+                skip_reason=r.skip_reason,
             )
             for r in results
         ],
@@ -341,8 +464,12 @@ def get_job_results(
 def retry_job(
     job_id: str,
     db: Annotated[Session, Depends(get_db)],
+    force_refresh: bool = False,
 ) -> RetryResponse:
-    """Retry a failed analysis job."""
+    """Retry a failed analysis job from its first incomplete stage.
+
+    ``force_refresh`` reruns every stage and bypasses the LLM response cache.
+    """
     try:
         job_uuid = uuid.UUID(job_id)
     except ValueError as e:
@@ -361,6 +488,7 @@ def retry_job(
     job.status = "pending"
     job.error_message = None
     job.retry_count = (job.retry_count or 0) + 1
+    job.force_refresh = force_refresh
     db.commit()
 
     # Run the job
@@ -14,6 +14,8 @@ router = APIRouter()
 logger = get_logger(__name__)
 
 MAX_CONCURRENT_JOBS = settings.max_concurrent_jobs
+# Provider batches complete within 24h; allow some slack for polling
+BATCH_JOB_TIMEOUT_SECONDS = 26 * 3600
 
 
 def verify_cron_secret(
@@ -38,13 +40,17 @@ def batch_analyze(
     Batch analysis cron job (Phase1 check-and-do equivalent).
 
     1. Check running Deep Research jobs for completion
-    2. Start pending jobs (respecting concurrency limit)
+    2. Start pending jobs (concurrency limit, fair share across tenants)
     3. Handle retries for failed jobs
 
+    With ANALYSIS_WORKER_ENABLED, jobs are run by ``phase2 worker`` processes
+    and this only re-queues retries (queue mode).
+
     Called by Vercel Cron every 6 hours.
     """
     from app.db.models import AnalysisJob
     from app.services import AnalysisService
+    from app.services.job_scheduler import mark_started, plan_jobs
 
     results = {
         "checked_running": 0,
@@ -54,10 +60,20 @@ def batch_analyze(
         "errors": [],
     }
 
-    # 1. Check currently running jobs
+    if settings.analysis_worker_enabled:
+        _requeue_failed_jobs(db, results)
+        results["queued"] = db.query(AnalysisJob).filter(AnalysisJob.status == "pending").count()
+        return {**results, "mode": "queue"}
+
+    # 1. Check currently running jobs (worker-leased jobs expire via their lease,
+    # Deep Research jobs are timed out by the research poller)
     running_jobs = (
         db.query(AnalysisJob)
-        .filter(AnalysisJob.status.in_(["researching", "analyzing", "running"]))  # running = legacy
+        .filter(
+            AnalysisJob.status.in_(["researching", "analyzing", "running"]),  # running = legacy
+            AnalysisJob.lease_owner.is_(None),
+            or_(AnalysisJob.pipeline.is_(None), AnalysisJob.pipeline != "research"),
+        )
         .all()
     )
     results["checked_running"] = len(running_jobs)
@@ -65,9 +81,11 @@ def batch_analyze(
     for job in running_jobs:
         # If job has been running for more than 30 minutes, mark as failed
         started_at = job.started_at or job.queued_at
+        # Jobs waiting on a provider batch (analysis-batch CLI) get the batch window
+        timeout = BATCH_JOB_TIMEOUT_SECONDS if job.batch_id else 1800  # 30 minutes
         if started_at:
             elapsed = (datetime.now(timezone.utc) - started_at).total_seconds()
-            if elapsed > 1800:  # 30 minutes
+            if elapsed > timeout:
                 logger.warning(
                     f"Job {job.id} timed out after {elapsed}s",
                     job_id=str(job.id),
@@ -81,10 +99,13 @@ def batch_analyze(
                     "error": "timeout",
                 })
 
-    # 2. Count active jobs for concurrency check
+    # 2. Count active jobs for concurrency check (provider-batch jobs use no slot)
     active_count = (
         db.query(AnalysisJob)
-        .filter(AnalysisJob.status.in_(["researching", "analyzing", "running"]))  # running = legacy
+        .filter(
+            AnalysisJob.status.in_(["researching", "analyzing", "running"]),  # running = legacy
+            AnalysisJob.batch_id.is_(None),
+        )
         .count()
     )
 
@@ -96,29 +117,15 @@ def batch_analyze(
     if slots_available <= 0:
         return {**results, "message": "Max concurrent jobs reached"}
 
-    # 3. Find pending jobs (prioritized)
-    pending_jobs = (
-        db.query(AnalysisJob)
-        .filter(
-            AnalysisJob.status == "pending",
-            or_(
-                AnalysisJob.scheduled_for.is_(None),
-                AnalysisJob.scheduled_for <= datetime.now(timezone.utc),
-            ),
-        )
-        .order_by(
-            AnalysisJob.priority.desc(),
-            AnalysisJob.created_at.asc(),
-        )
-        .limit(slots_available)
-        .all()
-    )
+    # 3. Pick pending jobs fairly across tenants (priority, aging and tenant caps)
+    pending_jobs = plan_jobs(db, slots_available)
 
     service = AnalysisService(db)
 
     for job in pending_jobs:
         try:
             logger.info(f"Starting job {job.id}", job_id=str(job.id))
+            mark_started(job)
             job.status = "analyzing"
             job.started_at = datetime.now(timezone.utc)
             job.queued_at = datetime.now(timezone.utc)
@@ -145,6 +152,15 @@ def batch_analyze(
             })
 
     # 4. Handle retries for failed jobs
+    _requeue_failed_jobs(db, results)
+
+    return results
+
+
+def _requeue_failed_jobs(db: Session, results: dict) -> None:
+    """Reset failed jobs with retries left to pending (they resume from checkpoints)."""
+    from app.db.models import AnalysisJob
+
     failed_jobs = (
         db.query(AnalysisJob)
         .filter(
@@ -173,8 +189,6 @@ def batch_analyze(
                 "error": f"retry setup failed: {e}",
             })
 
-    return results
-
 
 @router.post("/poll-patents")
 @router.get("/poll-patents")  # Support both GET and POST for cron
@@ -204,6 +218,36 @@ def poll_patents(
     }
 
 
+@router.post("/poll-research")
+@router.get("/poll-research")  # Support both GET and POST for cron
+def poll_research(
+    _: Annotated[None, Depends(verify_cron_secret)],
+) -> dict:
+    """
+    Submit and poll Deep Research jobs (one batched pass).
+
+    For deployments without a ``phase2 research-poller`` process.
+    Called by Vercel Cron every 5 minutes.
+    """
+    import asyncio
+
+    from app.llm.deep_research import close_http_client
+    from app.services.research_poller import DeepResearchPoller
+
+    if not settings.openai_api_key:
+        return {"status": "skipped", "message": "OPENAI_API_KEY is not set"}
+
+    async def poll_once() -> dict[str, int]:
+        # asyncio.run ends the loop, so its HTTP client is closed here
+        try:
+            return await DeepResearchPoller().run_once()
+        finally:
+            await close_http_client()
+
+    result = asyncio.run(poll_once())
+    return {"status": "ok", **result}
+
+
 @router.post("/check-and-do")
 @router.get("/check-and-do")  # Alias for Phase1 compatibility
 def check_and_do(
@@ -216,3 +260,25 @@ def check_and_do(
     Maintained for backward compatibility with existing cron configurations.
     """
     return batch_analyze(db, None)
+
+
+@router.post("/compact-snapshots")
+@router.get("/compact-snapshots")  # Support both GET and POST for cron
+def compact_snapshots(
+    db: Annotated[Session, Depends(get_db)],
+    _: Annotated[None, Depends(verify_cron_secret)],
+) -> dict:
+    """
+    Compact JP Index status snapshot history.
+
+    Removes consecutive duplicate snapshots in bounded batches.
+    Called by Vercel Cron weekly; each run continues after the last case
+    the previous run processed and wraps around at the end.
+    """
+    from app.jp_index.compaction import SNAPSHOT_COMPACTION_STATE, compact_status_snapshots
+
+    logger.info("Snapshot compaction cron triggered")
+    result = compact_status_snapshots(
+        db, batch_size=500, max_batches=20, resume_key=SNAPSHOT_COMPACTION_STATE
+    )
+    return {"status": "ok", **result}
@@ -10,25 +10,32 @@ from datetime import date, datetime
 from typing import Annotated, Optional
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
 from app.core import get_logger
 from app.jp_index.audit import record_audit_log
-from app.jp_index.cache import changes_cache, resolve_cache, search_cache
+from app.jp_index.cache import changes_cache, detail_cache, resolve_cache, search_cache
+from app.jp_index.changes import (
+    LONG_POLL_MAX_SECONDS,
+    decode_cursor,
+    fetch_changes,
+    iter_changes_ndjson,
+    wait_for_changes,
+)
+from app.jp_index.detail import (
+    compute_detail_etag,
+    etag_matches,
+    load_case_detail,
+    load_case_version,
+)
 from app.jp_index.rate_limit import rate_limiter, rate_limit_key
 from app.core import settings
 from app.db.models import (
     JpCase,
-    JpDocument,
     JpNumberAlias,
-    JpApplicant,
-    JpCaseApplicant,
-    JpClassification,
-    JpStatusEvent,
-    JpStatusSnapshot,
     JpIngestBatch,
 )
 from app.jp_index.normalize import normalize_number
@@ -37,6 +44,8 @@ from app.jp_index.search import PostgresSearchAdapter, SearchParams
 router = APIRouter()
 logger = get_logger(__name__)
 
+CHANGES_PAGE_MAX = 5000
+
 
 def _client_ip(request: Request) -> Optional[str]:
     forwarded = request.headers.get("x-forwarded-for")
@@ -192,6 +201,7 @@ def get_case_detail(
     request: Request,
     case_id: str,
     db: Annotated[Session, Depends(get_db)],
+    if_none_match: Annotated[Optional[str], Header(alias="If-None-Match")] = None,
 ):
     client_ip = _client_ip(request)
     if not rate_limiter.check(rate_limit_key(client_ip, "jp_index_detail")):
@@ -202,156 +212,85 @@ def get_case_detail(
     except ValueError as exc:
         raise HTTPException(status_code=400, detail="Invalid case_id") from exc
 
-    case = db.query(JpCase).filter(JpCase.id == case_uuid).first()
-    if not case:
+    # The cache is per process, so entries are keyed by the case version read
+    # on every request instead of relying on invalidation from the importer.
+    version = load_case_version(db, case_uuid)
+    if version is None:
         raise HTTPException(status_code=404, detail="Case not found")
-
-    numbers = (
-        db.query(JpNumberAlias)
-        .filter(JpNumberAlias.case_id == case.id)
-        .all()
-    )
-    documents = (
-        db.query(JpDocument)
-        .filter(JpDocument.case_id == case.id)
-        .all()
-    )
-    registration_date = None
-    patent_numbers = []
-    for doc in documents:
-        if doc.patent_number_norm:
-            patent_numbers.append(doc.patent_number_norm)
-        if doc.doc_type == "registration" and doc.publication_date:
-            if not registration_date or doc.publication_date > registration_date:
-                registration_date = doc.publication_date
-    applicants = (
-        db.query(JpApplicant, JpCaseApplicant)
-        .join(JpCaseApplicant, JpCaseApplicant.applicant_id == JpApplicant.id)
-        .filter(JpCaseApplicant.case_id == case.id)
-        .all()
-    )
-    classifications = (
-        db.query(JpClassification)
-        .filter(JpClassification.case_id == case.id)
-        .all()
-    )
-    events = (
-        db.query(JpStatusEvent)
-        .filter(JpStatusEvent.case_id == case.id)
-        .order_by(JpStatusEvent.event_date.asc().nullslast())
-        .all()
-    )
-    has_renewal = any(
-        e.event_type
-        and any(token in e.event_type.upper() for token in ["RENEW", "MAINTENANCE", "FEE_PAID"])
-        for e in events
-    )
-    snapshots = (
-        db.query(JpStatusSnapshot)
-        .filter(JpStatusSnapshot.case_id == case.id)
-        .order_by(JpStatusSnapshot.derived_at.desc())
-        .all()
-    )
+    etag = compute_detail_etag(case_uuid, version)
+
+    not_modified = etag_matches(if_none_match, etag)
+    if not_modified:
+        cache_state = "not_modified"
+    else:
+        cache_key = f"{case_uuid}:{etag}"
+        payload = detail_cache.get(cache_key)
+        cache_state = "hit" if payload is not None else "miss"
+        if payload is None:
+            payload = load_case_detail(db, case_uuid)
+            if payload is None:
+                raise HTTPException(status_code=404, detail="Case not found")
+            detail_cache.set(cache_key, payload)
 
     record_audit_log(
         request,
         action="jp_index_case_detail",
-        payload={"case_id": case_id},
+        payload={"case_id": case_id, "cache": cache_state, "not_modified": not_modified},
         resource_id=case_id,
     )
-    return {
-        "case": {
-            "case_id": str(case.id),
-            "application_number_raw": case.application_number_raw,
-            "application_number_norm": case.application_number_norm,
-            "filing_date": case.filing_date.isoformat() if case.filing_date else None,
-            "title": case.title,
-            "abstract": case.abstract,
-            "current_status": case.current_status,
-            "rights_status": (
-                "expired"
-                if case.current_status in {"expired", "withdrawn", "abandoned", "rejected"}
-                else "renewed"
-                if has_renewal
-                else "active"
-                if case.current_status
-                else None
-            ),
-            "status_updated_at": case.status_updated_at.isoformat() if case.status_updated_at else None,
-            "last_update_date": case.last_update_date.isoformat() if case.last_update_date else None,
-            "registration_date": registration_date.isoformat() if registration_date else None,
-            "patent_numbers": patent_numbers,
-        },
-        "numbers": [
-            {
-                "type": n.number_type,
-                "number_raw": n.number_raw,
-                "number_norm": n.number_norm,
-                "kind": n.kind,
-                "is_primary": n.is_primary,
-            }
-            for n in numbers
-        ],
-        "documents": [
-            {
-                "doc_type": d.doc_type,
-                "publication_number_raw": d.publication_number_raw,
-                "publication_number_norm": d.publication_number_norm,
-                "patent_number_raw": d.patent_number_raw,
-                "patent_number_norm": d.patent_number_norm,
-                "kind": d.kind,
-                "publication_date": d.publication_date.isoformat() if d.publication_date else None,
-            }
-            for d in documents
-        ],
-        "applicants": [
-            {
-                "name_raw": app.name_raw,
-                "name_norm": app.name_norm,
-                "role": link.role,
-                "is_primary": link.is_primary,
-            }
-            for app, link in applicants
-        ],
-        "classifications": [
-            {
-                "type": c.type,
-                "code": c.code,
-                "version": c.version,
-                "is_primary": c.is_primary,
-            }
-            for c in classifications
-        ],
-        "status_events": [
-            {
-                "event_type": e.event_type,
-                "event_date": e.event_date.isoformat() if e.event_date else None,
-                "source": e.source,
-            }
-            for e in events
-        ],
-        "status_snapshots": [
-            {
-                "status": s.status,
-                "derived_at": s.derived_at.isoformat() if s.derived_at else None,
-                "logic_version": s.logic_version,
-                "reason": s.reason,
-            }
-            for s in snapshots
-        ],
-    }
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
 
 
 @router.get("/changes")
 def get_changes(
     request: Request,
-    from_date: Annotated[date, Query(description="YYYY-MM-DD")],
     db: Annotated[Session, Depends(get_db)],
+    from_date: Annotated[Optional[date], Query(description="YYYY-MM-DD (legacy)")] = None,
+    since: Annotated[Optional[str], Query(description="Cursor from a previous next_cursor")] = None,
+    limit: Annotated[int, Query(ge=1, le=100000)] = 1000,
+    format: Annotated[str, Query(pattern="^(json|ndjson)$")] = "json",
+    wait: Annotated[int, Query(ge=0, le=LONG_POLL_MAX_SECONDS, description="Long-poll seconds")] = 0,
 ):
     client_ip = _client_ip(request)
     if not rate_limiter.check(rate_limit_key(client_ip, "jp_index_changes")):
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
 
+    if from_date is not None and since is None:
+        return _get_changes_by_date(request, from_date, db)
+
+    try:
+        cursor = decode_cursor(since)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+    if format == "ndjson":
+        record_audit_log(
+            request,
+            action="jp_index_changes",
+            payload={"since": cursor, "limit": limit, "format": format},
+        )
+        return StreamingResponse(
+            iter_changes_ndjson(cursor, limit),
+            media_type="application/x-ndjson",
+        )
+
+    page_limit = min(limit, CHANGES_PAGE_MAX)
+    if wait > 0:
+        response = wait_for_changes(db, cursor, page_limit, wait)
+    else:
+        response = fetch_changes(db, cursor, page_limit)
+    record_audit_log(
+        request,
+        action="jp_index_changes",
+        payload={"since": cursor, "limit": page_limit, "wait": wait, "count": response["count"]},
+    )
+    return response
+
+
+def _get_changes_by_date(request: Request, from_date: date, db: Session):
     cache_key = from_date.isoformat()
     cached = changes_cache.get(cache_key)
     if cached is not None:
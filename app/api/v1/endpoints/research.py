@@ -9,10 +9,11 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
+from app.core import get_logger
 from app.db.models import AnalysisJob
-from app.llm.deep_research import DeepResearchJobManager
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 
 class StartResearchRequest(BaseModel):
@@ -32,53 +33,27 @@ class StartResearchResponse(BaseModel):
     existing: bool = False
 
 
-async def run_deep_research(
-    job_id: uuid.UUID,
-    patent_number: str,
-    claim_text: str | None,
-    db_url: str,
-):
-    """Background task to run Deep Research."""
-    from sqlalchemy import create_engine
-    from sqlalchemy.orm import Session as SQLSession
-
-    # Create a new session for the background task
-    engine = create_engine(db_url)
-    with SQLSession(engine) as db:
-        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
-        if not job:
-            return
-
-        try:
-            job.status = "researching"
-            job.started_at = datetime.now(timezone.utc)
-            db.commit()
-
-            # Run Deep Research
-            manager = DeepResearchJobManager()
-            result = await manager.start_research(
-                str(job_id),
-                patent_number,
-                claim_text,
-            )
-
-            # Update job with results
-            job.research_results = result.get("result", {})
-
-            if result["status"] == "completed":
-                job.status = "completed"
-            else:
-                job.status = "failed"
-                job.error_message = result.get("error", "Unknown error")
-
-            job.completed_at = datetime.now(timezone.utc)
-            db.commit()
+async def submit_deep_research(job_id: uuid.UUID) -> None:
+    """Background task: submit the job now; the research poller tracks it from there."""
+    from app.db.session import SessionLocal
+    from app.services.research_poller import DeepResearchPoller
 
-        except Exception as e:
+    try:
+        poller = DeepResearchPoller()
+    except ValueError as e:  # e.g. OPENAI_API_KEY missing
+        with SessionLocal() as db:
+            job = db.get(AnalysisJob, job_id)
             job.status = "failed"
             job.error_message = str(e)
             job.completed_at = datetime.now(timezone.utc)
             db.commit()
+        return
+
+    try:
+        await poller.run_once(job_id)
+    except Exception:
+        # The poller picks the job up again on its next pass
+        logger.exception("Deep Research submission failed", job_id=str(job_id))
 
 
 @router.post("/start", response_model=StartResearchResponse)
@@ -88,8 +63,6 @@ def start_research(
     db: Annotated[Session, Depends(get_db)],
 ) -> StartResearchResponse:
     """Start a new Deep Research job for patent investigation."""
-    from app.core.config import settings
-
     # Check for existing completed job with same patent number
     existing_job = (
         db.query(AnalysisJob)
@@ -115,25 +88,20 @@ def start_research(
         company_name=request.company_name,
         product_name=request.product_name,
         pipeline="research",  # Special pipeline for Deep Research
-        status="pending",
+        status="researching",
         search_type="deep_research",
+        started_at=datetime.now(timezone.utc),
     )
     db.add(job)
     db.commit()
     db.refresh(job)
 
     # Start background task
-    background_tasks.add_task(
-        run_deep_research,
-        job.id,
-        request.patent_number,
-        request.claim_text,
-        settings.database_url,
-    )
+    background_tasks.add_task(submit_deep_research, job.id)
 
     return StartResearchResponse(
         job_id=str(job.id),
-        status="pending",
+        status=job.status,
         existing=False,
     )
 
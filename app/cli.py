@@ -99,8 +99,8 @@ def ingest(
         Optional[str],
         typer.Option(help="Supabase bucket override (optional)"),
     ] = None,
-    ) -> None:
-        """Ingest raw XML/ZIP files into storage."""
+) -> None:
+    """Ingest raw XML/ZIP files into storage."""
     from app.ingest.raw_storage import ingest_files
 
     logger.info("Starting ingest", path=str(path), source=source)
@@ -754,6 +754,214 @@ def jp_index_import(
     typer.echo(f"Imported {result['records']} records (errors={result['errors']})")
 
 
+@app.command("jp-index-convert")
+def jp_index_convert(
+    input: Annotated[Path, typer.Option(help="Raw input file or directory (json/jsonl/csv)")],
+    output_dir: Annotated[Path, typer.Option(help="Output directory for parts + manifest")],
+    workers: Annotated[Optional[int], typer.Option(help="Worker processes (default: CPU count)")] = None,
+    chunk_size: Annotated[int, typer.Option(help="Records per part file")] = 20000,
+    compression: Annotated[str, typer.Option(help="gzip/zstd/none")] = "gzip",
+) -> None:
+    """Convert raw bulk data into normalized JSONL parts for jp-index-import."""
+    from app.jp_index.convert import convert_to_normalized_jsonl
+
+    manifest = convert_to_normalized_jsonl(
+        input,
+        output_dir,
+        workers=workers,
+        chunk_size=chunk_size,
+        compression=compression,
+        progress=lambda part: typer.echo(
+            f"{part['path']}: {part['records']} records (invalid={part['invalid']})"
+        ),
+    )
+    typer.echo(
+        f"Wrote {manifest['records']} records in {len(manifest['parts'])} parts "
+        f"(invalid={manifest['invalid']}) to {output_dir}"
+    )
+
+
+@app.command("jp-index-compact-snapshots")
+def jp_index_compact_snapshots(
+    batch_size: Annotated[int, typer.Option(help="Cases per batch")] = 500,
+    retain_days: Annotated[
+        Optional[int], typer.Option(help="Drop non-latest snapshots older than N days")
+    ] = None,
+    max_batches: Annotated[Optional[int], typer.Option(help="Stop after N batches")] = None,
+    dry_run: Annotated[bool, typer.Option(help="Dry run (no commit)")] = False,
+) -> None:
+    """Compact JP Index status snapshot history."""
+    from app.db.session import SessionLocal
+    from app.jp_index.compaction import compact_status_snapshots
+
+    def _progress(counters: dict) -> None:
+        typer.echo(
+            f"batch {counters['batches']}: cases={counters['cases']} "
+            f"duplicates={counters['deleted_duplicates']} expired={counters['deleted_expired']}"
+        )
+
+    with SessionLocal() as db:
+        result = compact_status_snapshots(
+            db,
+            batch_size=batch_size,
+            retain_days=retain_days,
+            max_batches=max_batches,
+            dry_run=dry_run,
+            progress=_progress,
+        )
+
+    prefix = "[dry-run] " if dry_run else ""
+    typer.echo(
+        f"{prefix}Scanned {result['snapshots']} snapshots in {result['cases']} cases; "
+        f"removed {result['deleted_duplicates']} duplicates, {result['deleted_expired']} expired"
+    )
+
+
+@app.command("jp-index-rederive-status")
+def jp_index_rederive_status(
+    batch_size: Annotated[int, typer.Option(help="Cases per batch (non-Postgres fallback)")] = 5000,
+    report: Annotated[Optional[Path], typer.Option(help="Write the diff report as JSON")] = None,
+    dry_run: Annotated[bool, typer.Option(help="Dry run (no commit)")] = False,
+) -> None:
+    """Re-derive status for all JP Index cases after a status rule change."""
+    import json
+
+    from app.db.session import SessionLocal
+    from app.jp_index.rederive import rederive_all_statuses
+
+    with SessionLocal() as db:
+        result = rederive_all_statuses(
+            db,
+            batch_size=batch_size,
+            dry_run=dry_run,
+            progress=lambda p: typer.echo(f"scanned {p['cases']} cases (changed={p['changed']})"),
+        )
+
+    prefix = "[dry-run] " if dry_run else ""
+    typer.echo(f"{prefix}{result['changed']} cases changed status")
+    for item in result["transitions"]:
+        typer.echo(f"  {item['from'] or '-'} -> {item['to']}: {item['count']}")
+    if report:
+        report.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        typer.echo(f"Report written to {report}")
+
+
+@app.command("analysis-batch")
+def analysis_batch(
+    limit: Annotated[int, typer.Option(help="Maximum pending jobs to run")] = 500,
+    provider: Annotated[Optional[str], typer.Option(help="LLM provider (default: LLM_PROVIDER)")] = None,
+    poll_interval: Annotated[float, typer.Option(help="Seconds between batch status polls")] = 60.0,
+) -> None:
+    """Run pending analysis jobs through the provider batch API."""
+    from app.db.session import SessionLocal
+    from app.llm.batch import get_batch_client
+    from app.services.batch_runner import BatchAnalysisRunner
+    from app.services.job_scheduler import plan_jobs
+
+    client = get_batch_client(provider)
+    with SessionLocal() as db:
+        # Batch jobs hold no worker slot, so only tenant token budgets apply
+        jobs = plan_jobs(db, limit, enforce_concurrency=False)
+        if not jobs:
+            typer.echo("No pending analysis jobs")
+            return
+        typer.echo(f"Running {len(jobs)} jobs in batch mode")
+        summary = BatchAnalysisRunner(db, client, poll_interval=poll_interval).run(jobs)
+
+    typer.echo(
+        f"completed={summary['completed']} failed={summary['failed']} "
+        f"batches={summary['batches']} requests={summary['requests']} cache_hits={summary['cache_hits']}"
+    )
+
+
+@app.command()
+def worker(
+    concurrency: Annotated[int, typer.Option(help="Jobs run in parallel by this process")] = 1,
+    poll_interval: Annotated[
+        Optional[float], typer.Option(help="Seconds to wait when the queue is empty")
+    ] = None,
+    max_jobs: Annotated[Optional[int], typer.Option(help="Exit after this many jobs")] = None,
+) -> None:
+    """Run queued analysis jobs (start more workers on more hosts to scale out)."""
+    import signal
+
+    from app.services.job_worker import AnalysisWorker
+
+    job_worker = AnalysisWorker(concurrency=concurrency, poll_interval=poll_interval)
+
+    def _shutdown(signum, frame) -> None:  # noqa: ARG001
+        typer.echo("Stopping after running jobs finish...")
+        job_worker.stop()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    typer.echo(f"Worker {job_worker.worker_id} started ({concurrency} slots)")
+    processed = job_worker.run(max_jobs=max_jobs)
+    typer.echo(f"Worker stopped after {processed} jobs")
+
+
+@app.command("research-poller")
+def research_poller(
+    once: Annotated[bool, typer.Option(help="Run a single pass and exit")] = False,
+) -> None:
+    """Submit Deep Research jobs and poll their responses until stopped."""
+    import asyncio
+    import signal
+
+    from app.services.research_poller import DeepResearchPoller
+
+    poller = DeepResearchPoller()
+    if once:
+        result = asyncio.run(poller.run_once())
+        typer.echo(
+            f"checked={result['checked']} submitted={result['submitted']} "
+            f"completed={result['completed']} failed={result['failed']}"
+        )
+        return
+
+    def _shutdown(signum, frame) -> None:  # noqa: ARG001
+        typer.echo("Stopping research poller...")
+        poller.stop()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    typer.echo("Research poller started")
+    asyncio.run(poller.run())
+
+
+@app.command("evidence-index")
+def evidence_index(
+    product_id: Annotated[
+        Optional[str], typer.Option(help="Only index this product's documents")
+    ] = None,
+    rebuild: Annotated[bool, typer.Option(help="Rebuild segments even if up to date")] = False,
+) -> None:
+    """Build or refresh the local evidence retrieval index."""
+    import uuid
+
+    from app.db.models import ProductDocument
+    from app.db.session import SessionLocal
+    from app.services.evidence_index import EvidenceIndex
+
+    with SessionLocal() as db:
+        query = db.query(ProductDocument.evidence_id).distinct()
+        if product_id:
+            query = query.filter(ProductDocument.product_id == uuid.UUID(product_id))
+        evidence_ids = [str(row.evidence_id) for row in query]
+
+        index = EvidenceIndex(db)
+        if rebuild:
+            signatures = index.signatures(evidence_ids)
+            segments = [index.build(evidence_id, sig) for evidence_id, sig in signatures.items()]
+        else:
+            segments = index.refresh(evidence_ids)
+
+    chunks = sum(len(segment.chunks) for segment in segments)
+    typer.echo(f"Indexed {len(segments)} evidence documents ({chunks} chunks) in {index.root}")
+
+
 def _fetch_with_gemini(prompt: str) -> dict:
     """Fetch patent data using Gemini CLI."""
     logger.info("Running Gemini CLI")
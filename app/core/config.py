@@ -52,11 +52,24 @@ class Settings(BaseSettings):
     auth_enabled: bool = True
 
     # LLM Provider
-    llm_provider: str = "openai"  # "openai" or "anthropic"
+    llm_provider: str = "openai"  # "openai", "anthropic" or "fake" (offline load tests)
     openai_api_key: str | None = None
     openai_model: str = "gpt-4o-mini"
     anthropic_api_key: str | None = None
     anthropic_model: str = "claude-sonnet-4-20250514"
+    openai_base_url: str | None = None  # e.g. a local fake server in tests
+    anthropic_base_url: str | None = None
+    llm_timeout_seconds: float = 120.0
+    llm_max_retries: int = 4  # retries on 429/5xx/connection errors, jittered backoff
+    llm_max_concurrency: int = 8  # in-flight calls per provider/model, process-wide
+    llm_requests_per_minute: int = 0  # 0 = unlimited
+    llm_tokens_per_minute: int = 0  # 0 = unlimited
+    llm_streaming: bool = True  # stream stage calls (TTFT, early truncation/invalid-JSON detection)
+    llm_prompt_caching: bool = True  # job-wide context first in stage prompts, marked for provider caches
+    llm_cache_ttl_seconds: int = 30 * 24 * 3600  # 0 disables the response cache
+    llm_cache_max_entries: int = 100000
+    llm_cache_max_entry_bytes: int = 1_000_000
+    llm_prices: str | None = None  # JSON {"model": [input, cached, output]} USD per 1M tokens
 
     # Prompts
     prompts_dir: Path = Path("./prompts")
@@ -67,6 +80,28 @@ class Settings(BaseSettings):
 
     # Batch Processing
     max_concurrent_jobs: int = 3
+    analysis_claim_concurrency: int = 4  # parallel stage calls (claims and independent stages) within one job
+    analysis_worker_enabled: bool = False  # cron only enqueues; `phase2 worker` runs jobs
+    analysis_worker_lease_seconds: int = 120  # renewed every lease/3 by a heartbeat
+    analysis_worker_poll_seconds: float = 5.0
+    # Job scheduling across tenants; tenants.settings["scheduler"] overrides per tenant
+    analysis_tenant_max_concurrent_jobs: int = 0  # 0 = no per-tenant cap
+    analysis_tenant_daily_token_budget: int = 0  # input + output tokens per UTC day; 0 = none
+    analysis_priority_aging_seconds: int = 900  # waiting this long adds 1 priority; 0 = off
+    analysis_evidence_token_budget: int = 6000  # per prompt; YAML evidence_token_budget overrides
+    analysis_blob_compression: str = "none"  # "zstd" compresses large stage input blobs
+    analysis_blob_compress_min_bytes: int = 4096
+    # Claims already decided as literal failures skip their remaining stages:
+    # "off", "speculative" (stages not yet started) or "ordered" (dependent
+    # claims wait for their parent claims' assessment)
+    analysis_short_circuit: str = "off"
+    analysis_short_circuit_min_confidence: float = 0.8
+    evidence_index_path: Path = Path("./data/evidence_index")
+    evidence_retrieval_top_k: int = 8  # chunks retrieved per claim element
+    evidence_embedding_model: str | None = None  # local sentence-transformers model dir
+    deep_research_timeout_seconds: int = 1800
+    deep_research_poll_min_seconds: float = 10.0  # first polls; the delay grows with job age
+    deep_research_poll_max_seconds: float = 60.0
     cron_secret: str | None = None
 
     # Safety toggles
@@ -94,6 +129,101 @@ class Settings(BaseSettings):
     edinet_field_map: str | None = None
     collection_user_agent: str = "iprich-phase2/1.0"
 
+    @field_validator("llm_max_concurrency")
+    @classmethod
+    def validate_llm_concurrency(cls, value: int) -> int:
+        if value < 1 or value > 1000:
+            raise ValueError("LLM_MAX_CONCURRENCY must be between 1 and 1000")
+        return value
+
+    @field_validator(
+        "llm_requests_per_minute",
+        "llm_tokens_per_minute",
+        "llm_max_retries",
+        "llm_cache_ttl_seconds",
+        "llm_cache_max_entries",
+        "llm_cache_max_entry_bytes",
+    )
+    @classmethod
+    def validate_non_negative(cls, value: int) -> int:
+        if value < 0:
+            raise ValueError("LLM limit, retry and cache settings must be non-negative")
+        return value
+
+    @field_validator("analysis_claim_concurrency")
+    @classmethod
+    def validate_claim_concurrency(cls, value: int) -> int:
+        if value < 1 or value > 64:
+            raise ValueError("ANALYSIS_CLAIM_CONCURRENCY must be between 1 and 64")
+        return value
+
+    @field_validator("analysis_worker_lease_seconds")
+    @classmethod
+    def validate_worker_lease(cls, value: int) -> int:
+        if value < 15:
+            raise ValueError("ANALYSIS_WORKER_LEASE_SECONDS must be at least 15")
+        return value
+
+    @field_validator(
+        "analysis_tenant_max_concurrent_jobs",
+        "analysis_tenant_daily_token_budget",
+        "analysis_priority_aging_seconds",
+    )
+    @classmethod
+    def validate_scheduler_limits(cls, value: int) -> int:
+        if value < 0:
+            raise ValueError("Analysis tenant caps and priority aging must be non-negative")
+        return value
+
+    @field_validator("analysis_evidence_token_budget")
+    @classmethod
+    def validate_evidence_budget(cls, value: int) -> int:
+        if value < 500:
+            raise ValueError("ANALYSIS_EVIDENCE_TOKEN_BUDGET must be at least 500")
+        return value
+
+    @field_validator("analysis_blob_compression")
+    @classmethod
+    def validate_blob_compression(cls, value: str) -> str:
+        if value not in {"none", "zstd"}:
+            raise ValueError("ANALYSIS_BLOB_COMPRESSION must be 'none' or 'zstd'")
+        return value
+
+    @field_validator("analysis_short_circuit")
+    @classmethod
+    def validate_short_circuit(cls, value: str) -> str:
+        if value not in {"off", "speculative", "ordered"}:
+            raise ValueError("ANALYSIS_SHORT_CIRCUIT must be 'off', 'speculative' or 'ordered'")
+        return value
+
+    @field_validator("analysis_short_circuit_min_confidence")
+    @classmethod
+    def validate_short_circuit_confidence(cls, value: float) -> float:
+        if value < 0 or value > 1:
+            raise ValueError("ANALYSIS_SHORT_CIRCUIT_MIN_CONFIDENCE must be between 0 and 1")
+        return value
+
+    @field_validator("evidence_retrieval_top_k")
+    @classmethod
+    def validate_retrieval_top_k(cls, value: int) -> int:
+        if value < 1 or value > 100:
+            raise ValueError("EVIDENCE_RETRIEVAL_TOP_K must be between 1 and 100")
+        return value
+
+    @field_validator("deep_research_timeout_seconds")
+    @classmethod
+    def validate_research_timeout(cls, value: int) -> int:
+        if value < 60:
+            raise ValueError("DEEP_RESEARCH_TIMEOUT_SECONDS must be at least 60")
+        return value
+
+    @field_validator("deep_research_poll_min_seconds", "deep_research_poll_max_seconds")
+    @classmethod
+    def validate_research_poll(cls, value: float) -> float:
+        if value < 1:
+            raise ValueError("DEEP_RESEARCH_POLL_MIN/MAX_SECONDS must be at least 1")
+        return value
+
     @field_validator("jp_index_export_max")
     @classmethod
     def validate_export_max(cls, value: int) -> int:
@@ -17,6 +17,8 @@ from sqlalchemy import (
     ForeignKey,
     Index,
     Integer,
+    LargeBinary,
+    Sequence,
     String,
     Text,
     UniqueConstraint,
@@ -842,6 +844,7 @@ class Evidence(Base):
     source_type: str | None = Column(String(50))
     title: str | None = Column(Text)
     quote_text: str | None = Column(Text)
+    full_text: str | None = Column(Text)
     retrieved_at: datetime | None = Column(DateTime(timezone=True))
     captured_at: datetime | None = Column(DateTime(timezone=True))
     content_hash: str | None = Column(String(64))
@@ -855,6 +858,9 @@ class Evidence(Base):
     product_links = relationship("ProductEvidenceLink", back_populates="evidence")
     product_facts = relationship("ProductFact", back_populates="evidence")
     assessment_links = relationship("ElementAssessmentEvidence", back_populates="evidence")
+    chunks = relationship(
+        "DocChunk", back_populates="evidence", cascade="all, delete-orphan"
+    )
 
 
 class CompanyEvidenceLink(Base):
@@ -935,6 +941,55 @@ class ProductFact(Base):
     evidence = relationship("Evidence", back_populates="product_facts")
 
 
+class ProductDocument(Base):
+    """Evidence document (manual, spec sheet, page) attached to a product for analysis."""
+
+    __tablename__ = "product_documents"
+    __table_args__ = (
+        UniqueConstraint("product_id", "evidence_id", name="uq_product_documents"),
+        Index("idx_product_documents_product", "product_id"),
+        {"schema": "phase2"},
+    )
+
+    id: uuid.UUID = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    product_id: uuid.UUID = Column(
+        UUID(as_uuid=True), ForeignKey("phase2.products.id"), nullable=False
+    )
+    evidence_id: uuid.UUID = Column(
+        UUID(as_uuid=True), ForeignKey("phase2.evidence.id"), nullable=False
+    )
+    doc_type: str | None = Column(String(50))
+    title: str | None = Column(Text)
+    created_at: datetime = Column(DateTime(timezone=True), default=utcnow)
+
+    # Relationships
+    product = relationship("Product")
+    evidence = relationship("Evidence")
+
+
+class DocChunk(Base):
+    """Passage of an evidence document's full text, in document order."""
+
+    __tablename__ = "doc_chunks"
+    __table_args__ = (
+        UniqueConstraint("evidence_id", "chunk_index", name="uq_doc_chunks_evidence_index"),
+        {"schema": "phase2"},
+    )
+
+    id: uuid.UUID = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    evidence_id: uuid.UUID = Column(
+        UUID(as_uuid=True), ForeignKey("phase2.evidence.id", ondelete="CASCADE"), nullable=False
+    )
+    chunk_index: int = Column(Integer, nullable=False)
+    text: str = Column(Text, nullable=False)
+    section_type: str | None = Column(String(50))
+    page_no: int | None = Column(Integer)
+    created_at: datetime = Column(DateTime(timezone=True), default=utcnow)
+
+    # Relationships
+    evidence = relationship("Evidence", back_populates="chunks")
+
+
 class CompanyProductLink(Base):
     """Link between company and product with role and confidence."""
 
@@ -1082,6 +1137,10 @@ class JpIngestBatchFile(Base):
     raw_file = relationship("RawFile")
 
 
+# Monotonic change sequence stamped on jp_cases at ingest time (change feed cursor)
+jp_case_change_seq = Sequence("jp_case_change_seq", schema="phase2", metadata=Base.metadata)
+
+
 class JpCase(Base):
     """JP patent case (application-level)."""
 
@@ -1090,6 +1149,7 @@ class JpCase(Base):
         Index("idx_jp_cases_application_number_norm", "application_number_norm"),
         Index("idx_jp_cases_status", "current_status"),
         Index("idx_jp_cases_last_update_date", "last_update_date"),
+        Index("idx_jp_cases_change_seq", "change_seq"),
         {"schema": "phase2"},
     )
 
@@ -1103,6 +1163,7 @@ class JpCase(Base):
     current_status: str | None = Column(String(20))
     status_updated_at: datetime | None = Column(DateTime(timezone=True))
     last_update_date: datetime | None = Column(Date)
+    change_seq: int | None = Column(BigInteger)
     created_at: datetime = Column(DateTime(timezone=True), default=utcnow)
     updated_at: datetime | None = Column(DateTime(timezone=True), onupdate=utcnow)
 
@@ -1301,6 +1362,17 @@ class JpStatusSnapshot(Base):
     case = relationship("JpCase", back_populates="status_snapshots")
 
 
+class JpMaintenanceState(Base):
+    """Resume cursor for a recurring JP Index maintenance job (e.g. snapshot compaction)."""
+
+    __tablename__ = "jp_maintenance_state"
+    __table_args__ = {"schema": "phase2"}
+
+    name: str = Column(String(50), primary_key=True)
+    cursor: str | None = Column(String(64))  # last processed key; NULL = start over
+    updated_at: datetime = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
+
+
 class JpSearchDocument(Base):
     """Search index for JP cases (Postgres FTS)."""
 
@@ -1348,6 +1420,9 @@ class AnalysisJob(Base):
         Index("idx_analysis_jobs_product_id", "product_id"),
         Index("idx_analysis_jobs_queue", "status", "priority", "scheduled_for"),
         Index("idx_analysis_jobs_batch", "batch_id"),
+        Index("idx_analysis_jobs_lease", "status", "lease_expires_at"),
+        Index("idx_analysis_jobs_research_poll", "status", "next_poll_at"),
+        Index("idx_analysis_jobs_tenant_queue", "tenant_id", "status", "priority", "created_at"),
         {"schema": "phase2"},
     )
 
@@ -1372,8 +1447,10 @@ class AnalysisJob(Base):
     pipeline: str = Column(String(20), default="C")  # 'A', 'B', 'C', 'full'
     current_stage: str | None = Column(String(50))
 
-    # Deep Research integration (Phase1)
+    # Deep Research integration (Phase1); research jobs are polled by
+    # app.services.research_poller until their background response finishes
     openai_response_id: str | None = Column(Text)
+    next_poll_at: datetime | None = Column(DateTime(timezone=True))
     input_prompt: str | None = Column(Text)
     research_results: dict | None = Column(JSON)
 
@@ -1389,6 +1466,12 @@ class AnalysisJob(Base):
     max_retries: int = Column(Integer, default=3)
     batch_id: str | None = Column(Text)
     search_type: str = Column(Text, default="infringement_check")
+    force_refresh: bool = Column(Boolean, default=False)  # bypass the LLM response cache
+
+    # Worker leases (phase2 worker); an expired lease means the worker died
+    lease_owner: str | None = Column(Text)
+    lease_expires_at: datetime | None = Column(DateTime(timezone=True))
+    heartbeat_at: datetime | None = Column(DateTime(timezone=True))
 
     # Additional analysis results
     infringement_score: float | None = Column(Float)  # 0-100
@@ -1431,25 +1514,148 @@ class AnalysisResult(Base):
     """Individual stage result within an analysis job (Phase2 pipeline stages)."""
 
     __tablename__ = "analysis_results"
-    __table_args__ = {"schema": "phase2"}
+    __table_args__ = (
+        Index("idx_analysis_results_memo_key", "memo_key"),
+        {"schema": "phase2"},
+    )
 
     id: uuid.UUID = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     job_id: uuid.UUID = Column(
         UUID(as_uuid=True), ForeignKey("phase2.analysis_jobs.id"), nullable=False
     )
     stage: str = Column(String(50), nullable=False)  # e.g., '10_claim_element_extractor'
-    input_data: dict | None = Column(JSON)
+    input_data: dict | None = Column(JSON)  # legacy rows; new rows use input_refs
+    input_refs: dict | None = Column(JSON)  # variable name -> analysis_input_blobs.hash
     output_data: dict | None = Column(JSON)
     llm_model: str | None = Column(String(50))
     tokens_input: int | None = Column(Integer)
     tokens_output: int | None = Column(Integer)
     latency_ms: int | None = Column(Integer)
+    ttft_ms: int | None = Column(Integer)  # time to first streamed token
+    tokens_cached: int | None = Column(Integer)  # part of tokens_input read from the prompt cache
+    queue_wait_ms: int | None = Column(Integer)  # waiting for a stage worker slot
+    render_ms: int | None = Column(Integer)  # prompt variables + rendering
+    cost_usd: float | None = Column(Float)  # from app.llm.pricing; NULL for unpriced models
+    cache_hit: bool = Column(Boolean, default=False)
+    tokens_saved_input: int | None = Column(Integer)
+    tokens_saved_output: int | None = Column(Integer)
+    input_hash: str | None = Column(String(64))  # rendered prompt + model; unchanged => stage skipped
+    # claim text + prompt version + model; stage 10 output reused across jobs
+    memo_key: str | None = Column(String(64))
+    # Set when the stage was not run because the claim's outcome was already
+    # decided (app/services/short_circuit.py); output_data is then synthesized
+    skip_reason: str | None = Column(Text)
     created_at: datetime = Column(DateTime(timezone=True), default=utcnow)
 
     # Relationships
     job = relationship("AnalysisJob", back_populates="results")
 
 
+class AnalysisInputBlob(Base):
+    """Stage prompt variable stored once by content hash (see app/services/stage_inputs.py)."""
+
+    __tablename__ = "analysis_input_blobs"
+    __table_args__ = {"schema": "phase2"}
+
+    hash: str = Column(String(64), primary_key=True)  # sha256 of the JSON text
+    encoding: str = Column(String(10), nullable=False, default="json")  # json | zstd
+    data: bytes = Column(LargeBinary, nullable=False)
+    size_bytes: int = Column(Integer, nullable=False)  # uncompressed
+    created_at: datetime = Column(DateTime(timezone=True), default=utcnow)
+
+
+class LlmResponseCache(Base):
+    """Cached LLM response keyed by sha256(model, system prompt, user prompt, temperature)."""
+
+    __tablename__ = "llm_response_cache"
+    __table_args__ = (
+        Index("idx_llm_response_cache_expires_at", "expires_at"),
+        Index("idx_llm_response_cache_last_used_at", "last_used_at"),
+        {"schema": "phase2"},
+    )
+
+    cache_key: str = Column(String(64), primary_key=True)
+    model: str = Column(String(100), nullable=False)
+    temperature: float = Column(Float, nullable=False, default=0.0)
+    content: str = Column(Text, nullable=False)
+    parsed_json: dict | None = Column(JSON)
+    tokens_input: int = Column(Integer, default=0)
+    tokens_output: int = Column(Integer, default=0)
+    size_bytes: int = Column(Integer, default=0)
+    hit_count: int = Column(Integer, default=0)
+    created_at: datetime = Column(DateTime(timezone=True), default=utcnow)
+    last_used_at: datetime = Column(DateTime(timezone=True), default=utcnow)
+    expires_at: datetime | None = Column(DateTime(timezone=True))
+
+
+class AnalysisStageMetric(Base):
+    """Daily per-stage, per-model rollup of analysis results (``GET /analysis/metrics``).
+
+    Incremented as each stage result is saved; totals divide by ``calls``.
+    """
+
+    __tablename__ = "analysis_stage_metrics"
+    __table_args__ = {"schema": "phase2"}
+
+    day: datetime = Column(Date, primary_key=True)
+    stage: str = Column(String(50), primary_key=True)  # unqualified, e.g. '13_element_assessment'
+    model: str = Column(String(100), primary_key=True)
+    calls: int = Column(Integer, nullable=False, default=0)
+    cache_hits: int = Column(Integer, nullable=False, default=0)
+    error_calls: int = Column(Integer, nullable=False, default=0)
+    unpriced_calls: int = Column(Integer, nullable=False, default=0)
+    tokens_input: int = Column(BigInteger, nullable=False, default=0)
+    tokens_output: int = Column(BigInteger, nullable=False, default=0)
+    tokens_cached: int = Column(BigInteger, nullable=False, default=0)
+    cost_usd: float = Column(Float, nullable=False, default=0.0)
+    queue_wait_ms: int = Column(BigInteger, nullable=False, default=0)
+    render_ms: int = Column(BigInteger, nullable=False, default=0)
+    llm_ms: int = Column(BigInteger, nullable=False, default=0)
+    persist_ms: int = Column(BigInteger, nullable=False, default=0)
+    updated_at: datetime = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
+
+
+class AnalysisStageLatency(Base):
+    """Histogram of stage wall time (queue + render + LLM + persist) for p50/p95."""
+
+    __tablename__ = "analysis_stage_latency"
+    __table_args__ = {"schema": "phase2"}
+
+    day: datetime = Column(Date, primary_key=True)
+    stage: str = Column(String(50), primary_key=True)
+    model: str = Column(String(100), primary_key=True)
+    le_ms: int = Column(Integer, primary_key=True)  # bucket upper bound
+    calls: int = Column(Integer, nullable=False, default=0)
+
+
+class AnalysisTenantUsage(Base):
+    """Daily per-tenant LLM usage and queue waits (job scheduler budgets, ``/analysis/queue``)."""
+
+    __tablename__ = "analysis_tenant_usage"
+    __table_args__ = {"schema": "phase2"}
+
+    day: datetime = Column(Date, primary_key=True)
+    tenant_id: uuid.UUID = Column(UUID(as_uuid=True), primary_key=True)
+    calls: int = Column(Integer, nullable=False, default=0)
+    tokens_input: int = Column(BigInteger, nullable=False, default=0)
+    tokens_output: int = Column(BigInteger, nullable=False, default=0)
+    jobs_started: int = Column(Integer, nullable=False, default=0)
+    queue_wait_ms: int = Column(BigInteger, nullable=False, default=0)
+    updated_at: datetime = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
+
+
+class AnalysisQueueWait(Base):
+    """Histogram of job queue wait (created or scheduled_for until started) per tenant."""
+
+    __tablename__ = "analysis_queue_wait"
+    __table_args__ = {"schema": "phase2"}
+
+    day: datetime = Column(Date, primary_key=True)
+    tenant_id: uuid.UUID = Column(UUID(as_uuid=True), primary_key=True)
+    le_ms: int = Column(BigInteger, primary_key=True)  # bucket upper bound
+    jobs: int = Column(Integer, nullable=False, default=0)
+
+
 class AnalysisRun(Base):
     """Individual analysis execution (from Phase1)."""
 
@@ -42,6 +42,10 @@ class TTLCache:
                 self._evict_one()
             self._store[key] = (expires_at, value)
 
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+
     def _evict_one(self) -> None:
         # Remove the oldest expired entry, else arbitrary oldest
         if not self._store:
@@ -71,3 +75,8 @@ changes_cache = TTLCache(
     ttl_seconds=settings.jp_index_cache_ttl_seconds,
     max_entries=settings.jp_index_cache_max_entries,
 )
+
+detail_cache = TTLCache(
+    ttl_seconds=settings.jp_index_cache_ttl_seconds,
+    max_entries=settings.jp_index_cache_max_entries,
+)
@@ -0,0 +1,132 @@
+"""Incremental change feed for JP Patent Index.
+
+Ordering guarantee: every writer takes ``CHANGE_SEQ_LOCK_KEY`` as a
+transaction-scoped advisory lock before allocating ``change_seq`` values and
+holds it until commit. Writers therefore commit in allocation order, so once a
+reader sees sequence N no transaction can later commit a value below N and a
+cursor never skips a change. The cost is that ingest and re-derivation runs
+are serialized against each other (readers are never blocked).
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.db.models import JpCase, jp_case_change_seq
+from app.db.session import SessionLocal
+
+LONG_POLL_INTERVAL_SECONDS = 1.0
+# Long-polls hold a sync threadpool worker, so keep the wait short.
+LONG_POLL_MAX_SECONDS = 10
+# Arbitrary fixed key for pg_advisory_xact_lock; shared by all change_seq writers.
+CHANGE_SEQ_LOCK_KEY = 0x4A50_4348  # "JPCH"
+STREAM_CHUNK_SIZE = 1000
+
+
+def lock_change_seq(db: Session) -> None:
+    """Serialize change_seq writers until the current transaction ends (Postgres only).
+
+    Re-acquiring within the same transaction is cheap, so callers may invoke
+    this once per allocation.
+    """
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CHANGE_SEQ_LOCK_KEY})
+
+
+def next_change_seq(db: Session, is_postgres: bool) -> int:
+    """Allocate the next change sequence value for a case touched by ingest."""
+    if is_postgres:
+        lock_change_seq(db)
+        return int(db.execute(select(jp_case_change_seq.next_value())).scalar_one())
+    db.flush()
+    current = db.query(func.max(JpCase.change_seq)).scalar()
+    return int(current or 0) + 1
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """Parse a feed cursor (the last change_seq seen). Empty means from the start."""
+    if cursor is None or cursor == "":
+        return 0
+    value = int(cursor)
+    if value < 0:
+        raise ValueError("cursor must be non-negative")
+    return value
+
+
+def _change_to_item(case: JpCase) -> dict[str, Any]:
+    return {
+        "cursor": str(case.change_seq),
+        "case_id": str(case.id),
+        "application_number": case.application_number_norm,
+        "title": case.title,
+        "status": case.current_status,
+        "last_update_date": case.last_update_date.isoformat() if case.last_update_date else None,
+    }
+
+
+def fetch_changes(db: Session, since: int, limit: int) -> dict[str, Any]:
+    """Return one page of changes after ``since`` (keyset on change_seq)."""
+    cases = (
+        db.query(JpCase)
+        .filter(JpCase.change_seq > since)
+        .order_by(JpCase.change_seq.asc())
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(cases) > limit
+    cases = cases[:limit]
+    next_cursor = cases[-1].change_seq if cases else since
+    return {
+        "cursor": str(since),
+        "next_cursor": str(next_cursor),
+        "has_more": has_more,
+        "count": len(cases),
+        "items": [_change_to_item(case) for case in cases],
+    }
+
+
+def wait_for_changes(db: Session, since: int, limit: int, wait_seconds: float) -> dict[str, Any]:
+    """Long-poll: re-check for changes until one appears or ``wait_seconds`` elapses.
+
+    The wait is capped at ``LONG_POLL_MAX_SECONDS``.
+    """
+    wait_seconds = min(max(wait_seconds, 0), LONG_POLL_MAX_SECONDS)
+    deadline = time.monotonic() + wait_seconds
+    while True:
+        page = fetch_changes(db, since, limit)
+        remaining = deadline - time.monotonic()
+        if page["items"] or remaining <= 0:
+            return page
+        # End the read transaction so the next poll sees newly committed ingest batches
+        db.rollback()
+        time.sleep(min(LONG_POLL_INTERVAL_SECONDS, remaining))
+
+
+def iter_changes_ndjson(since: int, limit: int) -> Iterator[str]:
+    """Stream up to ``limit`` changes after ``since`` as NDJSON lines.
+
+    Uses its own session because the response body is produced after the
+    request-scoped session has been released.
+    """
+    remaining = limit
+    cursor = since
+    with SessionLocal() as db:
+        while remaining > 0:
+            cases = (
+                db.query(JpCase)
+                .filter(JpCase.change_seq > cursor)
+                .order_by(JpCase.change_seq.asc())
+                .limit(min(STREAM_CHUNK_SIZE, remaining))
+                .all()
+            )
+            if not cases:
+                break
+            for case in cases:
+                yield json.dumps(_change_to_item(case), ensure_ascii=False) + "\n"
+            cursor = cases[-1].change_seq
+            remaining -= len(cases)
+            db.expunge_all()
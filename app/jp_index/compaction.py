@@ -0,0 +1,170 @@
+"""Status snapshot compaction and history retention for JP Patent Index."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core import get_logger
+from app.db.models import JpMaintenanceState, JpStatusSnapshot
+
+logger = get_logger(__name__)
+
+ProgressCallback = Callable[[dict[str, Any]], None]
+
+# jp_maintenance_state row used by the weekly compaction cron
+SNAPSHOT_COMPACTION_STATE = "snapshot_compaction"
+
+
+def _snapshot_key(snapshot: Any) -> tuple[Any, ...]:
+    return (snapshot.status, snapshot.logic_version, snapshot.basis_event_ids or {})
+
+
+def _select_redundant(
+    snapshots: list[Any],
+    cutoff: Optional[datetime],
+) -> tuple[list[uuid.UUID], int, int]:
+    """Pick snapshot ids to delete for one case (snapshots ordered by derived_at asc).
+
+    Keeps the first snapshot of every run of identical snapshots, and, when a
+    retention cutoff is given, drops non-latest history older than the cutoff.
+    """
+    to_delete: list[uuid.UUID] = []
+    duplicates = 0
+    expired = 0
+    previous_key: Optional[tuple[Any, ...]] = None
+    last_index = len(snapshots) - 1
+    for index, snapshot in enumerate(snapshots):
+        key = _snapshot_key(snapshot)
+        if key == previous_key:
+            to_delete.append(snapshot.id)
+            duplicates += 1
+            continue
+        previous_key = key
+        derived_at = snapshot.derived_at
+        if derived_at is not None and derived_at.tzinfo is None:
+            derived_at = derived_at.replace(tzinfo=timezone.utc)
+        if (
+            cutoff is not None
+            and index != last_index
+            and derived_at is not None
+            and derived_at < cutoff
+        ):
+            to_delete.append(snapshot.id)
+            expired += 1
+    return to_delete, duplicates, expired
+
+
+def _load_cursor(db: Session, name: str) -> Optional[uuid.UUID]:
+    state = db.get(JpMaintenanceState, name)
+    if state is None or not state.cursor:
+        return None
+    return uuid.UUID(state.cursor)
+
+
+def _save_cursor(db: Session, name: str, case_id: Optional[uuid.UUID]) -> None:
+    state = db.get(JpMaintenanceState, name)
+    if state is None:
+        state = JpMaintenanceState(name=name)
+        db.add(state)
+    state.cursor = str(case_id) if case_id is not None else None
+
+
+def compact_status_snapshots(
+    db: Session,
+    batch_size: int = 500,
+    retain_days: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    dry_run: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    resume_key: Optional[str] = None,
+) -> dict[str, Any]:
+    """Collapse consecutive identical status snapshots in keyset batches of cases.
+
+    Each batch is committed separately (rolled back on dry run) so the job can
+    run against a live database. With ``resume_key`` the last processed case id
+    is stored in ``jp_maintenance_state`` alongside each batch; the next run
+    continues after it and wraps around to the first case at the end, so runs
+    capped by ``max_batches`` eventually cover every case.
+    """
+    cutoff = (
+        datetime.now(timezone.utc) - timedelta(days=retain_days)
+        if retain_days is not None
+        else None
+    )
+    counters: dict[str, Any] = {
+        "batches": 0,
+        "cases": 0,
+        "snapshots": 0,
+        "deleted_duplicates": 0,
+        "deleted_expired": 0,
+        "last_case_id": None,
+        "wrapped": False,
+        "dry_run": dry_run,
+    }
+    start_case_id = _load_cursor(db, resume_key) if resume_key else None
+    last_case_id = start_case_id
+
+    while max_batches is None or counters["batches"] < max_batches:
+        query = db.query(JpStatusSnapshot.case_id).distinct()
+        if last_case_id is not None:
+            query = query.filter(JpStatusSnapshot.case_id > last_case_id)
+        if counters["wrapped"]:
+            # Second leg of a resumed pass: stop where this run started
+            query = query.filter(JpStatusSnapshot.case_id <= start_case_id)
+        case_ids = [
+            row[0] for row in query.order_by(JpStatusSnapshot.case_id).limit(batch_size).all()
+        ]
+        if not case_ids:
+            if start_case_id is not None and not counters["wrapped"]:
+                counters["wrapped"] = True
+                last_case_id = None
+                continue
+            break
+
+        snapshots = (
+            db.query(JpStatusSnapshot)
+            .filter(JpStatusSnapshot.case_id.in_(case_ids))
+            .order_by(
+                JpStatusSnapshot.case_id,
+                JpStatusSnapshot.derived_at.asc(),
+                JpStatusSnapshot.created_at.asc(),
+            )
+            .all()
+        )
+        by_case: dict[uuid.UUID, list[Any]] = {}
+        for snapshot in snapshots:
+            by_case.setdefault(snapshot.case_id, []).append(snapshot)
+
+        delete_ids: list[uuid.UUID] = []
+        for case_snapshots in by_case.values():
+            ids, duplicates, expired = _select_redundant(case_snapshots, cutoff)
+            delete_ids.extend(ids)
+            counters["deleted_duplicates"] += duplicates
+            counters["deleted_expired"] += expired
+
+        if delete_ids and not dry_run:
+            db.query(JpStatusSnapshot).filter(JpStatusSnapshot.id.in_(delete_ids)).delete(
+                synchronize_session=False
+            )
+        last_case_id = case_ids[-1]
+        if dry_run:
+            db.rollback()
+        else:
+            if resume_key:
+                _save_cursor(db, resume_key, last_case_id)
+            db.commit()
+        db.expunge_all()
+
+        counters["batches"] += 1
+        counters["cases"] += len(case_ids)
+        counters["snapshots"] += len(snapshots)
+        counters["last_case_id"] = str(last_case_id)
+        if progress:
+            progress(dict(counters))
+
+    logger.info("Status snapshot compaction finished", **counters)
+    return counters
@@ -0,0 +1,408 @@
+"""Raw bulk data → normalized JSONL converter for JP Patent Index.
+
+Input records are streamed and cut into chunks; each chunk is normalized,
+validated against ``NormalizedRecord`` and written as a compressed JSONL
+part file by a worker process. A ``manifest.json`` lists the parts so
+``jp-index-import`` can ingest the whole output directory.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import UTC, datetime
+from functools import cache
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    TypedDict,
+    get_args,
+    get_origin,
+    get_type_hints,
+    is_typeddict,
+)
+
+from app.core import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = "jp-index-normalized-jsonl"
+COMPRESSION_SUFFIXES = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst", "none": ".jsonl"}
+INPUT_SUFFIXES = {".jsonl", ".json", ".csv"}
+MAX_ERROR_SAMPLES = 20
+
+ProgressCallback = Callable[[dict[str, Any]], None]
+
+
+class NormalizedDocument(TypedDict, total=False):
+    doc_type: str
+    publication_number: str
+    patent_number: str
+    kind: str
+    publication_date: str
+
+
+class NormalizedApplicant(TypedDict, total=False):
+    name_raw: str
+    name_norm: str
+    role: str
+    is_primary: bool
+    normalize_confidence: float
+    source: str
+
+
+class NormalizedClassification(TypedDict, total=False):
+    type: str
+    code: str
+    version: str
+    is_primary: bool
+
+
+class NormalizedStatusEvent(TypedDict, total=False):
+    event_type: str
+    event_date: str
+    source: str
+    payload: dict[str, Any]
+
+
+class NormalizedRecord(TypedDict, total=False):
+    application_number: str
+    filing_date: str
+    title: str
+    abstract: str
+    last_update_date: str
+    documents: list[NormalizedDocument]
+    applicants: list[NormalizedApplicant]
+    classifications: list[NormalizedClassification]
+    status_events: list[NormalizedStatusEvent]
+
+
+def normalize_record(raw: dict[str, Any]) -> dict[str, Any]:
+    """Map raw record to normalized JSONL schema."""
+    application_number = raw.get("application_number") or raw.get("出願番号")
+    filing_date = raw.get("filing_date") or raw.get("出願日")
+    title = raw.get("title") or raw.get("発明の名称")
+    abstract = raw.get("abstract") or raw.get("要約")
+    last_update_date = raw.get("last_update_date") or raw.get("更新日")
+
+    documents = raw.get("documents") or []
+    if not documents:
+        publication_number = raw.get("publication_number") or raw.get("公開番号")
+        patent_number = raw.get("patent_number") or raw.get("特許番号")
+        kind = raw.get("kind")
+        publication_date = raw.get("publication_date") or raw.get("公開日")
+        if publication_number or patent_number:
+            documents = [
+                {
+                    "doc_type": "publication" if publication_number else "registration",
+                    "publication_number": publication_number,
+                    "patent_number": patent_number,
+                    "kind": kind,
+                    "publication_date": publication_date,
+                }
+            ]
+
+    applicants = raw.get("applicants") or []
+    if not applicants:
+        applicant_raw = raw.get("applicant") or raw.get("出願人")
+        if applicant_raw:
+            applicants = [{"name_raw": applicant_raw, "role": "applicant", "is_primary": True}]
+
+    classifications = raw.get("classifications") or []
+    if not classifications:
+        ipc_codes = raw.get("ipc") or raw.get("IPC")
+        if ipc_codes:
+            if isinstance(ipc_codes, str):
+                ipc_codes = [c.strip() for c in ipc_codes.split(";") if c.strip()]
+            classifications = [{"type": "IPC", "code": code} for code in ipc_codes]
+
+    status_events = raw.get("status_events") or []
+    if not status_events:
+        status = raw.get("status") or raw.get("権利状態")
+        status_date = raw.get("status_date") or raw.get("状態日")
+        if status:
+            status_events = [
+                {"event_type": str(status).upper(), "event_date": status_date}
+            ]
+
+    return {
+        "application_number": application_number,
+        "filing_date": filing_date,
+        "title": title,
+        "abstract": abstract,
+        "last_update_date": last_update_date,
+        "documents": documents,
+        "applicants": applicants,
+        "classifications": classifications,
+        "status_events": status_events,
+    }
+
+
+@cache
+def _schema_hints(schema: type) -> dict[str, Any]:
+    return get_type_hints(schema)
+
+
+def _check_value(value: Any, hint: Any, path: str, errors: list[str]) -> None:
+    if value is None or hint is Any:
+        return
+    if is_typeddict(hint):
+        if not isinstance(value, dict):
+            errors.append(f"{path}: expected object")
+            return
+        _check_typed_dict(value, hint, f"{path}.", errors)
+        return
+    origin = get_origin(hint)
+    if origin is list:
+        if not isinstance(value, list):
+            errors.append(f"{path}: expected array")
+            return
+        (item_hint,) = get_args(hint)
+        for index, item in enumerate(value):
+            _check_value(item, item_hint, f"{path}[{index}]", errors)
+        return
+    expected = origin or hint
+    if expected is float:
+        expected = (int, float)
+    if not isinstance(value, expected) or (expected is not bool and isinstance(value, bool)):
+        errors.append(f"{path}: expected {getattr(hint, '__name__', hint)}")
+
+
+def _check_typed_dict(value: dict[str, Any], schema: type, prefix: str, errors: list[str]) -> None:
+    hints = _schema_hints(schema)
+    for key, item in value.items():
+        hint = hints.get(key)
+        if hint is None:
+            errors.append(f"{prefix}{key}: unknown field")
+            continue
+        _check_value(item, hint, f"{prefix}{key}", errors)
+
+
+def validate_record(record: dict[str, Any]) -> list[str]:
+    """Validate a normalized record against ``NormalizedRecord``; returns error messages."""
+    errors: list[str] = []
+    if not record.get("application_number"):
+        errors.append("application_number: required")
+    _check_typed_dict(record, NormalizedRecord, "", errors)
+    return errors
+
+
+def iter_jsonl(path: Path) -> Iterable[dict[str, Any]]:
+    with open_jsonl(path) as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            yield json.loads(line)
+
+
+def iter_json(path: Path) -> Iterable[dict[str, Any]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if isinstance(data, list):
+        yield from data
+    elif isinstance(data, dict):
+        yield data
+
+
+def iter_csv(path: Path) -> Iterable[dict[str, Any]]:
+    with path.open("r", encoding="utf-8-sig", newline="") as handle:
+        reader = csv.DictReader(handle)
+        yield from reader
+
+
+def detect_records(path: Path) -> Iterable[dict[str, Any]]:
+    suffix = path.suffix.lower()
+    if suffix == ".jsonl":
+        return iter_jsonl(path)
+    if suffix == ".json":
+        return iter_json(path)
+    if suffix == ".csv":
+        return iter_csv(path)
+    raise ValueError(f"Unsupported input format: {suffix}")
+
+
+def _input_files(path: Path) -> list[Path]:
+    if path.is_dir():
+        return sorted(p for p in path.rglob("*") if p.suffix.lower() in INPUT_SUFFIXES)
+    return [path]
+
+
+def _zstandard() -> Any:
+    try:
+        import zstandard
+    except ImportError as exc:  # noqa: BLE001
+        raise RuntimeError("zstandard is required for .zst files") from exc
+    return zstandard
+
+
+def open_jsonl(path: Path) -> IO[str]:
+    """Open a (optionally gzip/zstd-compressed) JSONL file for text reading."""
+    name = path.name.lower()
+    if name.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if name.endswith(".zst"):
+        reader = _zstandard().ZstdDecompressor().stream_reader(path.open("rb"))
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return path.open("r", encoding="utf-8")
+
+
+def _open_part_writer(path: Path, compression: str) -> IO[str]:
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    if compression == "zstd":
+        writer = _zstandard().ZstdCompressor(level=3).stream_writer(path.open("wb"))
+        return io.TextIOWrapper(writer, encoding="utf-8")
+    return path.open("w", encoding="utf-8")
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def resolve_normalized_paths(path: Path) -> list[Path]:
+    """Expand a manifest (or a directory containing one) into its part files.
+
+    Any other path, including a plain ``.json`` record file, is returned unchanged.
+    """
+    manifest_path = path / MANIFEST_NAME if path.is_dir() else path
+    if manifest_path.name != MANIFEST_NAME or not manifest_path.is_file():
+        return [path]
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise ValueError(f"Not a normalized JSONL manifest: {manifest_path}")
+    return [manifest_path.parent / part["path"] for part in manifest.get("parts", [])]
+
+
+def _convert_chunk(
+    index: int,
+    offset: int,
+    records: list[dict[str, Any]],
+    output_dir: str,
+    compression: str,
+) -> dict[str, Any]:
+    """Worker: normalize, validate and write one part file."""
+    part_path = Path(output_dir) / f"part-{index:05d}{COMPRESSION_SUFFIXES[compression]}"
+    written = 0
+    invalid = 0
+    samples: list[dict[str, Any]] = []
+    with _open_part_writer(part_path, compression) as out:
+        for position, raw in enumerate(records):
+            try:
+                normalized = normalize_record(raw)
+                errors = validate_record(normalized)
+            except Exception as exc:  # noqa: BLE001
+                errors = [f"normalize failed: {exc}"]
+            if errors:
+                invalid += 1
+                if len(samples) < MAX_ERROR_SAMPLES:
+                    samples.append({"record": offset + position, "errors": errors})
+                continue
+            out.write(json.dumps(normalized, ensure_ascii=False) + "\n")
+            written += 1
+    return {
+        "index": index,
+        "path": part_path.name,
+        "records": written,
+        "invalid": invalid,
+        "bytes": part_path.stat().st_size,
+        "sha256": _file_sha256(part_path),
+        "errors": samples,
+    }
+
+
+def _iter_chunks(
+    records: Iterable[dict[str, Any]], chunk_size: int
+) -> Iterator[tuple[int, list[dict[str, Any]]]]:
+    offset = 0
+    chunk: list[dict[str, Any]] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield offset, chunk
+            offset += len(chunk)
+            chunk = []
+    if chunk:
+        yield offset, chunk
+
+
+def convert_to_normalized_jsonl(
+    input_path: Path,
+    output_dir: Path,
+    workers: int | None = None,
+    chunk_size: int = 20000,
+    compression: str = "gzip",
+    progress: ProgressCallback | None = None,
+) -> dict[str, Any]:
+    """Convert raw bulk files into compressed normalized JSONL parts plus a manifest.
+
+    ``input_path`` may be a single json/jsonl/csv file or a directory of them.
+    With ``workers=1`` everything runs in-process.
+    """
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unsupported compression: {compression}")
+    if compression == "zstd":
+        _zstandard()
+    workers = workers or os.cpu_count() or 1
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    inputs = _input_files(input_path)
+    records = (record for path in inputs for record in detect_records(path))
+    parts: list[dict[str, Any]] = []
+
+    def _collect(part: dict[str, Any]) -> None:
+        parts.append(part)
+        if progress:
+            progress(part)
+
+    if workers == 1:
+        for index, (offset, chunk) in enumerate(_iter_chunks(records, chunk_size)):
+            _collect(_convert_chunk(index, offset, chunk, str(output_dir), compression))
+    else:
+        # Bound in-flight chunks so memory stays flat while the reader streams ahead
+        max_pending = workers * 2
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: set[Future] = set()
+            for index, (offset, chunk) in enumerate(_iter_chunks(records, chunk_size)):
+                pending.add(
+                    pool.submit(_convert_chunk, index, offset, chunk, str(output_dir), compression)
+                )
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _collect(future.result())
+            for future in pending:
+                _collect(future.result())
+
+    parts.sort(key=lambda part: part["index"])
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "version": 1,
+        "created_at": datetime.now(UTC).isoformat(),
+        "inputs": [str(path) for path in inputs],
+        "compression": compression,
+        "records": sum(part["records"] for part in parts),
+        "invalid": sum(part["invalid"] for part in parts),
+        "parts": parts,
+    }
+    (output_dir / MANIFEST_NAME).write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    logger.info(
+        "Normalized JSONL conversion finished",
+        parts=len(parts),
+        records=manifest["records"],
+        invalid=manifest["invalid"],
+    )
+    return manifest
@@ -0,0 +1,340 @@
+"""Case detail loader for JP Patent Index."""
+
+from __future__ import annotations
+
+import hashlib
+import uuid
+from datetime import date, datetime
+from typing import Any, Optional
+
+from sqlalchemy import bindparam, func, select, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session, selectinload
+
+from app.db.models import JpCase, JpCaseApplicant, JpStatusSnapshot
+from app.db.session import engine
+
+RENEWAL_TOKENS = ("RENEW", "MAINTENANCE", "FEE_PAID")
+EXPIRED_STATUSES = {"expired", "withdrawn", "abandoned", "rejected"}
+
+# One round trip: child collections are aggregated into JSON arrays per case.
+_DETAIL_SQL = text(
+    """
+    SELECT
+        c.id,
+        c.application_number_raw,
+        c.application_number_norm,
+        c.filing_date,
+        c.title,
+        c.abstract,
+        c.current_status,
+        c.status_updated_at,
+        c.last_update_date,
+        (
+            SELECT COALESCE(json_agg(json_build_object(
+                'type', n.number_type,
+                'number_raw', n.number_raw,
+                'number_norm', n.number_norm,
+                'kind', n.kind,
+                'is_primary', n.is_primary
+            )), '[]'::json)
+            FROM phase2.jp_number_aliases n
+            WHERE n.case_id = c.id
+        ) AS numbers,
+        (
+            SELECT COALESCE(json_agg(json_build_object(
+                'doc_type', d.doc_type,
+                'publication_number_raw', d.publication_number_raw,
+                'publication_number_norm', d.publication_number_norm,
+                'patent_number_raw', d.patent_number_raw,
+                'patent_number_norm', d.patent_number_norm,
+                'kind', d.kind,
+                'publication_date', d.publication_date
+            )), '[]'::json)
+            FROM phase2.jp_documents d
+            WHERE d.case_id = c.id
+        ) AS documents,
+        (
+            SELECT COALESCE(json_agg(json_build_object(
+                'name_raw', a.name_raw,
+                'name_norm', a.name_norm,
+                'role', ca.role,
+                'is_primary', ca.is_primary
+            )), '[]'::json)
+            FROM phase2.jp_case_applicants ca
+            JOIN phase2.jp_applicants a ON a.id = ca.applicant_id
+            WHERE ca.case_id = c.id
+        ) AS applicants,
+        (
+            SELECT COALESCE(json_agg(json_build_object(
+                'type', cl.type,
+                'code', cl.code,
+                'version', cl.version,
+                'is_primary', cl.is_primary
+            )), '[]'::json)
+            FROM phase2.jp_classifications cl
+            WHERE cl.case_id = c.id
+        ) AS classifications,
+        (
+            SELECT COALESCE(json_agg(json_build_object(
+                'event_type', e.event_type,
+                'event_date', e.event_date,
+                'source', e.source
+            ) ORDER BY e.event_date ASC NULLS LAST), '[]'::json)
+            FROM phase2.jp_status_events e
+            WHERE e.case_id = c.id
+        ) AS status_events,
+        (
+            SELECT COALESCE(json_agg(json_build_object(
+                'status', s.status,
+                'derived_at', s.derived_at,
+                'logic_version', s.logic_version,
+                'reason', s.reason
+            ) ORDER BY s.derived_at DESC), '[]'::json)
+            FROM phase2.jp_status_snapshots s
+            WHERE s.case_id = c.id
+        ) AS status_snapshots
+    FROM phase2.jp_cases c
+    WHERE c.id = :case_id
+    """
+).bindparams(bindparam("case_id", type_=UUID(as_uuid=True)))
+
+
+def _iso(value: Any) -> Optional[str]:
+    """Return ISO text for date/datetime values (JSON-aggregated values arrive as text)."""
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    try:
+        # Postgres JSON renders timestamps with variable fraction digits; normalize.
+        return datetime.fromisoformat(str(value)).isoformat()
+    except ValueError:
+        return str(value)
+
+
+def derive_rights_status(current_status: Optional[str], has_renewal: bool) -> Optional[str]:
+    if current_status in EXPIRED_STATUSES:
+        return "expired"
+    if has_renewal:
+        return "renewed"
+    if current_status:
+        return "active"
+    return None
+
+
+def _build_payload(case: dict[str, Any], children: dict[str, list[dict[str, Any]]]) -> dict[str, Any]:
+    documents = children["documents"]
+    events = children["status_events"]
+
+    registration_date: Optional[str] = None
+    patent_numbers: list[str] = []
+    for doc in documents:
+        doc["publication_date"] = _iso(doc.get("publication_date"))
+        if doc.get("patent_number_norm"):
+            patent_numbers.append(doc["patent_number_norm"])
+        if doc.get("doc_type") == "registration" and doc["publication_date"]:
+            if not registration_date or doc["publication_date"] > registration_date:
+                registration_date = doc["publication_date"]
+
+    for event in events:
+        event["event_date"] = _iso(event.get("event_date"))
+    for snapshot in children["status_snapshots"]:
+        snapshot["derived_at"] = _iso(snapshot.get("derived_at"))
+
+    has_renewal = any(
+        e.get("event_type") and any(token in e["event_type"].upper() for token in RENEWAL_TOKENS)
+        for e in events
+    )
+
+    return {
+        "case": {
+            "case_id": str(case["id"]),
+            "application_number_raw": case["application_number_raw"],
+            "application_number_norm": case["application_number_norm"],
+            "filing_date": _iso(case["filing_date"]),
+            "title": case["title"],
+            "abstract": case["abstract"],
+            "current_status": case["current_status"],
+            "rights_status": derive_rights_status(case["current_status"], has_renewal),
+            "status_updated_at": _iso(case["status_updated_at"]),
+            "last_update_date": _iso(case["last_update_date"]),
+            "registration_date": registration_date,
+            "patent_numbers": patent_numbers,
+        },
+        "numbers": children["numbers"],
+        "documents": documents,
+        "applicants": children["applicants"],
+        "classifications": children["classifications"],
+        "status_events": events,
+        "status_snapshots": children["status_snapshots"],
+    }
+
+
+def _load_postgres(db: Session, case_id: uuid.UUID) -> Optional[dict[str, Any]]:
+    row = db.execute(_DETAIL_SQL, {"case_id": case_id}).mappings().first()
+    if not row:
+        return None
+    children = {
+        key: list(row[key] or [])
+        for key in (
+            "numbers",
+            "documents",
+            "applicants",
+            "classifications",
+            "status_events",
+            "status_snapshots",
+        )
+    }
+    return _build_payload(dict(row), children)
+
+
+def _load_orm(db: Session, case_id: uuid.UUID) -> Optional[dict[str, Any]]:
+    case = (
+        db.query(JpCase)
+        .options(
+            selectinload(JpCase.number_aliases),
+            selectinload(JpCase.documents),
+            selectinload(JpCase.applicants).selectinload(JpCaseApplicant.applicant),
+            selectinload(JpCase.classifications),
+            selectinload(JpCase.status_events),
+            selectinload(JpCase.status_snapshots),
+        )
+        .filter(JpCase.id == case_id)
+        .first()
+    )
+    if not case:
+        return None
+
+    events = sorted(
+        case.status_events,
+        key=lambda e: (e.event_date is None, e.event_date or date.min),
+    )
+    snapshots = sorted(
+        case.status_snapshots,
+        key=lambda s: s.derived_at or datetime.min,
+        reverse=True,
+    )
+    children = {
+        "numbers": [
+            {
+                "type": n.number_type,
+                "number_raw": n.number_raw,
+                "number_norm": n.number_norm,
+                "kind": n.kind,
+                "is_primary": n.is_primary,
+            }
+            for n in case.number_aliases
+        ],
+        "documents": [
+            {
+                "doc_type": d.doc_type,
+                "publication_number_raw": d.publication_number_raw,
+                "publication_number_norm": d.publication_number_norm,
+                "patent_number_raw": d.patent_number_raw,
+                "patent_number_norm": d.patent_number_norm,
+                "kind": d.kind,
+                "publication_date": d.publication_date,
+            }
+            for d in case.documents
+        ],
+        "applicants": [
+            {
+                "name_raw": link.applicant.name_raw,
+                "name_norm": link.applicant.name_norm,
+                "role": link.role,
+                "is_primary": link.is_primary,
+            }
+            for link in case.applicants
+        ],
+        "classifications": [
+            {
+                "type": c.type,
+                "code": c.code,
+                "version": c.version,
+                "is_primary": c.is_primary,
+            }
+            for c in case.classifications
+        ],
+        "status_events": [
+            {"event_type": e.event_type, "event_date": e.event_date, "source": e.source}
+            for e in events
+        ],
+        "status_snapshots": [
+            {
+                "status": s.status,
+                "derived_at": s.derived_at,
+                "logic_version": s.logic_version,
+                "reason": s.reason,
+            }
+            for s in snapshots
+        ],
+    }
+    case_row = {
+        "id": case.id,
+        "application_number_raw": case.application_number_raw,
+        "application_number_norm": case.application_number_norm,
+        "filing_date": case.filing_date,
+        "title": case.title,
+        "abstract": case.abstract,
+        "current_status": case.current_status,
+        "status_updated_at": case.status_updated_at,
+        "last_update_date": case.last_update_date,
+    }
+    return _build_payload(case_row, children)
+
+
+def load_case_detail(db: Session, case_id: uuid.UUID) -> Optional[dict[str, Any]]:
+    """Load the full case detail payload (single JSON-aggregated query on Postgres)."""
+    if engine.dialect.name == "postgresql":
+        return _load_postgres(db, case_id)
+    return _load_orm(db, case_id)
+
+
+def load_case_version(db: Session, case_id: uuid.UUID) -> Optional[tuple[Any, ...]]:
+    """Read the cheap version tuple that identifies a case detail payload.
+
+    Ingest and re-derivation bump ``change_seq`` in the same transaction as the
+    data they write, and compaction changes the snapshot count, so a cached
+    payload is current exactly when its version tuple still matches. Returns
+    ``None`` when the case does not exist.
+    """
+    snapshot_count = (
+        select(func.count(JpStatusSnapshot.id))
+        .where(JpStatusSnapshot.case_id == JpCase.id)
+        .scalar_subquery()
+    )
+    row = (
+        db.query(
+            JpCase.change_seq,
+            JpCase.last_update_date,
+            JpCase.current_status,
+            JpCase.status_updated_at,
+            snapshot_count,
+        )
+        .filter(JpCase.id == case_id)
+        .first()
+    )
+    if row is None:
+        return None
+    return tuple(_iso(value) if isinstance(value, (date, datetime)) else value for value in row)
+
+
+def compute_detail_etag(case_id: uuid.UUID, version: tuple[Any, ...]) -> str:
+    """Weak ETag derived from the case version tuple (see ``load_case_version``)."""
+    basis = "|".join(str(part if part is not None else "") for part in (case_id, *version))
+    digest = hashlib.sha256(basis.encode("utf-8")).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        if candidate.strip().removeprefix("W/") == bare:
+            return True
+    return False
@@ -5,7 +5,7 @@ from __future__ import annotations
 import json
 from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Any, Optional, TypedDict
+from typing import Any, Optional
 
 from sqlalchemy import func
 from sqlalchemy.orm import Session
@@ -25,55 +25,14 @@ from app.db.models import (
     JpSearchDocument,
 )
 from app.db.session import engine
+from app.jp_index.changes import next_change_seq
+from app.jp_index.convert import open_jsonl, resolve_normalized_paths
 from app.jp_index.normalize import normalize_number, normalize_applicant_name
-from app.jp_index.status import derive_status
+from app.jp_index.status import STATUS_LOGIC_VERSION, derive_status
 
 logger = get_logger(__name__)
 
 
-class NormalizedDocument(TypedDict, total=False):
-    doc_type: str
-    publication_number: str
-    patent_number: str
-    kind: str
-    publication_date: str
-
-
-class NormalizedApplicant(TypedDict, total=False):
-    name_raw: str
-    name_norm: str
-    role: str
-    is_primary: bool
-    normalize_confidence: float
-    source: str
-
-
-class NormalizedClassification(TypedDict, total=False):
-    type: str
-    code: str
-    version: str
-    is_primary: bool
-
-
-class NormalizedStatusEvent(TypedDict, total=False):
-    event_type: str
-    event_date: str
-    source: str
-    payload: dict[str, Any]
-
-
-class NormalizedRecord(TypedDict, total=False):
-    application_number: str
-    filing_date: str
-    title: str
-    abstract: str
-    last_update_date: str
-    documents: list[NormalizedDocument]
-    applicants: list[NormalizedApplicant]
-    classifications: list[NormalizedClassification]
-    status_events: list[NormalizedStatusEvent]
-
-
 def parse_date(value: Optional[str]) -> Optional[date]:
     if not value:
         return None
@@ -133,26 +92,36 @@ def ingest_normalized_jsonl(
     source: str,
     dry_run: bool = False,
 ) -> dict[str, Any]:
-    """Ingest normalized JSONL into JP Patent Index tables."""
+    """Ingest normalized JSONL into JP Patent Index tables.
+
+    ``path`` may be a plain/gzip/zstd JSONL file or a converter manifest
+    (or its output directory), in which case every listed part is ingested.
+    """
     if not path.exists():
         raise FileNotFoundError(f"Normalized file not found: {path}")
 
     counters = {"records": 0, "created": 0, "updated": 0, "errors": 0}
     is_postgres = engine.dialect.name == "postgresql"
 
-    with path.open("r", encoding="utf-8") as handle:
-        for line_no, line in enumerate(handle, 1):
-            line = line.strip()
-            if not line:
-                continue
-            counters["records"] += 1
-            try:
-                record = json.loads(line)
-                _upsert_record(db, record, source, is_postgres)
-                counters["updated"] += 1
-            except Exception as exc:
-                counters["errors"] += 1
-                logger.exception("Failed to ingest record", line_no=line_no, error=str(exc))
+    for part_path in resolve_normalized_paths(path):
+        with open_jsonl(part_path) as handle:
+            for line_no, line in enumerate(handle, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                counters["records"] += 1
+                try:
+                    record = json.loads(line)
+                    _upsert_record(db, record, source, is_postgres)
+                    counters["updated"] += 1
+                except Exception as exc:
+                    counters["errors"] += 1
+                    logger.exception(
+                        "Failed to ingest record",
+                        file=part_path.name,
+                        line_no=line_no,
+                        error=str(exc),
+                    )
 
     batch.status = "completed" if counters["errors"] == 0 else "partial"
     batch.finished_at = datetime.now(timezone.utc)
@@ -242,6 +211,7 @@ def _upsert_record(
     _upsert_status_events(db, case, status_events, source)
     _update_status_snapshot(db, case)
     _upsert_search_document(db, case, is_postgres)
+    case.change_seq = next_change_seq(db, is_postgres)
 
 
 def _upsert_numbers(db: Session, case: JpCase, app_norm) -> None:
@@ -463,6 +433,8 @@ def _upsert_status_events(
 
 
 def _update_status_snapshot(db: Session, case: JpCase) -> None:
+    # Session autoflush is off; make events/snapshots from this record visible
+    db.flush()
     events = db.query(JpStatusEvent).filter(JpStatusEvent.case_id == case.id).all()
     derived = derive_status(events)
 
@@ -470,11 +442,27 @@ def _update_status_snapshot(db: Session, case: JpCase) -> None:
         case.current_status = derived.status
         case.status_updated_at = datetime.now(timezone.utc)
 
+    basis = {"event_ids": derived.basis_event_ids}
+    latest = (
+        db.query(JpStatusSnapshot)
+        .filter(JpStatusSnapshot.case_id == case.id)
+        .order_by(JpStatusSnapshot.derived_at.desc())
+        .first()
+    )
+    # Snapshots are append-only history; skip when nothing changed since the last one
+    if (
+        latest
+        and latest.status == derived.status
+        and latest.logic_version == STATUS_LOGIC_VERSION
+        and (latest.basis_event_ids or {}) == basis
+    ):
+        return
+
     snapshot = JpStatusSnapshot(
         case_id=case.id,
         status=derived.status,
-        logic_version="v1",
-        basis_event_ids={"event_ids": derived.basis_event_ids},
+        logic_version=STATUS_LOGIC_VERSION,
+        basis_event_ids=basis,
         reason=derived.reason,
     )
     db.add(snapshot)
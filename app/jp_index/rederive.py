@@ -0,0 +1,266 @@
+"""Bulk status re-derivation for JP Patent Index.
+
+Recomputes ``JpCase.current_status`` for every case after a change to
+``EVENT_STATUS_MAP`` / ``FINAL_STATUS_PRIORITY``. On Postgres the
+priority-then-latest-date rule of ``derive_status`` runs as one window
+query; other dialects stream event columns in case batches.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core import get_logger
+from app.db.models import JpCase, JpSearchDocument, JpStatusEvent, JpStatusSnapshot
+from app.db.session import engine
+from app.jp_index.cache import changes_cache, detail_cache, search_cache
+from app.jp_index.changes import lock_change_seq, next_change_seq
+from app.jp_index.status import (
+    EVENT_STATUS_MAP,
+    FINAL_STATUS_PRIORITY,
+    STATUS_LOGIC_VERSION,
+    derive_status,
+)
+
+logger = get_logger(__name__)
+
+DEFAULT_STATUS = "pending"
+
+ProgressCallback = Callable[[dict[str, Any]], None]
+
+
+def _status_map_values() -> tuple[str, dict[str, Any]]:
+    """Render the event→status map as a bound VALUES list."""
+    rows: list[str] = []
+    params: dict[str, Any] = {}
+    for index, (event_type, status) in enumerate(sorted(EVENT_STATUS_MAP.items())):
+        rows.append(f"(:et{index}, :st{index}, CAST(:pr{index} AS integer))")
+        params[f"et{index}"] = event_type
+        params[f"st{index}"] = status
+        params[f"pr{index}"] = FINAL_STATUS_PRIORITY.get(status, 0)
+    return ",\n            ".join(rows), params
+
+
+def _diff_sql(values: str) -> str:
+    # Mirrors derive_status: highest priority wins, then the latest event date
+    # (undated events sort last), then the smallest event id (uuid order equals
+    # the order of its text form); cases without mapped events fall back to pending.
+    return f"""
+    INSERT INTO jp_status_rederive (case_id, old_status, new_status, basis_event_ids, reason)
+    WITH status_map(event_type, status, priority) AS (
+        VALUES
+            {values}
+    ),
+    ranked AS (
+        SELECT
+            e.case_id,
+            e.id AS event_id,
+            e.event_date,
+            m.status,
+            m.priority,
+            row_number() OVER (
+                PARTITION BY e.case_id
+                ORDER BY m.priority DESC, e.event_date DESC NULLS LAST, e.id
+            ) AS rn
+        FROM phase2.jp_status_events e
+        JOIN status_map m ON m.event_type = upper(e.event_type)
+    )
+    SELECT
+        c.id AS case_id,
+        c.current_status AS old_status,
+        COALESCE(r.status, :default_status) AS new_status,
+        CASE
+            WHEN r.event_id IS NULL THEN jsonb_build_object('event_ids', '[]'::jsonb)
+            ELSE jsonb_build_object('event_ids', jsonb_build_array(r.event_id::text))
+        END AS basis_event_ids,
+        CASE
+            WHEN r.status IS NULL THEN 'no_events'
+            ELSE r.status || ' derived from ' || COALESCE(r.event_date::text, 'unknown date')
+                || ' (priority=' || r.priority || ')'
+        END AS reason
+    FROM phase2.jp_cases c
+    LEFT JOIN ranked r ON r.case_id = c.id AND r.rn = 1
+    WHERE c.current_status IS DISTINCT FROM COALESCE(r.status, :default_status)
+    """
+
+
+_CREATE_DIFF_TABLE_SQL = """
+CREATE TEMP TABLE jp_status_rederive (
+    case_id uuid PRIMARY KEY,
+    old_status varchar(20),
+    new_status varchar(20) NOT NULL,
+    basis_event_ids jsonb,
+    reason text
+) ON COMMIT DROP
+"""
+
+_APPLY_SQL = (
+    """
+    UPDATE phase2.jp_cases c
+    SET current_status = d.new_status,
+        status_updated_at = now(),
+        updated_at = now(),
+        change_seq = nextval('phase2.jp_case_change_seq')
+    FROM jp_status_rederive d
+    WHERE c.id = d.case_id
+    """,
+    """
+    UPDATE phase2.jp_search_documents s
+    SET status = d.new_status,
+        updated_at = now()
+    FROM jp_status_rederive d
+    WHERE s.case_id = d.case_id
+    """,
+    """
+    INSERT INTO phase2.jp_status_snapshots
+        (id, case_id, status, derived_at, logic_version, basis_event_ids, reason, created_at)
+    SELECT gen_random_uuid(), d.case_id, d.new_status, now(), :logic_version,
+           d.basis_event_ids, d.reason, now()
+    FROM jp_status_rederive d
+    """,
+)
+
+
+def _transitions_report(counter: Counter, dry_run: bool) -> dict[str, Any]:
+    transitions = [
+        {"from": old, "to": new, "count": count}
+        for (old, new), count in sorted(counter.items(), key=lambda item: -item[1])
+    ]
+    return {
+        "logic_version": STATUS_LOGIC_VERSION,
+        "changed": sum(counter.values()),
+        "transitions": transitions,
+        "dry_run": dry_run,
+    }
+
+
+def _rederive_postgres(db: Session, dry_run: bool) -> dict[str, Any]:
+    values, params = _status_map_values()
+    params["default_status"] = DEFAULT_STATUS
+    db.execute(text(_CREATE_DIFF_TABLE_SQL))
+    db.execute(text(_diff_sql(values)), params)
+
+    rows = db.execute(
+        text(
+            "SELECT old_status, new_status, count(*) AS n "
+            "FROM jp_status_rederive GROUP BY old_status, new_status"
+        )
+    ).all()
+    counter: Counter = Counter({(row.old_status, row.new_status): int(row.n) for row in rows})
+
+    if dry_run or not counter:
+        db.rollback()
+        return _transitions_report(counter, dry_run)
+
+    lock_change_seq(db)
+    for statement in _APPLY_SQL:
+        db.execute(text(statement), {"logic_version": STATUS_LOGIC_VERSION})
+    db.commit()
+    return _transitions_report(counter, dry_run)
+
+
+def _rederive_batched(
+    db: Session,
+    batch_size: int,
+    dry_run: bool,
+    progress: Optional[ProgressCallback],
+) -> dict[str, Any]:
+    counter: Counter = Counter()
+    last_case_id: Optional[uuid.UUID] = None
+    scanned = 0
+
+    while True:
+        query = db.query(JpCase.id, JpCase.current_status)
+        if last_case_id is not None:
+            query = query.filter(JpCase.id > last_case_id)
+        cases = query.order_by(JpCase.id).limit(batch_size).all()
+        if not cases:
+            break
+        case_ids = [row.id for row in cases]
+
+        events_by_case: dict[uuid.UUID, list[Any]] = {}
+        event_rows = db.query(
+            JpStatusEvent.case_id,
+            JpStatusEvent.id,
+            JpStatusEvent.event_type,
+            JpStatusEvent.event_date,
+        ).filter(JpStatusEvent.case_id.in_(case_ids))
+        for row in event_rows:
+            events_by_case.setdefault(row.case_id, []).append(row._asdict())
+
+        changed: list[tuple[uuid.UUID, Any]] = []
+        for case_id, old_status in cases:
+            derived = derive_status(events_by_case.get(case_id, []), default_status=DEFAULT_STATUS)
+            if derived.status != old_status:
+                counter[(old_status, derived.status)] += 1
+                changed.append((case_id, derived))
+
+        if changed and not dry_run:
+            now = datetime.now(timezone.utc)
+            seq = next_change_seq(db, is_postgres=False)
+            status_by_case = {case_id: derived.status for case_id, derived in changed}
+            for case_id, derived in changed:
+                db.query(JpCase).filter(JpCase.id == case_id).update(
+                    {
+                        JpCase.current_status: derived.status,
+                        JpCase.status_updated_at: now,
+                        JpCase.change_seq: seq,
+                    },
+                    synchronize_session=False,
+                )
+                seq += 1
+                db.add(
+                    JpStatusSnapshot(
+                        case_id=case_id,
+                        status=derived.status,
+                        logic_version=STATUS_LOGIC_VERSION,
+                        basis_event_ids={"event_ids": derived.basis_event_ids},
+                        reason=derived.reason,
+                    )
+                )
+            search_docs = db.query(JpSearchDocument).filter(
+                JpSearchDocument.case_id.in_(list(status_by_case))
+            )
+            for search_doc in search_docs:
+                search_doc.status = status_by_case[search_doc.case_id]
+            db.commit()
+        else:
+            db.rollback()
+        db.expunge_all()
+
+        last_case_id = case_ids[-1]
+        scanned += len(case_ids)
+        if progress:
+            progress({"cases": scanned, "changed": sum(counter.values())})
+
+    return _transitions_report(counter, dry_run)
+
+
+def rederive_all_statuses(
+    db: Session,
+    batch_size: int = 5000,
+    dry_run: bool = False,
+    progress: Optional[ProgressCallback] = None,
+) -> dict[str, Any]:
+    """Re-derive status for every case and return a report of changed transitions."""
+    if engine.dialect.name == "postgresql":
+        report = _rederive_postgres(db, dry_run)
+    else:
+        report = _rederive_batched(db, batch_size, dry_run, progress)
+
+    if report["changed"] and not dry_run:
+        # Status appears in detail, search and change-feed responses
+        for cache in (detail_cache, search_cache, changes_cache):
+            cache.clear()
+    logger.info(
+        "Status re-derivation finished",
+        changed=report["changed"],
+        dry_run=dry_run,
+    )
+    return report
@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, Optional
+from typing import Any, Iterable, Optional
 
+STATUS_LOGIC_VERSION = "v1"
 
 FINAL_STATUS_PRIORITY = {
     "expired": 100,
@@ -39,12 +40,18 @@ class DerivedStatus:
     reason: str
 
 
+def _event_field(event: Any, name: str) -> Any:
+    if isinstance(event, dict):
+        return event.get(name)
+    return getattr(event, name, None)
+
+
 def derive_status(events: Iterable, default_status: str = "pending") -> DerivedStatus:
     """Derive current status from event history."""
     candidates: list[tuple[int, Optional[str], str, str]] = []
 
     for event in events:
-        event_type = getattr(event, "event_type", None) or event.get("event_type")
+        event_type = _event_field(event, "event_type")
         if not event_type:
             continue
         normalized = str(event_type).upper()
@@ -52,14 +59,17 @@ def derive_status(events: Iterable, default_status: str = "pending") -> DerivedS
         if not status:
             continue
         priority = FINAL_STATUS_PRIORITY.get(status, 0)
-        event_date = getattr(event, "event_date", None) or event.get("event_date")
-        event_id = getattr(event, "id", None) or event.get("id") or ""
+        event_date = _event_field(event, "event_date")
+        event_id = _event_field(event, "id") or ""
         candidates.append((priority, str(event_date) if event_date else "", status, str(event_id)))
 
     if not candidates:
         return DerivedStatus(status=default_status, basis_event_ids=[], reason="no_events")
 
-    # Prefer higher priority, then latest date
+    # Prefer higher priority, then latest date (undated last); ties go to the
+    # smallest event id so the result does not depend on input order.
+    # app/jp_index/rederive.py mirrors this ordering in SQL.
+    candidates.sort(key=lambda item: item[3])
     candidates.sort(key=lambda item: (item[0], item[1]), reverse=True)
     priority, event_date, status, event_id = candidates[0]
     reason = f"{status} derived from {event_date or 'unknown date'} (priority={priority})"
@@ -0,0 +1,228 @@
+"""Provider batch APIs (OpenAI Batch, Anthropic Message Batches).
+
+Batch requests are billed at a discount and are not subject to the
+interactive rate limits, at the cost of minutes-to-hours latency. Clients
+here only submit, poll and fetch; scheduling lives in
+``app.services.batch_runner``.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from app.core import settings
+from app.llm.providers import (
+    AnthropicProvider,
+    LLMResponse,
+    OpenAIProvider,
+    _anthropic_input_tokens,
+)
+
+
+@dataclass
+class BatchRequest:
+    """One prompt in a batch; ``custom_id`` maps the result back."""
+
+    custom_id: str
+    system_prompt: str
+    user_prompt: str
+    temperature: float = 0.0
+    prompt_prefix: str = ""
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one batch request: a response or an error message."""
+
+    custom_id: str
+    response: LLMResponse | None = None
+    error: str | None = None
+
+
+class BatchClient(Protocol):
+    """Submit/poll/fetch interface implemented per provider."""
+
+    model: str
+
+    def submit(self, requests: list[BatchRequest]) -> str:
+        """Submit requests and return the provider batch id."""
+        ...
+
+    def is_done(self, batch_id: str) -> bool:
+        """True once results can be fetched; raises if the batch failed."""
+        ...
+
+    def results(self, batch_id: str) -> list[BatchResult]:
+        """Fetch results; requests without a result are reported as errors."""
+        ...
+
+
+class BatchFailedError(RuntimeError):
+    """The provider rejected or cancelled a whole batch."""
+
+
+class OpenAIBatchClient:
+    """OpenAI Batch API: JSONL upload, ``/v1/batches``, JSONL output file."""
+
+    endpoint = "/v1/chat/completions"
+
+    def __init__(self, provider: OpenAIProvider, completion_window: str = "24h"):
+        self.provider = provider
+        self.client = provider.client
+        self.model = provider.model
+        self.completion_window = completion_window
+
+    def submit(self, requests: list[BatchRequest]) -> str:
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": request.custom_id,
+                    "method": "POST",
+                    "url": self.endpoint,
+                    "body": self.provider._request(
+                        request.system_prompt,
+                        request.user_prompt,
+                        request.temperature,
+                        request.prompt_prefix,
+                    ),
+                },
+                ensure_ascii=False,
+            )
+            for request in requests
+        ]
+        payload = ("\n".join(lines) + "\n").encode("utf-8")
+        input_file = self.client.files.create(file=("batch.jsonl", payload), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=self.endpoint,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def is_done(self, batch_id: str) -> bool:
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status in {"failed", "cancelled"}:
+            raise BatchFailedError(f"OpenAI batch {batch_id} {batch.status}")
+        # Expired batches still return whatever finished in the window
+        return batch.status in {"completed", "expired"}
+
+    def results(self, batch_id: str) -> list[BatchResult]:
+        batch = self.client.batches.retrieve(batch_id)
+        results: list[BatchResult] = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    results.append(self._to_result(json.loads(line)))
+        return results
+
+    def _to_result(self, item: dict[str, Any]) -> BatchResult:
+        custom_id = item["custom_id"]
+        response = item.get("response") or {}
+        body = response.get("body") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            error = item.get("error") or body.get("error") or f"HTTP {response.get('status_code')}"
+            message = error.get("message") if isinstance(error, dict) else error
+            return BatchResult(custom_id, error=str(message))
+
+        content = body["choices"][0]["message"].get("content") or ""
+        usage = body.get("usage") or {}
+        return BatchResult(
+            custom_id,
+            response=LLMResponse(
+                content=content,
+                parsed_json=self.provider._parse_json(content),
+                model=self.model,
+                tokens_input=usage.get("prompt_tokens", 0),
+                tokens_output=usage.get("completion_tokens", 0),
+                latency_ms=0,
+                tokens_cached=(usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0,
+            ),
+        )
+
+
+class AnthropicBatchClient:
+    """Anthropic Message Batches API."""
+
+    def __init__(self, provider: AnthropicProvider):
+        self.provider = provider
+        self.client = provider.client
+        self.model = provider.model
+
+    def submit(self, requests: list[BatchRequest]) -> str:
+        batch = self.client.messages.batches.create(
+            requests=[
+                {
+                    "custom_id": request.custom_id,
+                    "params": self.provider._request(
+                        request.system_prompt,
+                        request.user_prompt,
+                        request.temperature,
+                        request.prompt_prefix,
+                    ),
+                }
+                for request in requests
+            ]
+        )
+        return batch.id
+
+    def is_done(self, batch_id: str) -> bool:
+        batch = self.client.messages.batches.retrieve(batch_id)
+        return batch.processing_status == "ended"
+
+    def results(self, batch_id: str) -> list[BatchResult]:
+        results: list[BatchResult] = []
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type != "succeeded":
+                error = getattr(entry.result, "error", None)
+                results.append(BatchResult(entry.custom_id, error=str(error or entry.result.type)))
+                continue
+            message = entry.result.message
+            content = message.content[0].text if message.content else ""
+            tokens_input, tokens_cached = _anthropic_input_tokens(message.usage)
+            results.append(
+                BatchResult(
+                    entry.custom_id,
+                    response=LLMResponse(
+                        content=content,
+                        parsed_json=self.provider._parse_json(content),
+                        model=self.model,
+                        tokens_input=tokens_input,
+                        tokens_output=message.usage.output_tokens,
+                        latency_ms=0,
+                        tokens_cached=tokens_cached,
+                    ),
+                )
+            )
+        return results
+
+
+def get_batch_client(provider: str | None = None) -> BatchClient:
+    """Get the batch client for the configured LLM provider."""
+    provider = provider or settings.llm_provider
+
+    if provider == "openai":
+        if not settings.openai_api_key:
+            raise ValueError("OPENAI_API_KEY is required for OpenAI provider")
+        return OpenAIBatchClient(
+            OpenAIProvider(
+                settings.openai_api_key,
+                settings.openai_model,
+                base_url=settings.openai_base_url or None,
+            )
+        )
+    elif provider == "anthropic":
+        if not settings.anthropic_api_key:
+            raise ValueError("ANTHROPIC_API_KEY is required for Anthropic provider")
+        return AnthropicBatchClient(
+            AnthropicProvider(
+                settings.anthropic_api_key,
+                settings.anthropic_model,
+                base_url=settings.anthropic_base_url or None,
+            )
+        )
+    else:
+        raise ValueError(f"Unknown LLM provider: {provider}")
@@ -2,7 +2,8 @@
 
 import asyncio
 import json
-import time
+import threading
+import weakref
 from typing import Any
 
 import httpx
@@ -11,6 +12,34 @@ from app.core import get_logger, settings
 
 logger = get_logger(__name__)
 
+# Terminal statuses of a background response (``/v1/responses``)
+FAILED_STATUSES = {"failed", "cancelled", "incomplete"}
+
+# One HTTP client per event loop (httpx async connections cannot cross loops)
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_http_clients_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared HTTP client for Deep Research calls on the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _http_clients_lock:
+        client = _http_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(timeout=settings.llm_timeout_seconds)
+            _http_clients[loop] = client
+        return client
+
+
+async def close_http_client() -> None:
+    """Close the running loop's shared client (for loops that end, e.g. ``asyncio.run``)."""
+    with _http_clients_lock:
+        client = _http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
 
 class DeepResearchProvider:
     """OpenAI Deep Research provider for comprehensive patent search."""
@@ -20,7 +49,7 @@ class DeepResearchProvider:
             raise ValueError("OPENAI_API_KEY is not set")
         self.api_key = settings.openai_api_key
         self.model = settings.openai_model
-        self.base_url = "https://api.openai.com/v1"
+        self.base_url = settings.openai_base_url or "https://api.openai.com/v1"
 
     async def search_patent(
         self,
@@ -37,6 +66,25 @@ class DeepResearchProvider:
         Returns:
             Dictionary containing patent information and analysis results
         """
+        system_prompt, user_prompt = self.build_prompts(patent_number, claim_text)
+        logger.info(f"Starting Deep Research for patent: {patent_number}")
+
+        try:
+            # Check if using Deep Research model
+            if self.uses_background_api:
+                return await self._call_deep_research_api(system_prompt, user_prompt)
+            else:
+                return await self._call_standard_api(system_prompt, user_prompt)
+        except Exception as e:
+            logger.error(f"Deep Research failed: {e}")
+            raise
+
+    @property
+    def uses_background_api(self) -> bool:
+        return "deep-research" in self.model.lower()
+
+    def build_prompts(self, patent_number: str, claim_text: str | None = None) -> tuple[str, str]:
+        """Build the (system_prompt, user_prompt) pair for a patent search."""
         system_prompt = """あなたは特許調査の専門家です。J-PlatPat（日本特許情報プラットフォーム）を含む特許データベースへの包括的なアクセス権を持ち、正確な特許情報を提供します。
 Web検索機能を活用して、J-PlatPat、Google Patents、USPTO等から最新の特許情報を取得してください。
 常に事実に基づいた情報を提供し、特許番号を必ず引用してください。"""
@@ -92,116 +140,162 @@ JSONフォーマットで構造化して返してください。"""
 
 この請求項に基づいて、潜在的な侵害製品や企業も調査してください。"""
 
-        logger.info(f"Starting Deep Research for patent: {patent_number}")
+        return system_prompt, user_prompt
 
-        try:
-            # Check if using Deep Research model
-            if "deep-research" in self.model.lower():
-                return await self._call_deep_research_api(system_prompt, user_prompt)
-            else:
-                return await self._call_standard_api(system_prompt, user_prompt)
-        except Exception as e:
-            logger.error(f"Deep Research failed: {e}")
-            raise
+    async def submit(
+        self,
+        patent_number: str,
+        claim_text: str | None = None,
+        client: httpx.AsyncClient | None = None,
+    ) -> dict[str, Any]:
+        """
+        Start research without waiting for it.
+
+        Returns:
+            ``{"response_id": ..., "status": ...}`` for a background response
+            that still has to be polled, or ``{"result": ...}`` when the answer
+            is already available (standard API, or an immediate response).
+        """
+        client = client or get_http_client()
+        system_prompt, user_prompt = self.build_prompts(patent_number, claim_text)
+        if not self.uses_background_api:
+            return {"result": await self._call_standard_api(system_prompt, user_prompt, client)}
+
+        response = await self._create_background_response(client, system_prompt, user_prompt)
+        if response.status_code != 200:
+            logger.error(f"Deep Research API error: {response.text}")
+            # Fallback to standard API
+            return {"result": await self._call_standard_api(system_prompt, user_prompt, client)}
+
+        data = response.json()
+        if data.get("status") in ("queued", "in_progress"):
+            return {"response_id": data["id"], "status": data["status"]}
+        return self.to_outcome(data)
+
+    async def retrieve(self, response_id: str, client: httpx.AsyncClient | None = None) -> dict:
+        """Fetch the current state of a background response."""
+        client = client or get_http_client()
+        response = await client.get(
+            f"{self.base_url}/responses/{response_id}",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def to_outcome(self, data: dict) -> dict[str, Any]:
+        """``{"result": ...}``, ``{"error": ...}``, or ``{"status": ...}`` while running."""
+        status = data.get("status")
+        if status == "completed":
+            return {"result": self._extract_response(data)}
+        if status in FAILED_STATUSES:
+            return {"error": f"Deep Research {status}: {data.get('error') or data.get('incomplete_details')}"}
+        return {"status": status}
+
+    async def _create_background_response(
+        self, client: httpx.AsyncClient, system_prompt: str, user_prompt: str
+    ) -> httpx.Response:
+        return await client.post(
+            f"{self.base_url}/responses",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}",
+            },
+            json={
+                "model": self.model,
+                "input": f"{system_prompt}\n\n{user_prompt}",
+                "reasoning": {"summary": "auto"},
+                "background": True,
+                "tools": [{"type": "web_search_preview"}],
+                "max_output_tokens": 10000,
+            },
+        )
 
     async def _call_deep_research_api(
         self,
         system_prompt: str,
         user_prompt: str,
     ) -> dict[str, Any]:
-        """Call the OpenAI Deep Research API (v1/responses endpoint)."""
-        async with httpx.AsyncClient(timeout=600.0) as client:
-            # Initial request
-            response = await client.post(
-                f"{self.base_url}/responses",
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}",
-                },
-                json={
-                    "model": self.model,
-                    "input": f"{system_prompt}\n\n{user_prompt}",
-                    "reasoning": {"summary": "auto"},
-                    "background": True,
-                    "tools": [{"type": "web_search_preview"}],
-                    "max_output_tokens": 10000,
-                },
-            )
-
-            if response.status_code != 200:
-                logger.error(f"Deep Research API error: {response.text}")
-                # Fallback to standard API
-                return await self._call_standard_api(system_prompt, user_prompt)
+        """Call the OpenAI Deep Research API and wait for it (CLI use).
 
-            data = response.json()
-            logger.info(f"Deep Research initial response: {data.get('status')}")
+        API-started research jobs are submitted and then polled by
+        ``app.services.research_poller`` instead of waiting in a request.
+        """
+        client = get_http_client()
+        response = await self._create_background_response(client, system_prompt, user_prompt)
 
-            # Poll for completion if background processing
-            if data.get("status") in ("queued", "in_progress"):
-                response_id = data["id"]
-                max_attempts = 90  # 15 minutes (10 second intervals)
+        if response.status_code != 200:
+            logger.error(f"Deep Research API error: {response.text}")
+            # Fallback to standard API
+            return await self._call_standard_api(system_prompt, user_prompt, client)
 
-                for attempt in range(max_attempts):
-                    await asyncio.sleep(10)
+        data = response.json()
+        logger.info(f"Deep Research initial response: {data.get('status')}")
 
-                    poll_response = await client.get(
-                        f"{self.base_url}/responses/{response_id}",
-                        headers={"Authorization": f"Bearer {self.api_key}"},
-                    )
+        # Poll for completion if background processing
+        if data.get("status") in ("queued", "in_progress"):
+            response_id = data["id"]
+            max_attempts = 90  # 15 minutes (10 second intervals)
 
-                    if poll_response.status_code == 200:
-                        poll_data = poll_response.json()
-                        status = poll_data.get("status")
+            for attempt in range(max_attempts):
+                await asyncio.sleep(10)
+                try:
+                    data = await self.retrieve(response_id, client)
+                except httpx.HTTPError:
+                    continue
 
-                        if attempt % 6 == 0:  # Log every minute
-                            logger.info(
-                                f"Deep Research progress: {status} ({(attempt + 1) * 10}s elapsed)"
-                            )
+                if attempt % 6 == 0:  # Log every minute
+                    logger.info(
+                        f"Deep Research progress: {data.get('status')} ({(attempt + 1) * 10}s elapsed)"
+                    )
+                outcome = self.to_outcome(data)
+                if "result" in outcome:
+                    return outcome["result"]
+                if "error" in outcome:
+                    raise Exception(outcome["error"])
 
-                        if status == "completed":
-                            return self._extract_response(poll_data)
-                        elif status == "failed":
-                            raise Exception(f"Deep Research failed: {poll_data.get('error')}")
+            raise Exception("Deep Research timeout")
 
-                raise Exception("Deep Research timeout")
-            else:
-                return self._extract_response(data)
+        outcome = self.to_outcome(data)
+        if "error" in outcome:
+            raise Exception(outcome["error"])
+        return outcome.get("result") or self._extract_response(data)
 
     async def _call_standard_api(
         self,
         system_prompt: str,
         user_prompt: str,
+        client: httpx.AsyncClient | None = None,
     ) -> dict[str, Any]:
         """Call the standard OpenAI Chat API."""
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{self.base_url}/chat/completions",
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}",
-                },
-                json={
-                    "model": "gpt-4o",
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 4000,
-                    "response_format": {"type": "json_object"},
-                },
-            )
-
-            if response.status_code != 200:
-                raise Exception(f"OpenAI API error: {response.text}")
-
-            data = response.json()
-            content = data["choices"][0]["message"]["content"]
-
-            try:
-                return json.loads(content)
-            except json.JSONDecodeError:
-                return {"raw_response": content}
+        client = client or get_http_client()
+        response = await client.post(
+            f"{self.base_url}/chat/completions",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}",
+            },
+            json={
+                "model": "gpt-4o",
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                "temperature": 0.1,
+                "max_tokens": 4000,
+                "response_format": {"type": "json_object"},
+            },
+        )
+
+        if response.status_code != 200:
+            raise Exception(f"OpenAI API error: {response.text}")
+
+        data = response.json()
+        content = data["choices"][0]["message"]["content"]
+
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            return {"raw_response": content}
 
     def _extract_response(self, data: dict) -> dict[str, Any]:
         """Extract the response content from Deep Research output."""
@@ -222,34 +316,3 @@ JSONフォーマットで構造化して返してください。"""
 
         return {"raw_response": json.dumps(data)}
 
-
-class DeepResearchJobManager:
-    """Manages Deep Research jobs with background processing."""
-
-    def __init__(self):
-        self.provider = DeepResearchProvider()
-
-    async def start_research(
-        self,
-        job_id: str,
-        patent_number: str,
-        claim_text: str | None = None,
-    ) -> dict[str, Any]:
-        """
-        Start a Deep Research job.
-
-        Returns the research results or raises an exception.
-        """
-        try:
-            result = await self.provider.search_patent(patent_number, claim_text)
-            return {
-                "job_id": job_id,
-                "status": "completed",
-                "result": result,
-            }
-        except Exception as e:
-            return {
-                "job_id": job_id,
-                "status": "failed",
-                "error": str(e),
-            }
@@ -0,0 +1,107 @@
+"""Deterministic fake LLM for load tests and benchmarks (``LLM_PROVIDER=fake``).
+
+Answers every stage with stage-shaped JSON after a simulated latency. The
+latency and output token counts are drawn from log-normal distributions
+seeded by the prompt, so the same prompt always gets the same answer,
+timing and usage, and a benchmark run is reproducible.
+"""
+
+import hashlib
+import json
+import random
+import time
+
+from app.llm.limits import estimate_tokens
+from app.llm.providers import LLMProvider, LLMResponse
+
+
+class FakeLLMProvider(LLMProvider):
+    """Offline provider with configurable latency and token distributions.
+
+    ``latency_ms`` and ``tokens_output`` are medians; ``*_jitter`` is the
+    log-normal sigma (0 makes them constant). The first ``shared_elements``
+    claim elements have the same text for every claim, like dependent claims
+    repeating claim 1; the rest are unique per claim.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        latency_jitter: float = 0.0,
+        tokens_output: int = 400,
+        tokens_jitter: float = 0.0,
+        elements: int = 4,
+        shared_elements: int = 2,
+        seed: int = 0,
+        model: str = "fake",
+    ):
+        self.latency_ms = latency_ms
+        self.latency_jitter = latency_jitter
+        self.tokens_output = tokens_output
+        self.tokens_jitter = tokens_jitter
+        self.elements = elements
+        self.shared_elements = shared_elements
+        self.seed = seed
+        self.model = model
+
+    def call(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        prompt_prefix: str = "",
+    ) -> LLMResponse:
+        digest = hashlib.sha256(f"{self.seed}\0{prompt_prefix}\0{user_prompt}".encode()).hexdigest()
+        rng = random.Random(digest)
+        latency_ms = self.latency_ms * rng.lognormvariate(0, self.latency_jitter)
+        if latency_ms > 0:
+            time.sleep(latency_ms / 1000)
+
+        tokens_output = self.tokens_output * rng.lognormvariate(0, self.tokens_jitter)
+        payload = self._payload(user_prompt, digest[:8])
+        content = json.dumps(payload, ensure_ascii=False)
+        return LLMResponse(
+            content=content,
+            parsed_json=payload,
+            model=self.model,
+            tokens_input=estimate_tokens(system_prompt, prompt_prefix, user_prompt),
+            tokens_output=max(1, round(tokens_output)),
+            latency_ms=round(latency_ms),
+            tokens_cached=estimate_tokens(prompt_prefix) if prompt_prefix else 0,
+        )
+
+    def _payload(self, user_prompt: str, tag: str) -> dict:
+        elements = [
+            {
+                "element_no": n,
+                "quote_text": f"要素{n}" if n <= self.shared_elements else f"要素{n}-{tag}",
+                "key_terms": ["端子", "制御部"],
+            }
+            for n in range(1, self.elements + 1)
+        ]
+        # Answer every element the prompt asks about (stage 13 renumbers batches)
+        asked = user_prompt.count('"element_no":') or self.elements
+        return {
+            "elements": elements,
+            "queries": [{"element_no": n, "query": f"要素{n} 仕様"} for n in range(1, asked + 1)],
+            "product_facts": [
+                {"fact_id": f"f{n}", "fact_text": f"製品は要素{n}を備える", "evidence_id": "ev"}
+                for n in range(1, self.elements + 1)
+            ],
+            "assessments": [
+                {
+                    "element_no": n,
+                    "status": "unknown",
+                    "confidence": 0.5,
+                    "rationale": "fake",
+                    "supporting_evidence": [],
+                    "missing_information": ["仕様書"],
+                }
+                for n in range(1, asked + 1)
+            ],
+            "decision": "likely",
+            "open_items": [],
+            "summary": "fake",
+            "tasks": [],
+            "errors": [],
+        }
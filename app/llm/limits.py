@@ -0,0 +1,193 @@
+"""Process-wide concurrency, rate budgets and retry policy for LLM calls.
+
+Limits are keyed by (provider, model) and shared by every provider
+instance, sync or async, so parallel claim chains and background tasks
+draw from the same budget.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+
+from app.core import get_logger, settings
+
+logger = get_logger(__name__)
+
+# Polling interval for async waiters on the shared (thread-safe) semaphore
+_ASYNC_POLL_SECONDS = 0.02
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough prompt token estimate used to reserve TPM budget before a call."""
+    # ~3 chars/token is conservative for mixed Japanese/English prompts
+    return sum(len(text) for text in texts) // 3 + 1
+
+
+class TokenBucket:
+    """Per-minute budget that refills continuously; reservations may go negative."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._tokens = float(per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` from the bucket and return how long to wait before using it."""
+        with self._lock:
+            self._refill()
+            self._tokens -= min(amount, self.capacity)
+            return max(0.0, -self._tokens / self.rate)
+
+    def adjust(self, delta: float) -> None:
+        """Correct an earlier reservation once the real usage is known."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class ProviderLimits:
+    """Concurrency slots plus optional RPM/TPM budgets for one provider/model."""
+
+    def __init__(self, max_concurrency: int, requests_per_minute: int, tokens_per_minute: int):
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._rpm = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tpm = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        wait = 0.0
+        if self._rpm:
+            wait = max(wait, self._rpm.reserve(1))
+        if self._tpm:
+            wait = max(wait, self._tpm.reserve(estimated_tokens))
+        return wait
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        if self._tpm and actual_tokens:
+            self._tpm.adjust(actual_tokens - estimated_tokens)
+
+    @contextmanager
+    def slot(self, estimated_tokens: int) -> Iterator[None]:
+        self._slots.acquire()
+        try:
+            wait = self._reserve(estimated_tokens)
+            if wait:
+                time.sleep(wait)
+            yield
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def aslot(self, estimated_tokens: int) -> AsyncIterator[None]:
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(_ASYNC_POLL_SECONDS)
+        try:
+            wait = self._reserve(estimated_tokens)
+            if wait:
+                await asyncio.sleep(wait)
+            yield
+        finally:
+            self._slots.release()
+
+
+_limits: dict[tuple[str, str], ProviderLimits] = {}
+_limits_lock = threading.Lock()
+
+
+def get_limits(provider: str, model: str) -> ProviderLimits:
+    """Return the shared limits for a provider/model, created from settings on first use."""
+    key = (provider, model)
+    with _limits_lock:
+        limits = _limits.get(key)
+        if limits is None:
+            limits = ProviderLimits(
+                max_concurrency=settings.llm_max_concurrency,
+                requests_per_minute=settings.llm_requests_per_minute,
+                tokens_per_minute=settings.llm_tokens_per_minute,
+            )
+            _limits[key] = limits
+        return limits
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter; honours Retry-After when present."""
+
+    max_retries: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    @classmethod
+    def from_settings(cls) -> RetryPolicy:
+        return cls(max_retries=settings.llm_max_retries)
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2**attempt)))
+
+
+def _retry_after_seconds(error: BaseException) -> float | None:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True for rate limits, server errors, timeouts and connection failures."""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUS or status >= 500
+    # SDK connection/timeout errors carry no status code
+    return type(error).__name__ in {"APIConnectionError", "APITimeoutError"}
+
+
+def call_with_retries[T](fn: Callable[[], T], policy: RetryPolicy, label: str) -> T:
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt >= policy.max_retries or not is_retryable(exc):
+                raise
+            delay = policy.delay(attempt, exc)
+            logger.warning("Retrying LLM call", target=label, attempt=attempt + 1, delay=delay, error=str(exc))
+            time.sleep(delay)
+            attempt += 1
+
+
+async def acall_with_retries[T](
+    fn: Callable[[], Awaitable[T]], policy: RetryPolicy, label: str
+) -> T:
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as exc:
+            if attempt >= policy.max_retries or not is_retryable(exc):
+                raise
+            delay = policy.delay(attempt, exc)
+            logger.warning("Retrying LLM call", target=label, attempt=attempt + 1, delay=delay, error=str(exc))
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,66 @@
+"""Model price table for analysis cost telemetry.
+
+Prices are USD per million tokens as ``(input, cached input, output)``.
+Models match by longest prefix, so dated snapshots such as
+``claude-sonnet-4-20250514`` use their family's price. ``LLM_PRICES`` (JSON,
+``{"model": [input, cached, output]}``) overrides or extends the table.
+"""
+
+import json
+from functools import lru_cache
+
+from app.core import get_logger, settings
+
+logger = get_logger(__name__)
+
+MODEL_PRICES: dict[str, tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "o3-deep-research": (10.00, 2.50, 40.00),
+    "o4-mini-deep-research": (2.00, 0.50, 8.00),
+    "claude-opus-4": (15.00, 1.50, 75.00),
+    "claude-sonnet-4": (3.00, 0.30, 15.00),
+    "claude-3-7-sonnet": (3.00, 0.30, 15.00),
+    "claude-3-5-haiku": (0.80, 0.08, 4.00),
+}
+
+
+@lru_cache(maxsize=8)
+def _price_table(overrides: str | None) -> dict[str, tuple[float, float, float]]:
+    table = dict(MODEL_PRICES)
+    if overrides:
+        try:
+            parsed = json.loads(overrides)
+            table.update({model: tuple(map(float, price)) for model, price in parsed.items()})
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning("Ignoring invalid LLM_PRICES", error=str(e))
+    return table
+
+
+def get_price(model: str | None) -> tuple[float, float, float] | None:
+    """Price of ``model`` (longest matching prefix), or None if it is not listed."""
+    if not model:
+        return None
+    table = _price_table(settings.llm_prices)
+    matches = [prefix for prefix in table if model.startswith(prefix)]
+    return table[max(matches, key=len)] if matches else None
+
+
+def stage_cost_usd(
+    model: str | None,
+    tokens_input: int,
+    tokens_output: int,
+    tokens_cached: int = 0,
+) -> float | None:
+    """Cost of one call; ``tokens_input`` includes the ``tokens_cached`` part."""
+    price = get_price(model)
+    if price is None:
+        return None
+    input_price, cached_price, output_price = price
+    uncached = max(tokens_input - tokens_cached, 0)
+    return (
+        uncached * input_price + tokens_cached * cached_price + tokens_output * output_price
+    ) / 1_000_000
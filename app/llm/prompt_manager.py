@@ -1,44 +1,190 @@
-"""Prompt management for loading and rendering prompts."""
+"""Prompt management for loading and rendering prompts.
 
+All prompt YAML under ``PROMPTS_DIR`` is loaded, validated and compiled once
+per process (``get_prompt_registry``). A compiled template is a list of
+literal segments and placeholder names, so rendering is a single join
+instead of one ``str.replace`` pass per variable.
+"""
+
+import hashlib
+import json
 import re
+import threading
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 import yaml
 
-from app.core import settings, get_logger
+from app.core import get_logger, settings
 
 logger = get_logger(__name__)
 
+PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+PROMPT_SUBDIRS = ["a_fetch_store_normalize", "b_discovery", "c_analyze"]
+SHARED_PREFIX_HEADER = "共通コンテキスト（このジョブの全ステージで共通）:\n\n"
+SHARED_REFERENCE = "（共通コンテキストの {name} を参照）"
+
+
+def to_prompt_string(value: Any) -> str:
+    """Convert a value to string for template substitution."""
+    if value is None:
+        return "null"
+    if isinstance(value, (dict, list)):
+        # Compact separators: indentation costs tokens on every call
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return str(value)
+
+
+class SerializationMemo:
+    """Serialized template values of one job, keyed by object identity.
+
+    Job context values (patent info, evidence, stage outputs) are rendered
+    into many prompts; each object is serialized once. Values are held so
+    their ids cannot be reused, and must not be mutated while the memo is in
+    use (stage outputs are replaced in the context, never edited).
+    """
+
+    def __init__(self) -> None:
+        self._values: dict[int, tuple[Any, str]] = {}
+        self._lock = threading.Lock()
+
+    def serialize(self, value: Any) -> str:
+        if not isinstance(value, (dict, list)):
+            return to_prompt_string(value)
+        with self._lock:
+            entry = self._values.get(id(value))
+        if entry is not None and entry[0] is value:
+            return entry[1]
+        text = to_prompt_string(value)
+        with self._lock:
+            self._values[id(value)] = (value, text)
+        return text
+
+
+class CompiledTemplate:
+    """Template split into literals and ``{{name}}`` placeholders."""
+
+    def __init__(self, text: str):
+        parts = PLACEHOLDER_RE.split(text)
+        # split() alternates literal, name, literal, ...
+        self.literals = parts[0::2]
+        self.names = parts[1::2]
+        self.placeholders = frozenset(self.names)
+
+    def render(self, values: dict[str, str]) -> str:
+        out = [self.literals[0]]
+        for name, literal in zip(self.names, self.literals[1:], strict=True):
+            out.append(values[name] if name in values else "{{" + name + "}}")
+            out.append(literal)
+        return "".join(out)
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    prompt_id: str
+    pipeline: str
+    config: dict[str, Any]
+    system: CompiledTemplate
+    user: CompiledTemplate
+    version: str  # hash of the templates; changes whenever the prompt text does
+
+
+class PromptRegistry:
+    """Every prompt under a prompts directory, loaded and compiled up front."""
+
+    def __init__(self, prompts_dir: Path):
+        self.prompts_dir = prompts_dir
+        self.common_system_prompt = self._load_common_system_prompt()
+        self.prompts: dict[str, CompiledPrompt] = {}
+        errors: list[str] = []
+        for subdir in PROMPT_SUBDIRS:
+            for path in sorted((prompts_dir / subdir).glob("*.yaml")):
+                try:
+                    self.prompts[path.stem] = self._compile(path, subdir[0].upper())
+                except ValueError as e:
+                    errors.append(str(e))
+        if errors:
+            raise ValueError("Invalid prompt files: " + "; ".join(errors))
+        logger.info("Loaded prompt registry", prompts_dir=str(prompts_dir), prompts=len(self.prompts))
+
+    def _load_common_system_prompt(self) -> str:
+        path = self.prompts_dir / "00_common_system_prompt.yaml"
+        if path.exists():
+            return _load_yaml(path).get("content", "")
+        # Fallback to txt file
+        txt_path = self.prompts_dir / "00_common_system_prompt.txt"
+        if txt_path.exists():
+            return txt_path.read_text(encoding="utf-8")
+        return ""
+
+    def _compile(self, path: Path, pipeline: str) -> CompiledPrompt:
+        config = _load_yaml(path)
+        if not isinstance(config, dict):
+            raise ValueError(f"{path.name}: not a mapping")
+        if config.get("id", path.stem) != path.stem:
+            raise ValueError(f"{path.name}: id {config.get('id')!r} does not match file name")
+        for key in ("system_prompt", "user_prompt"):
+            if not isinstance(config.get(key, ""), str):
+                raise ValueError(f"{path.name}: {key} must be a string")
+
+        system_prompt = config.get("system_prompt", "").replace(
+            "{{common_system_prompt}}", self.common_system_prompt
+        )
+        user_prompt = config.get("user_prompt", "")
+        version = hashlib.sha256(f"{system_prompt}\0{user_prompt}".encode()).hexdigest()[:16]
+        return CompiledPrompt(
+            prompt_id=path.stem,
+            pipeline=pipeline,
+            config=config,
+            system=CompiledTemplate(system_prompt),
+            user=CompiledTemplate(user_prompt),
+            version=version,
+        )
+
+    def get(self, prompt_id: str) -> CompiledPrompt:
+        prompt = self.prompts.get(prompt_id)
+        if prompt is None:
+            raise FileNotFoundError(f"Prompt not found: {prompt_id}")
+        return prompt
+
+
+def _load_yaml(path: Path) -> Any:
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+_registries: dict[Path, PromptRegistry] = {}
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry(prompts_dir: Path | None = None) -> PromptRegistry:
+    """Return the process-wide registry for a prompts directory, loaded on first use."""
+    path = Path(prompts_dir or settings.prompts_dir).resolve()
+    with _registry_lock:
+        registry = _registries.get(path)
+        if registry is None:
+            registry = PromptRegistry(path)
+            _registries[path] = registry
+        return registry
+
+
+def reload_prompts() -> None:
+    """Drop loaded registries so edited YAML is picked up on next use."""
+    with _registry_lock:
+        _registries.clear()
+
 
 class PromptManager:
     """Manages loading and rendering of prompt templates."""
 
     def __init__(self, prompts_dir: Path | None = None):
-        self.prompts_dir = prompts_dir or settings.prompts_dir
-        self._cache: dict[str, dict[str, Any]] = {}
-        self._common_system_prompt: str | None = None
-
-    def _load_yaml(self, path: Path) -> dict[str, Any]:
-        """Load a YAML file."""
-        with open(path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
+        self.registry = get_prompt_registry(prompts_dir)
+        self.prompts_dir = self.registry.prompts_dir
 
     def get_common_system_prompt(self) -> str:
         """Get the common system prompt."""
-        if self._common_system_prompt is None:
-            path = self.prompts_dir / "00_common_system_prompt.yaml"
-            if path.exists():
-                data = self._load_yaml(path)
-                self._common_system_prompt = data.get("content", "")
-            else:
-                # Fallback to txt file
-                txt_path = self.prompts_dir / "00_common_system_prompt.txt"
-                if txt_path.exists():
-                    self._common_system_prompt = txt_path.read_text(encoding="utf-8")
-                else:
-                    self._common_system_prompt = ""
-        return self._common_system_prompt
+        return self.registry.common_system_prompt
 
     def load_prompt(self, prompt_id: str) -> dict[str, Any]:
         """
@@ -50,32 +196,17 @@ class PromptManager:
         Returns:
             Prompt configuration dict with 'system_prompt', 'user_prompt', etc.
         """
-        if prompt_id in self._cache:
-            return self._cache[prompt_id]
-
-        # Determine directory based on prompt number
-        num = int(prompt_id.split("_")[0])
-        if 1 <= num <= 7:
-            subdir = "a_fetch_store_normalize"
-        elif 8 <= num <= 9:
-            subdir = "b_discovery"
-        elif 10 <= num <= 16:
-            subdir = "c_analyze"
-        else:
-            raise ValueError(f"Unknown prompt ID range: {prompt_id}")
-
-        path = self.prompts_dir / subdir / f"{prompt_id}.yaml"
-        if not path.exists():
-            raise FileNotFoundError(f"Prompt file not found: {path}")
-
-        data = self._load_yaml(path)
-        self._cache[prompt_id] = data
-        return data
+        return self.registry.get(prompt_id).config
+
+    def prompt_version(self, prompt_id: str) -> str:
+        """Content hash of a prompt's templates (including the common system prompt)."""
+        return self.registry.get(prompt_id).version
 
     def render(
         self,
         prompt_id: str,
         variables: dict[str, Any],
+        memo: SerializationMemo | None = None,
     ) -> tuple[str, str]:
         """
         Render a prompt with variables.
@@ -83,65 +214,74 @@ class PromptManager:
         Args:
             prompt_id: Prompt identifier
             variables: Dictionary of variables to substitute
+            memo: Reuses serialized values across the prompts of one job
 
         Returns:
             Tuple of (system_prompt, user_prompt)
         """
-        prompt_config = self.load_prompt(prompt_id)
-
-        # Get base prompts
-        system_prompt = prompt_config.get("system_prompt", "")
-        user_prompt = prompt_config.get("user_prompt", "")
-
-        # Add common system prompt if referenced
-        if "{{common_system_prompt}}" in system_prompt:
-            common = self.get_common_system_prompt()
-            system_prompt = system_prompt.replace("{{common_system_prompt}}", common)
-
-        # Render variables using {{variable}} syntax
-        all_vars = {**variables}
-        for key, value in all_vars.items():
-            placeholder = "{{" + key + "}}"
-            str_value = self._to_string(value)
-            system_prompt = system_prompt.replace(placeholder, str_value)
-            user_prompt = user_prompt.replace(placeholder, str_value)
-
-        # Check for unrendered placeholders
-        unrendered = set(re.findall(r"\{\{(\w+)\}\}", user_prompt))
+        prompt = self.registry.get(prompt_id)
+        serialize = memo.serialize if memo else to_prompt_string
+        needed = prompt.system.placeholders | prompt.user.placeholders
+        values = {name: serialize(variables[name]) for name in needed if name in variables}
+
+        unrendered = prompt.user.placeholders - values.keys()
         if unrendered:
             logger.warning(
                 "Unrendered placeholders in prompt",
                 prompt_id=prompt_id,
-                placeholders=list(unrendered),
+                placeholders=sorted(unrendered),
             )
 
-        return system_prompt, user_prompt
+        return prompt.system.render(values), prompt.user.render(values)
+
+    def render_with_prefix(
+        self,
+        prompt_id: str,
+        variables: dict[str, Any],
+        shared: dict[str, Any],
+        memo: SerializationMemo | None = None,
+    ) -> tuple[str, str, str]:
+        """
+        Render a prompt with the job-wide context split out as a prefix.
+
+        ``shared`` values are rendered first, in order, and are identical for
+        every call of a job, so provider prompt caches can reuse them. Variables
+        that are one of the shared objects refer to the prefix instead of
+        repeating it.
+
+        Args:
+            prompt_id: Prompt identifier
+            variables: Dictionary of variables to substitute
+            shared: Section name -> job-wide value
+            memo: Reuses serialized values across the prompts of one job
+
+        Returns:
+            Tuple of (system_prompt, prompt_prefix, user_prompt)
+        """
+        serialize = memo.serialize if memo else to_prompt_string
+        sections = [f"{name}:\n{serialize(value)}" for name, value in shared.items()]
+        prefix = SHARED_PREFIX_HEADER + "\n\n".join(sections) + "\n\n" if sections else ""
 
-    def _to_string(self, value: Any) -> str:
-        """Convert a value to string for template substitution."""
-        if value is None:
-            return "null"
-        if isinstance(value, (dict, list)):
-            import json
-            return json.dumps(value, ensure_ascii=False, indent=2)
-        return str(value)
+        shared_names = {
+            id(value): name for name, value in shared.items() if isinstance(value, (dict, list))
+        }
+        variables = {
+            key: SHARED_REFERENCE.format(name=shared_names[id(value)])
+            if id(value) in shared_names
+            else value
+            for key, value in variables.items()
+        }
+        system_prompt, user_prompt = self.render(prompt_id, variables, memo)
+        return system_prompt, prefix, user_prompt
 
     def list_prompts(self) -> list[dict[str, str]]:
         """List all available prompts."""
-        prompts = []
-        for subdir in ["a_fetch_store_normalize", "b_discovery", "c_analyze"]:
-            dir_path = self.prompts_dir / subdir
-            if dir_path.exists():
-                for yaml_file in sorted(dir_path.glob("*.yaml")):
-                    prompt_id = yaml_file.stem
-                    try:
-                        data = self.load_prompt(prompt_id)
-                        prompts.append({
-                            "id": prompt_id,
-                            "name": data.get("name", prompt_id),
-                            "description": data.get("description", ""),
-                            "pipeline": subdir[0].upper(),  # A, B, or C
-                        })
-                    except Exception as e:
-                        logger.warning(f"Failed to load prompt {prompt_id}: {e}")
-        return prompts
+        return [
+            {
+                "id": prompt.prompt_id,
+                "name": prompt.config.get("name", prompt.prompt_id),
+                "description": prompt.config.get("description", ""),
+                "pipeline": prompt.pipeline,  # A, B, or C
+            }
+            for prompt in self.registry.prompts.values()
+        ]
@@ -1,15 +1,28 @@
 """LLM provider abstraction for OpenAI and Anthropic."""
 
+import asyncio
 import json
+import threading
 import time
+import weakref
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
 from typing import Any
 
-from openai import OpenAI
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic
+from openai import AsyncOpenAI, OpenAI
 
 from app.core import settings, get_logger
+from app.llm.limits import (
+    ProviderLimits,
+    RetryPolicy,
+    acall_with_retries,
+    call_with_retries,
+    estimate_tokens,
+    get_limits,
+)
+from app.llm.streaming import ItemCallback, StreamAccumulator, StreamInterruptedError
 
 logger = get_logger(__name__)
 
@@ -24,6 +37,10 @@ class LLMResponse:
     tokens_input: int
     tokens_output: int
     latency_ms: int
+    ttft_ms: int | None = None  # time to first token (streamed calls only)
+    truncated: bool = False  # stopped at the max-token limit
+    finish_reason: str | None = None
+    tokens_cached: int = 0  # prompt tokens served from the provider's prompt cache
 
 
 class LLMProvider(ABC):
@@ -35,10 +52,103 @@ class LLMProvider(ABC):
         system_prompt: str,
         user_prompt: str,
         temperature: float = 0.0,
+        prompt_prefix: str = "",
     ) -> LLMResponse:
-        """Call the LLM with the given prompts."""
+        """Call the LLM with the given prompts.
+
+        ``prompt_prefix`` (job-wide context shared by many calls) is sent
+        before ``user_prompt`` and marked cacheable where the provider needs it.
+        """
         pass
 
+    async def acall(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        prompt_prefix: str = "",
+    ) -> LLMResponse:
+        """Async call; providers without a native client run ``call`` in a thread."""
+        return await asyncio.to_thread(
+            self.call, system_prompt, user_prompt, temperature, prompt_prefix
+        )
+
+    def stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        item_keys: Iterable[str] = (),
+        on_item: ItemCallback | None = None,
+        prompt_prefix: str = "",
+    ) -> LLMResponse:
+        """Streamed call; ``on_item(key, item)`` gets each completed item of the
+        top-level arrays named in ``item_keys`` as soon as it has been generated.
+
+        Providers without streaming make a normal call and report the items after it.
+        """
+        response = self.call(system_prompt, user_prompt, temperature, prompt_prefix)
+        if on_item and isinstance(response.parsed_json, dict):
+            for key in item_keys:
+                items = response.parsed_json.get(key)
+                for item in items if isinstance(items, list) else []:
+                    on_item(key, item)
+        return response
+
+    def _streamed(
+        self,
+        consume: Callable[[StreamAccumulator], None],
+        item_keys: Iterable[str],
+        on_item: ItemCallback | None,
+        estimated: int,
+    ) -> LLMResponse:
+        """Run ``consume(accumulator)`` in a rate-limit slot (SDK providers with
+        ``limits`` and ``model``) and build the response."""
+        with self.limits.slot(estimated):
+            stream = StreamAccumulator(item_keys, on_item)
+            try:
+                consume(stream)
+            except Exception as e:
+                # Items may already have been handed off; a retry would repeat them
+                if stream.parts:
+                    raise StreamInterruptedError(f"Stream interrupted: {e}") from e
+                raise
+
+        content = stream.content
+        parsed_json = None
+        finish_reason = stream.finish_reason
+        if stream.parser.error:
+            finish_reason = "invalid_json"
+            logger.warning(
+                "Abandoned streamed response that is not JSON",
+                error=stream.parser.error,
+                content=content[:200],
+            )
+        elif stream.truncated:
+            logger.warning(
+                "LLM response truncated at max tokens",
+                model=self.model,
+                content_chars=len(content),
+                items=sum(len(items) for items in stream.parser.items.values()),
+            )
+        else:
+            parsed_json = self._parse_json(content)
+
+        result = LLMResponse(
+            content=content,
+            parsed_json=parsed_json,
+            model=self.model,
+            tokens_input=stream.tokens_input,
+            tokens_output=stream.tokens_output,
+            latency_ms=stream.latency_ms,
+            ttft_ms=stream.ttft_ms,
+            truncated=stream.truncated,
+            finish_reason=finish_reason,
+            tokens_cached=stream.tokens_cached,
+        )
+        self.limits.settle(estimated, result.tokens_input + result.tokens_output)
+        return result
+
     def _parse_json(self, content: str) -> dict[str, Any] | None:
         """Parse JSON from content, handling markdown code blocks."""
         content = content.strip()
@@ -60,32 +170,96 @@ class LLMProvider(ABC):
             return None
 
 
+# Shared SDK clients. Sync clients are reused process-wide so their HTTP
+# connection pools are too; async clients are per event loop because httpx
+# async connections cannot cross loops. SDK retries are disabled in favour
+# of RetryPolicy, which also re-enters the rate limiter on each attempt.
+_clients: dict[tuple[Any, ...], Any] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+_clients_lock = threading.Lock()
+
+
+def _shared_client(factory: type, api_key: str, base_url: str | None) -> Any:
+    key = (factory, api_key, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = factory(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=0,
+                timeout=settings.llm_timeout_seconds,
+            )
+            _clients[key] = client
+        return client
+
+
+def _shared_async_client(factory: type, api_key: str, base_url: str | None) -> Any:
+    loop = asyncio.get_running_loop()
+    key = (factory, api_key, base_url)
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = factory(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=0,
+                timeout=settings.llm_timeout_seconds,
+            )
+            clients[key] = client
+        return client
+
+
+def _openai_cached_tokens(usage: Any) -> int:
+    details = getattr(usage, "prompt_tokens_details", None) if usage else None
+    return (getattr(details, "cached_tokens", None) or 0) if details else 0
+
+
+def _anthropic_input_tokens(usage: Any) -> tuple[int, int]:
+    """(all prompt tokens, prompt-cache reads); ``input_tokens`` excludes cached ones."""
+    cached = getattr(usage, "cache_read_input_tokens", None) or 0
+    written = getattr(usage, "cache_creation_input_tokens", None) or 0
+    return usage.input_tokens + cached + written, cached
+
+
 class OpenAIProvider(LLMProvider):
     """OpenAI API provider."""
 
-    def __init__(self, api_key: str, model: str):
-        self.client = OpenAI(api_key=api_key)
-        self.model = model
+    name = "openai"
 
-    def call(
+    def __init__(
         self,
-        system_prompt: str,
-        user_prompt: str,
-        temperature: float = 0.0,
-    ) -> LLMResponse:
-        """Call OpenAI API."""
-        start_time = time.time()
-
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
+        api_key: str,
+        model: str,
+        base_url: str | None = None,
+        limits: ProviderLimits | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.client = _shared_client(OpenAI, api_key, base_url)
+        self.limits = limits or get_limits(self.name, model)
+        self.retry_policy = retry_policy or RetryPolicy.from_settings()
+
+    def _request(
+        self, system_prompt: str, user_prompt: str, temperature: float, prompt_prefix: str = ""
+    ) -> dict:
+        # OpenAI caches long prompt prefixes automatically; no markers needed
+        return {
+            "model": self.model,
+            "messages": [
                 {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
+                {"role": "user", "content": prompt_prefix + user_prompt},
             ],
-            temperature=temperature,
-            response_format={"type": "json_object"},
-        )
+            "temperature": temperature,
+            "response_format": {"type": "json_object"},
+        }
 
+    def _to_response(self, response: Any, start_time: float) -> LLMResponse:
         latency_ms = int((time.time() - start_time) * 1000)
         content = response.choices[0].message.content or ""
 
@@ -96,62 +270,262 @@ class OpenAIProvider(LLMProvider):
             tokens_input=response.usage.prompt_tokens if response.usage else 0,
             tokens_output=response.usage.completion_tokens if response.usage else 0,
             latency_ms=latency_ms,
+            tokens_cached=_openai_cached_tokens(response.usage),
         )
 
+    def call(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        prompt_prefix: str = "",
+    ) -> LLMResponse:
+        """Call OpenAI API."""
+        request = self._request(system_prompt, user_prompt, temperature, prompt_prefix)
+        estimated = estimate_tokens(system_prompt, prompt_prefix, user_prompt)
 
-class AnthropicProvider(LLMProvider):
-    """Anthropic Claude API provider."""
+        def attempt() -> LLMResponse:
+            with self.limits.slot(estimated):
+                start_time = time.time()
+                response = self.client.chat.completions.create(**request)
+            result = self._to_response(response, start_time)
+            self.limits.settle(estimated, result.tokens_input + result.tokens_output)
+            return result
 
-    def __init__(self, api_key: str, model: str):
-        self.client = Anthropic(api_key=api_key)
-        self.model = model
+        return call_with_retries(attempt, self.retry_policy, f"{self.name}:{self.model}")
 
-    def call(
+    async def acall(
         self,
         system_prompt: str,
         user_prompt: str,
         temperature: float = 0.0,
+        prompt_prefix: str = "",
     ) -> LLMResponse:
-        """Call Anthropic API."""
-        start_time = time.time()
+        """Call OpenAI API without blocking the event loop."""
+        client = _shared_async_client(AsyncOpenAI, self.api_key, self.base_url)
+        request = self._request(system_prompt, user_prompt, temperature, prompt_prefix)
+        estimated = estimate_tokens(system_prompt, prompt_prefix, user_prompt)
+
+        async def attempt() -> LLMResponse:
+            async with self.limits.aslot(estimated):
+                start_time = time.time()
+                response = await client.chat.completions.create(**request)
+            result = self._to_response(response, start_time)
+            self.limits.settle(estimated, result.tokens_input + result.tokens_output)
+            return result
+
+        return await acall_with_retries(attempt, self.retry_policy, f"{self.name}:{self.model}")
+
+    def stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        item_keys: Iterable[str] = (),
+        on_item: ItemCallback | None = None,
+        prompt_prefix: str = "",
+    ) -> LLMResponse:
+        """Call OpenAI API with a streamed response."""
+        request = self._request(system_prompt, user_prompt, temperature, prompt_prefix)
+        estimated = estimate_tokens(system_prompt, prompt_prefix, user_prompt)
+
+        def consume(stream: StreamAccumulator) -> None:
+            response = self.client.chat.completions.create(
+                **request, stream=True, stream_options={"include_usage": True}
+            )
+            try:
+                for chunk in response:
+                    if chunk.usage:
+                        stream.tokens_input = chunk.usage.prompt_tokens
+                        stream.tokens_output = chunk.usage.completion_tokens
+                        stream.tokens_cached = _openai_cached_tokens(chunk.usage)
+                    for choice in chunk.choices:
+                        if choice.finish_reason:
+                            stream.finish_reason = choice.finish_reason
+                        if choice.delta and not stream.add(choice.delta.content or ""):
+                            return
+            finally:
+                response.close()
+
+        return call_with_retries(
+            lambda: self._streamed(consume, item_keys, on_item, estimated),
+            self.retry_policy,
+            f"{self.name}:{self.model}",
+        )
+
+
+class AnthropicProvider(LLMProvider):
+    """Anthropic Claude API provider."""
+
+    name = "anthropic"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: str | None = None,
+        limits: ProviderLimits | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.client = _shared_client(Anthropic, api_key, base_url)
+        self.limits = limits or get_limits(self.name, model)
+        self.retry_policy = retry_policy or RetryPolicy.from_settings()
 
+    def _request(
+        self, system_prompt: str, user_prompt: str, temperature: float, prompt_prefix: str = ""
+    ) -> dict:
         # Add JSON instruction to system prompt for Claude
         json_system_prompt = f"{system_prompt}\n\nIMPORTANT: Respond with valid JSON only. No markdown, no explanations."
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=4096,
-            system=json_system_prompt,
-            messages=[
+        if prompt_prefix:
+            # Cache breakpoints after the system prompt and after the shared prefix
+            cache_control = {"type": "ephemeral"}
+            return {
+                "model": self.model,
+                "max_tokens": 4096,
+                "system": [
+                    {"type": "text", "text": json_system_prompt, "cache_control": cache_control}
+                ],
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": prompt_prefix, "cache_control": cache_control},
+                            {"type": "text", "text": user_prompt},
+                        ],
+                    },
+                ],
+                "temperature": temperature,
+            }
+        return {
+            "model": self.model,
+            "max_tokens": 4096,
+            "system": json_system_prompt,
+            "messages": [
                 {"role": "user", "content": user_prompt},
             ],
-            temperature=temperature,
-        )
+            "temperature": temperature,
+        }
 
+    def _to_response(self, response: Any, start_time: float) -> LLMResponse:
         latency_ms = int((time.time() - start_time) * 1000)
         content = response.content[0].text if response.content else ""
+        tokens_input, tokens_cached = _anthropic_input_tokens(response.usage)
 
         return LLMResponse(
             content=content,
             parsed_json=self._parse_json(content),
             model=self.model,
-            tokens_input=response.usage.input_tokens,
+            tokens_input=tokens_input,
             tokens_output=response.usage.output_tokens,
             latency_ms=latency_ms,
+            tokens_cached=tokens_cached,
+        )
+
+    def call(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        prompt_prefix: str = "",
+    ) -> LLMResponse:
+        """Call Anthropic API."""
+        request = self._request(system_prompt, user_prompt, temperature, prompt_prefix)
+        estimated = estimate_tokens(system_prompt, prompt_prefix, user_prompt)
+
+        def attempt() -> LLMResponse:
+            with self.limits.slot(estimated):
+                start_time = time.time()
+                response = self.client.messages.create(**request)
+            result = self._to_response(response, start_time)
+            self.limits.settle(estimated, result.tokens_input + result.tokens_output)
+            return result
+
+        return call_with_retries(attempt, self.retry_policy, f"{self.name}:{self.model}")
+
+    async def acall(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        prompt_prefix: str = "",
+    ) -> LLMResponse:
+        """Call Anthropic API without blocking the event loop."""
+        client = _shared_async_client(AsyncAnthropic, self.api_key, self.base_url)
+        request = self._request(system_prompt, user_prompt, temperature, prompt_prefix)
+        estimated = estimate_tokens(system_prompt, prompt_prefix, user_prompt)
+
+        async def attempt() -> LLMResponse:
+            async with self.limits.aslot(estimated):
+                start_time = time.time()
+                response = await client.messages.create(**request)
+            result = self._to_response(response, start_time)
+            self.limits.settle(estimated, result.tokens_input + result.tokens_output)
+            return result
+
+        return await acall_with_retries(attempt, self.retry_policy, f"{self.name}:{self.model}")
+
+    def stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        item_keys: Iterable[str] = (),
+        on_item: ItemCallback | None = None,
+        prompt_prefix: str = "",
+    ) -> LLMResponse:
+        """Call Anthropic API with a streamed response."""
+        request = self._request(system_prompt, user_prompt, temperature, prompt_prefix)
+        estimated = estimate_tokens(system_prompt, prompt_prefix, user_prompt)
+
+        def consume(stream: StreamAccumulator) -> None:
+            response = self.client.messages.create(**request, stream=True)
+            try:
+                for event in response:
+                    if event.type == "message_start":
+                        stream.tokens_input, stream.tokens_cached = _anthropic_input_tokens(
+                            event.message.usage
+                        )
+                    elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+                        if not stream.add(event.delta.text):
+                            return
+                    elif event.type == "message_delta":
+                        stream.finish_reason = event.delta.stop_reason
+                        stream.tokens_output = event.usage.output_tokens
+            finally:
+                response.close()
+
+        return call_with_retries(
+            lambda: self._streamed(consume, item_keys, on_item, estimated),
+            self.retry_policy,
+            f"{self.name}:{self.model}",
         )
 
 
 def get_llm_provider(provider: str | None = None) -> LLMProvider:
-    """Get the configured LLM provider instance."""
+    """Get the configured LLM provider instance (SDK clients are shared)."""
     provider = provider or settings.llm_provider
 
     if provider == "openai":
         if not settings.openai_api_key:
             raise ValueError("OPENAI_API_KEY is required for OpenAI provider")
-        return OpenAIProvider(settings.openai_api_key, settings.openai_model)
+        return OpenAIProvider(
+            settings.openai_api_key, settings.openai_model, base_url=settings.openai_base_url or None
+        )
     elif provider == "anthropic":
         if not settings.anthropic_api_key:
             raise ValueError("ANTHROPIC_API_KEY is required for Anthropic provider")
-        return AnthropicProvider(settings.anthropic_api_key, settings.anthropic_model)
+        return AnthropicProvider(
+            settings.anthropic_api_key,
+            settings.anthropic_model,
+            base_url=settings.anthropic_base_url or None,
+        )
+    elif provider == "fake":
+        from app.llm.fake import FakeLLMProvider
+
+        return FakeLLMProvider()
     else:
         raise ValueError(f"Unknown LLM provider: {provider}")
@@ -0,0 +1,187 @@
+"""Incremental JSON parsing for streamed LLM responses.
+
+``IncrementalJSONParser`` consumes the response text as it arrives and
+reports each completed item of the watched top-level arrays (for example
+``elements`` from the claim element extractor) the moment its closing
+bracket is seen. It also notices output that cannot be JSON (wrong first
+character, mismatched brackets) so the stream can be abandoned early
+instead of paying for the rest of a useless completion.
+"""
+
+import json
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+# Characters allowed before the JSON starts ("```json\n" fences)
+_PREFIX_CHARS = set("`json \t\r\n")
+TRUNCATION_REASONS = {"length", "max_tokens"}
+
+ItemCallback = Callable[[str, Any], None]
+
+
+class StreamInterruptedError(RuntimeError):
+    """The connection failed after part of the response was received (not retried)."""
+
+
+class IncrementalJSONParser:
+    """Track JSON structure across chunks and emit completed array items."""
+
+    def __init__(self, item_keys: Iterable[str] = ()):
+        self.item_keys = set(item_keys)
+        self.error: str | None = None
+        self.complete = False
+        self.items: dict[str, list[Any]] = {}
+        # Only the text from the oldest open key string or array item onward is
+        # kept; ``_base`` is the absolute offset of its first character
+        self._buffer = ""
+        self._base = 0
+        self._stack: list[str] = []
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: str | None = None
+        self._array_key: str | None = None
+        self._item_start: int | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        """Consume more text; returns the ``(key, item)`` pairs completed by it."""
+        completed: list[tuple[str, Any]] = []
+        offset = self._base + len(self._buffer)
+        self._buffer += chunk
+        for position, char in enumerate(chunk, start=offset):
+            if self.error or self.complete:
+                break
+            if self._in_string:
+                self._string_char(char, position)
+            elif not self._started:
+                if char in "{[":
+                    self._started = True
+                    self._open(char, position)
+                elif char not in _PREFIX_CHARS:
+                    self.error = f"Response does not start with JSON: {char!r}"
+            elif char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char in "{[":
+                self._open(char, position)
+            elif char in "}]":
+                item = self._close(char, position)
+                if item is not None:
+                    completed.append(item)
+            elif char == "," and self._stack == ["{"]:
+                self._expect_key = True
+            elif char == ":" and self._stack == ["{"]:
+                self._expect_key = False
+        self._trim()
+        return completed
+
+    @property
+    def _in_key_string(self) -> bool:
+        return self._in_string and self._expect_key and self._stack == ["{"]
+
+    def _slice(self, start: int, end: int) -> str:
+        return self._buffer[start - self._base : end - self._base]
+
+    def _trim(self) -> None:
+        """Drop buffered text that no pending key or item can refer to."""
+        pending = [
+            start
+            for start in (
+                self._item_start,
+                self._string_start if self._in_key_string else None,
+            )
+            if start is not None
+        ]
+        keep_from = min(pending) if pending else self._base + len(self._buffer)
+        if keep_from > self._base:
+            self._buffer = self._buffer[keep_from - self._base :]
+            self._base = keep_from
+
+    def _string_char(self, char: str, position: int) -> None:
+        if self._escape:
+            self._escape = False
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            if self._in_key_string:
+                self._key = json.loads(self._slice(self._string_start, position + 1))
+            self._in_string = False
+
+    def _open(self, char: str, position: int) -> None:
+        self._stack.append(char)
+        depth = len(self._stack)
+        if depth == 1:
+            self._expect_key = char == "{"
+        elif depth == 2 and self._stack == ["{", "["] and self._key in self.item_keys:
+            self._array_key = self._key
+        elif depth == 3 and self._array_key is not None:
+            self._item_start = position
+
+    def _close(self, char: str, position: int) -> tuple[str, Any] | None:
+        expected = "{" if char == "}" else "["
+        if not self._stack or self._stack[-1] != expected:
+            self.error = f"Unexpected {char!r} at offset {position}"
+            return None
+        self._stack.pop()
+        depth = len(self._stack)
+        if depth == 0:
+            self.complete = True
+        elif depth == 1:
+            self._array_key = None
+        elif depth == 2 and self._array_key is not None and self._item_start is not None:
+            text = self._slice(self._item_start, position + 1)
+            self._item_start = None
+            try:
+                item = json.loads(text)
+            except json.JSONDecodeError as e:
+                self.error = f"Invalid array item: {e}"
+                return None
+            self.items.setdefault(self._array_key, []).append(item)
+            return self._array_key, item
+        return None
+
+
+class StreamAccumulator:
+    """Collects one streamed completion: text, timing, usage and stop reason."""
+
+    def __init__(self, item_keys: Iterable[str] = (), on_item: ItemCallback | None = None):
+        self.start_time = time.time()
+        self.parser = IncrementalJSONParser(item_keys)
+        self.on_item = on_item
+        self.parts: list[str] = []
+        self.ttft_ms: int | None = None
+        self.finish_reason: str | None = None
+        self.tokens_input = 0
+        self.tokens_output = 0
+        self.tokens_cached = 0
+
+    def add(self, text: str) -> bool:
+        """Record a text delta; False once the output can no longer be valid JSON."""
+        if not text:
+            return True
+        if self.ttft_ms is None:
+            self.ttft_ms = int((time.time() - self.start_time) * 1000)
+        self.parts.append(text)
+        for key, item in self.parser.feed(text):
+            if self.on_item:
+                self.on_item(key, item)
+        return self.parser.error is None
+
+    @property
+    def content(self) -> str:
+        return "".join(self.parts)
+
+    @property
+    def truncated(self) -> bool:
+        return self.finish_reason in TRUNCATION_REASONS
+
+    @property
+    def latency_ms(self) -> int:
+        return int((time.time() - self.start_time) * 1000)
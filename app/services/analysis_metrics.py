@@ -0,0 +1,235 @@
+"""Analysis cost and latency telemetry (``GET /v1/analysis/metrics``).
+
+Every saved stage result adds its tokens, cost and timings to one
+``analysis_stage_metrics`` row per (day, stage, model) and one bucket of
+``analysis_stage_latency``, and its tokens to the tenant's
+``analysis_tenant_usage`` row (scheduler token budgets). Started jobs add
+their queue wait to ``analysis_queue_wait``. These rows are shared by every
+job, so each update commits in a short transaction of its own instead of
+holding row locks for the rest of a job's transaction. Queries only read
+these rollups; p50/p95 are interpolated from the histogram buckets.
+"""
+
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core import get_logger
+from app.db.models import (
+    AnalysisQueueWait,
+    AnalysisStageLatency,
+    AnalysisStageMetric,
+    AnalysisTenantUsage,
+)
+from app.db.session import SessionLocal
+
+logger = get_logger(__name__)
+
+# Histogram bucket upper bounds: 100 ms doubling up to ~6.8 min, then overflow
+LATENCY_BUCKETS_MS = [100 * 2**i for i in range(13)]
+# Job queue wait: 1 s doubling up to ~36 h
+QUEUE_WAIT_BUCKETS_MS = [1000 * 2**i for i in range(18)]
+OVERFLOW_BUCKET_MS = 2**31 - 1
+GROUP_BY_FIELDS = ("day", "stage", "model")
+COUNTERS = (
+    "calls",
+    "cache_hits",
+    "error_calls",
+    "unpriced_calls",
+    "tokens_input",
+    "tokens_output",
+    "tokens_cached",
+    "cost_usd",
+    "queue_wait_ms",
+    "render_ms",
+    "llm_ms",
+    "persist_ms",
+)
+
+
+def latency_bucket(total_ms: int, bounds: list[int] = LATENCY_BUCKETS_MS) -> int:
+    for bound in bounds:
+        if total_ms <= bound:
+            return bound
+    return OVERFLOW_BUCKET_MS
+
+
+@dataclass
+class StageSample:
+    """Telemetry of one saved stage result."""
+
+    day: date
+    stage: str
+    model: str
+    tokens_input: int = 0
+    tokens_output: int = 0
+    tokens_cached: int = 0
+    cost_usd: float | None = None
+    queue_wait_ms: int = 0
+    render_ms: int = 0
+    llm_ms: int = 0
+    persist_ms: int = 0
+    cache_hit: bool = False
+    error: bool = False
+    tenant_id: uuid.UUID | None = None
+
+    @property
+    def total_ms(self) -> int:
+        return self.queue_wait_ms + self.render_ms + self.llm_ms + self.persist_ms
+
+
+def record_stage_sample(sample: StageSample) -> None:
+    """Add one sample to the rollups; failures are logged and never fail the stage."""
+    key = {"day": sample.day, "stage": sample.stage, "model": sample.model}
+    try:
+        with SessionLocal() as db:
+            _increment(
+                db,
+                AnalysisStageMetric,
+                key,
+                {
+                    "calls": 1,
+                    "cache_hits": int(sample.cache_hit),
+                    "error_calls": int(sample.error),
+                    "unpriced_calls": int(sample.cost_usd is None),
+                    "tokens_input": sample.tokens_input,
+                    "tokens_output": sample.tokens_output,
+                    "tokens_cached": sample.tokens_cached,
+                    "cost_usd": sample.cost_usd or 0.0,
+                    "queue_wait_ms": sample.queue_wait_ms,
+                    "render_ms": sample.render_ms,
+                    "llm_ms": sample.llm_ms,
+                    "persist_ms": sample.persist_ms,
+                },
+            )
+            _increment(
+                db,
+                AnalysisStageLatency,
+                {**key, "le_ms": latency_bucket(sample.total_ms)},
+                {"calls": 1},
+            )
+            if sample.tenant_id is not None:
+                _increment(
+                    db,
+                    AnalysisTenantUsage,
+                    {"day": sample.day, "tenant_id": sample.tenant_id},
+                    {
+                        "calls": 1,
+                        "tokens_input": sample.tokens_input,
+                        "tokens_output": sample.tokens_output,
+                    },
+                )
+            db.commit()
+    except Exception as e:
+        logger.warning("Analysis metrics update failed", stage=sample.stage, error=str(e))
+
+
+def record_job_start(day: date, tenant_id: uuid.UUID, wait_ms: int) -> None:
+    """Add a started job's queue wait to its tenant's rollups; failures are only logged."""
+    key = {"day": day, "tenant_id": tenant_id}
+    try:
+        with SessionLocal() as db:
+            _increment(
+                db, AnalysisTenantUsage, key, {"jobs_started": 1, "queue_wait_ms": wait_ms}
+            )
+            _increment(
+                db,
+                AnalysisQueueWait,
+                {**key, "le_ms": latency_bucket(wait_ms, QUEUE_WAIT_BUCKETS_MS)},
+                {"jobs": 1},
+            )
+            db.commit()
+    except Exception as e:
+        logger.warning("Queue wait metrics update failed", tenant_id=str(tenant_id), error=str(e))
+
+
+def _increment(db: Session, model: type, key: dict[str, Any], deltas: dict[str, Any]) -> None:
+    """UPDATE ... SET col = col + delta, inserting the row on first use."""
+    filters = [getattr(model, name) == value for name, value in key.items()]
+    values = {getattr(model, name): getattr(model, name) + delta for name, delta in deltas.items()}
+    if db.query(model).filter(*filters).update(values, synchronize_session=False):
+        return
+    try:
+        with db.begin_nested():
+            db.add(model(**key, **deltas))
+            db.flush()
+    except IntegrityError:
+        # Another job inserted the row first; add to it instead
+        db.query(model).filter(*filters).update(values, synchronize_session=False)
+
+
+def histogram_percentile(
+    buckets: dict[int, int], quantile: float, bounds: list[int] = LATENCY_BUCKETS_MS
+) -> int | None:
+    """Linear interpolation inside the bucket holding the quantile."""
+    total = sum(buckets.values())
+    if not total:
+        return None
+    target = quantile * total
+    cumulative = 0
+    lower = 0
+    for bound in [*bounds, OVERFLOW_BUCKET_MS]:
+        count = buckets.get(bound, 0)
+        if count and cumulative + count >= target:
+            upper = bound if bound != OVERFLOW_BUCKET_MS else lower * 2
+            return int(lower + (upper - lower) * (target - cumulative) / count)
+        cumulative += count
+        lower = bound
+    return lower
+
+
+def query_metrics(
+    db: Session,
+    since: date,
+    until: date,
+    group_by: list[str],
+) -> list[dict[str, Any]]:
+    """Aggregate the rollups between ``since`` and ``until`` (inclusive) by ``group_by``."""
+    sums: dict[tuple, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    histograms: dict[tuple, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def group_key(row: Any) -> tuple:
+        return tuple(
+            row.day.isoformat() if field == "day" else getattr(row, field) for field in group_by
+        )
+
+    for row in db.query(AnalysisStageMetric).filter(
+        AnalysisStageMetric.day >= since, AnalysisStageMetric.day <= until
+    ):
+        totals = sums[group_key(row)]
+        for name in COUNTERS:
+            totals[name] += getattr(row, name) or 0
+    for row in db.query(AnalysisStageLatency).filter(
+        AnalysisStageLatency.day >= since, AnalysisStageLatency.day <= until
+    ):
+        histograms[group_key(row)][row.le_ms] += row.calls
+
+    rows = []
+    for key in sorted(sums):
+        totals = sums[key]
+        calls = int(totals["calls"])
+        rows.append(
+            {
+                **dict(zip(group_by, key, strict=True)),
+                "calls": calls,
+                "cache_hits": int(totals["cache_hits"]),
+                "error_calls": int(totals["error_calls"]),
+                "unpriced_calls": int(totals["unpriced_calls"]),
+                "tokens_input": int(totals["tokens_input"]),
+                "tokens_output": int(totals["tokens_output"]),
+                "tokens_cached": int(totals["tokens_cached"]),
+                "cost_usd": round(totals["cost_usd"], 6),
+                "latency_p50_ms": histogram_percentile(histograms[key], 0.5),
+                "latency_p95_ms": histogram_percentile(histograms[key], 0.95),
+                **{
+                    f"{name}_avg": round(totals[name] / calls) if calls else None
+                    for name in ("queue_wait_ms", "render_ms", "llm_ms", "persist_ms")
+                },
+            }
+        )
+    return rows
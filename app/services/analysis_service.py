@@ -1,20 +1,54 @@
 """Analysis service for running patent infringement investigation pipelines."""
 
+import hashlib
+import queue
+import time
 import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import UTC, datetime
 from typing import Any
 
 from sqlalchemy.orm import Session
 
-from app.core import get_logger
+from app.core import get_logger, settings
 from app.db.models import AnalysisJob, AnalysisResult, Claim, ClaimElement, Document
 from app.llm import PromptManager, get_llm_provider
-from app.llm.providers import LLMProvider
+from app.llm.pricing import stage_cost_usd
+from app.llm.prompt_manager import SerializationMemo
+from app.llm.providers import LLMProvider, LLMResponse
+from app.services.analysis_metrics import StageSample, record_stage_sample
+from app.services.claim_batcher import (
+    INCOMPLETE_KEY,
+    BatchItem,
+    ClaimBatch,
+    normalize_element_text,
+    pack,
+)
+from app.services.context_packer import (
+    claim_query,
+    compact_json,
+    count_tokens,
+    merge_packed,
+    pack_chunks,
+)
+from app.services.evidence_index import EvidenceIndex
+from app.services.job_scheduler import DEFAULT_TENANT_ID
+from app.services.llm_cache import LLMResponseCache, response_cache_key
+from app.services.short_circuit import ClaimShortCircuit, gate_dependent_claims
+from app.services.stage_graph import (
+    StageCheckpoint,
+    StageGraph,
+    StageNode,
+    StageScheduler,
+    StageSpec,
+)
+from app.services.stage_inputs import store_inputs
 
 logger = get_logger(__name__)
 
 
-# Pipeline stage definitions
+# Pipeline stage definitions; dependencies between them are declared in the
+# prompt YAML (scope/inputs/outputs) and scheduled by StageGraph
 PIPELINE_STAGES = {
     "A": [
         "01_fetch_planner",
@@ -40,27 +74,57 @@ PIPELINE_STAGES = {
     ],
 }
 
-PER_CLAIM_STAGES = {
-    "10_claim_element_extractor",
-    "11_evidence_query_builder",
-    "12_product_fact_extractor",
-    "13_element_assessment",
-    "14_claim_decision_aggregator",
-}
+ALL_STAGES = {stage for stages in PIPELINE_STAGES.values() for stage in stages}
 
-AGGREGATE_STAGES = {
-    "15_case_summary",
-    "16_investigation_tasks_generator",
+# Job-wide context rendered as the shared prompt prefix of stages with
+# ``shared_prefix: true`` (prefix section name -> context key)
+SHARED_CONTEXT = {
+    "patent_info": "patent_info",
+    "target_product": "target_product",
+    "evidence_catalog": "evidence_documents",
 }
 
 
+# Depends only on the claim text, so its output is reused across jobs
+CLAIM_ELEMENT_STAGE = "10_claim_element_extractor"
+# How often the scheduler thread drains streamed items while calls are in flight
+STREAMED_ITEM_POLL_SECONDS = 0.05
+
+
+def _claim_memo_key(claim_text: str, prompt_version: str, model: str) -> str:
+    claim_hash = hashlib.sha256(claim_text.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{claim_hash}:{prompt_version}:{model}".encode()).hexdigest()
+
+
+def _is_reusable_output(output: Any) -> bool:
+    """A stage output can be resumed from unless it is missing, failed to parse
+    or is a cross-claim batch share with elements left unassessed."""
+    if not isinstance(output, dict) or not output or output.get(INCOMPLETE_KEY):
+        return False
+    return "JSON parse failed" not in (output.get("errors") or [])
+
+
 class AnalysisService:
     """Service for managing and executing analysis pipelines."""
 
-    def __init__(self, db: Session, llm_provider: LLMProvider | None = None):
+    def __init__(
+        self,
+        db: Session,
+        llm_provider: LLMProvider | None = None,
+        commit_stages: bool = False,
+    ):
         self.db = db
+        # Commit after every stage so results are durable checkpoints and the
+        # job row is not locked for the whole run (used by the worker)
+        self.commit_stages = commit_stages
         self.prompt_manager = PromptManager()
         self._llm_provider = llm_provider
+        self.response_cache = LLMResponseCache()
+        self._evidence_index: EvidenceIndex | None = None
+        # Evidence hits per element query; evidence does not change mid-run
+        self._retrieval_cache: dict[str, list] = {}
+        # (stage, key, item) streamed by worker threads; drained on the scheduler thread
+        self._streamed_items: queue.SimpleQueue = queue.SimpleQueue()
 
     @property
     def llm_provider(self):
@@ -69,6 +133,12 @@ class AnalysisService:
             self._llm_provider = get_llm_provider()
         return self._llm_provider
 
+    @property
+    def evidence_index(self) -> EvidenceIndex:
+        if self._evidence_index is None:
+            self._evidence_index = EvidenceIndex(self.db)
+        return self._evidence_index
+
     def create_job(
         self,
         patent_id: str,
@@ -77,6 +147,7 @@ class AnalysisService:
         company_id: uuid.UUID | None = None,
         product_id: uuid.UUID | None = None,
         claim_nos: list[int] | None = None,
+        force_refresh: bool = False,
     ) -> AnalysisJob:
         """Create a new analysis job."""
         if pipeline not in ["A", "B", "C", "full"]:
@@ -91,6 +162,7 @@ class AnalysisService:
             company_id=company_id,
             product_id=product_id,
             claim_nos=claim_nos,
+            force_refresh=force_refresh,
         )
         self.db.add(job)
         self.db.flush()
@@ -127,6 +199,38 @@ class AnalysisService:
             return selected if selected else all_claims
         return all_claims
 
+    def _load_checkpoints(self, job: AnalysisJob) -> dict[str, StageCheckpoint]:
+        """Outputs of stages already completed by earlier attempts, by qualified stage.
+
+        ``AnalysisResult`` rows are authoritative (latest attempt wins); jobs
+        from before stage outputs left ``job.context_json`` fill in stages
+        whose rows are gone. A ``force_refresh`` job reruns everything.
+        """
+        if job.force_refresh:
+            return {}
+
+        checkpoints: dict[str, StageCheckpoint] = {}
+        for key, output in (job.context_json or {}).items():
+            if key.split(":", 1)[0] in ALL_STAGES and _is_reusable_output(output):
+                checkpoints[key] = StageCheckpoint(output)
+        for result in self.get_job_results(job.id):
+            if _is_reusable_output(result.output_data):
+                checkpoints[result.stage] = StageCheckpoint(result.output_data, result.input_hash)
+            else:
+                checkpoints.pop(result.stage, None)
+        return checkpoints
+
+    def build_stage_graph(self, pipeline: str, claims: list[dict]) -> StageGraph:
+        """Build the stage DAG for a pipeline from the prompts' declared inputs/outputs."""
+        specs = [
+            StageSpec.from_prompt(stage, self.prompt_manager.load_prompt(stage))
+            for stage in self._get_pipeline_stages(pipeline)
+        ]
+        graph = StageGraph.build(specs, claims)
+        if settings.analysis_short_circuit == "ordered":
+            graph = gate_dependent_claims(graph, claims)
+        return graph
+
     def _collect_claim_results(self, context: dict, claims: list[dict]) -> None:
         """Collect per-claim results into aggregated context for stages 15/16."""
         claim_decisions = []
@@ -182,95 +286,32 @@ class AnalysisService:
         self.db.flush()
 
         try:
-            # Get stages for the pipeline
-            stages = self._get_pipeline_stages(job.pipeline)
-
             # Initialize context
             context = job.context_json or {}
             context = self._initialize_context(job, context)
+            self._persist_context(job, context)
 
             # Resolve which claims to process
             claims_to_process = self._resolve_claims(job, context)
-
-            # Pre-compute per-claim stages in pipeline order for claim-first loop
-            per_claim_stages = [s for s in stages if s in PER_CLAIM_STAGES]
-
-            for stage in stages:
-                if stage in PER_CLAIM_STAGES:
-                    # Claim-first loop: run all per-claim stages for each claim
-                    # before moving to the next claim
-                    for claim in claims_to_process:
-                        claim_no = claim["claim_no"]
-                        context["_current_claim"] = claim
-                        context["_current_claim_no"] = claim_no
-
-                        for pc_stage in per_claim_stages:
-                            qualified_stage = f"{pc_stage}:claim_{claim_no}"
-                            job.current_stage = qualified_stage
-                            self.db.flush()
-
-                            logger.info(
-                                "Running stage (per-claim)",
-                                job_id=str(job_id),
-                                stage=qualified_stage,
-                            )
-
-                            try:
-                                self._execute_and_save_stage(
-                                    job, pc_stage, qualified_stage, context
-                                )
-                            except Exception as e:
-                                logger.exception(
-                                    "Stage failed (per-claim)",
-                                    job_id=str(job_id),
-                                    stage=qualified_stage,
-                                )
-                                job.status = "failed"
-                                job.error_message = f"Stage {qualified_stage} failed: {e!s}"
-                                self.db.flush()
-                                return job
-
-                    # All per-claim stages done; skip remaining per-claim entries
-                    break
-
-                elif stage in AGGREGATE_STAGES:
-                    # Aggregate stages are handled after the per-claim loop below
-                    continue
-                else:
-                    # Stage A/B
-                    job.current_stage = stage
-                    self.db.flush()
-
-                    logger.info("Running stage", job_id=str(job_id), stage=stage)
-
-                    try:
-                        self._execute_and_save_stage(job, stage, stage, context)
-                    except Exception as e:
-                        logger.exception("Stage failed", job_id=str(job_id), stage=stage)
-                        job.status = "failed"
-                        job.error_message = f"Stage {stage} failed: {e!s}"
-                        self.db.flush()
-                        return job
-
-            # Run aggregate stages after per-claim loop
-            # (break above exits the for-loop before reaching them)
-            aggregate_stages = [s for s in stages if s in AGGREGATE_STAGES]
-            for stage in aggregate_stages:
-                self._collect_claim_results(context, claims_to_process)
-
-                job.current_stage = stage
+            graph = self.build_stage_graph(job.pipeline, claims_to_process)
+
+            # Resume: stages completed by an earlier attempt are reused when
+            # their inputs have not changed
+            checkpoints = self._load_checkpoints(job)
+            context.update({key: checkpoint.output for key, checkpoint in checkpoints.items()})
+            if checkpoints:
+                logger.info("Resuming job", job_id=str(job_id), completed_stages=len(checkpoints))
+
+            scheduler = StageScheduler(graph, checkpoints)
+            self._run_stage_graph(job, scheduler, context, claims_to_process)
+            self._persist_context(job, context)
+
+            failure = scheduler.first_failure
+            if failure:
+                job.status = "failed"
+                job.error_message = failure
                 self.db.flush()
-
-                logger.info("Running stage (aggregate)", job_id=str(job_id), stage=stage)
-
-                try:
-                    self._execute_and_save_stage(job, stage, stage, context)
-                except Exception as e:
-                    logger.exception("Stage failed", job_id=str(job_id), stage=stage)
-                    job.status = "failed"
-                    job.error_message = f"Stage {stage} failed: {e!s}"
-                    self.db.flush()
-                    return job
+                return job
 
             # Mark as completed
             job.status = "completed"
@@ -288,6 +329,19 @@ class AnalysisService:
 
         return job
 
+    def _persist_context(self, job: AnalysisJob, context: dict) -> None:
+        """Store the job-level context (inputs and claim aggregates) on the job.
+
+        Stage outputs are kept out: they live in ``analysis_results`` and are
+        reloaded from there on resume, so the row is written once per run
+        instead of after every stage.
+        """
+        job.context_json = {
+            key: value
+            for key, value in context.items()
+            if not key.startswith("_") and key.split(":", 1)[0] not in ALL_STAGES
+        }
+
     def _get_pipeline_stages(self, pipeline: str) -> list[str]:
         """Get the stages for a pipeline."""
         if pipeline == "full":
@@ -423,7 +477,6 @@ class AnalysisService:
         try:
             from app.db.models import (
                 Company,
-                DocChunk,
                 Product,
                 ProductDocument,
                 ProductFact,
@@ -482,36 +535,19 @@ class AnalysisService:
                         .all()
                     )
 
-                    evidence_docs = []
-                    for pd in product_docs:
-                        ev = pd.evidence
-                        if not ev or not ev.full_text:
-                            continue
-                        chunks = (
-                            self.db.query(DocChunk)
-                            .filter(DocChunk.evidence_id == ev.id)
-                            .order_by(DocChunk.chunk_index)
-                            .all()
-                        )
-                        evidence_docs.append(
-                            {
-                                "evidence_id": str(ev.id),
-                                "url": ev.url,
-                                "doc_type": pd.doc_type,
-                                "title": pd.title or ev.title,
-                                "text": ev.full_text[:8000],
-                                "chunks": [
-                                    {
-                                        "chunk_index": c.chunk_index,
-                                        "text": c.text,
-                                        "section_type": c.section_type,
-                                        "page_no": c.page_no,
-                                    }
-                                    for c in chunks[:20]
-                                ],
-                            }
-                        )
-
+                    # Only document metadata goes into the context; stages
+                    # retrieve the relevant chunks per claim element from the
+                    # evidence index (see _retrieve_evidence)
+                    evidence_docs = [
+                        {
+                            "evidence_id": str(pd.evidence.id),
+                            "url": pd.evidence.url,
+                            "doc_type": pd.doc_type,
+                            "title": pd.title or pd.evidence.title,
+                        }
+                        for pd in product_docs
+                        if pd.evidence
+                    ]
                     context["evidence_documents"] = evidence_docs
         except Exception as e:
             logger.warning("Could not load company/product master data", error=str(e))
@@ -602,38 +638,349 @@ class AnalysisService:
                     )
                 )
 
-    def _execute_and_save_stage(
+    def _node_context(self, node: StageNode, context: dict, claims: list[dict]) -> dict:
+        """Context a stage node renders its prompt from."""
+        if node.scope == "claim":
+            node_context = dict(context)
+            node_context["_current_claim"] = node.claim
+            node_context["_current_claim_no"] = node.claim["claim_no"]
+            return node_context
+        if node.scope == "aggregate":
+            self._collect_claim_results(context, claims)
+        return context
+
+    def _run_stage_graph(
         self,
         job: AnalysisJob,
+        scheduler: StageScheduler,
+        context: dict,
+        claims: list[dict],
+    ) -> None:
+        """Run every ready stage concurrently until nothing is left to schedule.
+
+        Prompts are rendered and results persisted on the calling thread;
+        workers only make cache lookups and LLM calls. A failed stage blocks
+        its descendants while independent branches keep running, so a retry
+        only redoes the failed part.
+        """
+        model = getattr(self.llm_provider, "model", type(self.llm_provider).__name__)
+        force_refresh = bool(job.force_refresh)
+        order = {key: index for index, key in enumerate(scheduler.graph.nodes)}
+        workers = max(1, settings.analysis_claim_concurrency)
+        running: dict[Future, list[StageNode]] = {}
+        batches: dict[Future, ClaimBatch] = {}
+        held: dict[str, list[BatchItem]] = {}
+        memo = SerializationMemo()
+        short_circuit = ClaimShortCircuit.from_settings(claims)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-stage") as pool:
+            while True:
+                for node in scheduler.ready():
+                    skipped = short_circuit.skip(node, context) if short_circuit else None
+                    if skipped:
+                        logger.info(
+                            "Short-circuiting stage",
+                            job_id=str(job.id),
+                            stage=node.key,
+                            reason=skipped["skip_reason"],
+                        )
+                        self._finish_node(job, scheduler, node, skipped, context, memo)
+                        continue
+                    try:
+                        node_context = self._node_context(node, context, claims)
+                        call = self._prepare_stage_call(node.stage, node_context, model, memo)
+                    except Exception as e:
+                        self._record_stage_failure(job, scheduler, node, e)
+                        continue
+
+                    reused = scheduler.reusable(node, call["cache_key"])
+                    if reused is not None:
+                        context[node.key] = reused
+                        scheduler.finish(node.key, executed=False)
+                        logger.info("Skipping unchanged stage", job_id=str(job.id), stage=node.key)
+                        continue
+
+                    scheduler.start(node.key)
+                    memoized = None if force_refresh else self._memoized_stage_result(call)
+                    if memoized:
+                        self._finish_node(job, scheduler, node, memoized, context, memo)
+                        continue
+                    if self._claim_batch_budget(node):
+                        held.setdefault(node.stage, []).append(self._batch_item(node, call))
+                        continue
+                    logger.info("Running stage", job_id=str(job.id), stage=node.key)
+                    call["submitted_at"] = time.monotonic()
+                    future = pool.submit(self._execute_stage_call, node.stage, call, force_refresh)
+                    running[future] = [node]
+
+                # Held claim nodes wait for siblings still upstream while other
+                # calls are in flight; full batches go out right away
+                for stage, items in list(held.items()):
+                    groups = pack(items, self._claim_batch_budget(items[0].node))
+                    if running and self._siblings_pending(scheduler, stage):
+                        groups, held[stage] = groups[:-1], groups[-1]
+                    else:
+                        del held[stage]
+                    for group in groups:
+                        nodes = [item.node for item in group]
+                        try:
+                            batch, call = self._prepare_claim_batch(stage, group, context, model, memo)
+                        except Exception as e:
+                            for node in nodes:
+                                self._record_stage_failure(job, scheduler, node, e)
+                            continue
+                        logger.info(
+                            "Running claim batch",
+                            job_id=str(job.id),
+                            stage=stage,
+                            claims=len(nodes),
+                            elements=len(batch.elements),
+                        )
+                        if call is None:
+                            self._save_claim_batch(job, scheduler, batch, None, context, model, memo)
+                            continue
+                        call["submitted_at"] = time.monotonic()
+                        future = pool.submit(self._execute_stage_call, stage, call, force_refresh)
+                        running[future] = nodes
+                        batches[future] = batch
+
+                if not running:
+                    if scheduler.finished:
+                        return
+                    continue
+
+                # While streamed calls run, hand their items to consumers as they arrive
+                poll = STREAMED_ITEM_POLL_SECONDS if settings.llm_streaming else None
+                completed: set[Future] = set()
+                while not completed:
+                    completed, _ = wait(running, timeout=poll, return_when=FIRST_COMPLETED)
+                    self._consume_streamed_items(context)
+                for future in sorted(completed, key=lambda f: order[running[f][0].key]):
+                    nodes = running.pop(future)
+                    batch = batches.pop(future, None)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        for node in nodes:
+                            self._record_stage_failure(job, scheduler, node, e)
+                        continue
+                    if batch is not None:
+                        self._save_claim_batch(job, scheduler, batch, result, context, model, memo)
+                    else:
+                        self._finish_node(job, scheduler, nodes[0], result, context, memo)
+
+    def _finish_node(
+        self,
+        job: AnalysisJob,
+        scheduler: StageScheduler,
+        node: StageNode,
+        result: dict[str, Any],
+        context: dict,
+        memo: SerializationMemo,
+    ) -> None:
+        if node.claim:
+            context["_current_claim"] = node.claim
+            context["_current_claim_no"] = node.claim["claim_no"]
+        job.current_stage = node.key
+        self._save_stage_result(job, node.stage, node.key, result, context, memo)
+        scheduler.finish(node.key)
+        if self.commit_stages:
+            self.db.commit()
+
+    def _claim_batch_budget(self, node: StageNode) -> int | None:
+        """Token budget of a cross-claim batch, if the node's stage is batched."""
+        if node.scope != "claim":
+            return None
+        return self.prompt_manager.load_prompt(node.stage).get("claim_batch_token_budget")
+
+    @staticmethod
+    def _siblings_pending(scheduler: StageScheduler, stage: str) -> bool:
+        """Whether nodes of ``stage`` are still waiting for their dependencies."""
+        settled = scheduler.done | scheduler.running | scheduler.blocked | set(scheduler.failed)
+        return any(
+            node.stage == stage and key not in settled
+            for key, node in scheduler.graph.nodes.items()
+        )
+
+    def _batch_item(self, node: StageNode, call: dict[str, Any]) -> BatchItem:
+        return BatchItem(
+            node=node,
+            call=call,
+            elements=call["variables"].get("claim_elements") or [],
+            tokens=count_tokens(call["user_prompt"]),
+        )
+
+    def _assessed_elements(self, stage: str, context: dict) -> dict[str, dict]:
+        """Assessments already made in this job, by normalized element text."""
+        assessed: dict[str, dict] = {}
+        for key, output in context.items():
+            key_stage, _, claim = key.partition(":")
+            if key_stage != stage or not claim or not isinstance(output, dict):
+                continue
+            if output.get("errors"):
+                continue
+            by_no = {
+                a.get("element_no"): a
+                for a in output.get("assessments") or []
+                if isinstance(a, dict)
+            }
+            extracted = context.get(f"10_claim_element_extractor:{claim}") or {}
+            for element in extracted.get("elements") or []:
+                text = normalize_element_text(element)
+                assessment = by_no.get(element.get("element_no"))
+                if text and assessment:
+                    assessed.setdefault(text, assessment)
+        return assessed
+
+    def _prepare_claim_batch(
+        self,
         stage: str,
-        qualified_stage: str,
+        items: list[BatchItem],
         context: dict,
-    ) -> dict[str, Any]:
-        """Execute a single stage and persist the result."""
-        result = self._run_stage(job, stage, context)
+        model: str,
+        memo: SerializationMemo,
+    ) -> tuple[ClaimBatch, dict[str, Any] | None]:
+        """Batch of held claim nodes and its rendered call (None if nothing is left to ask)."""
+        batch = ClaimBatch.build(items, self._assessed_elements(stage, context))
+        if not batch.elements:
+            return batch, None
+
+        facts: list = []
+        seen: set[str] = set()
+        for item in items:
+            for fact in item.call["variables"].get("product_facts") or []:
+                key = compact_json(fact)
+                if key not in seen:
+                    seen.add(key)
+                    facts.append(fact)
+        # Each held node already retrieved and packed its claim's evidence when
+        # it was rendered for its checkpoint hash; reuse that instead of searching again
+        variables = {
+            "today": context.get("today", ""),
+            "claim_elements": batch.elements,
+            "product_facts": facts,
+            "evidence_passages": merge_packed(
+                [item.call["variables"].get("evidence_passages") or [] for item in items]
+            ),
+        }
+        return batch, self._render_stage_call(stage, variables, context, model, memo)
 
+    def _save_claim_batch(
+        self,
+        job: AnalysisJob,
+        scheduler: StageScheduler,
+        batch: ClaimBatch,
+        result: dict[str, Any] | None,
+        context: dict,
+        model: str,
+        memo: SerializationMemo,
+    ) -> None:
+        results = batch.split(result, model)
+        for item in batch.items:
+            self._finish_node(job, scheduler, item.node, results[item.node.key], context, memo)
+
+    def _record_stage_failure(
+        self,
+        job: AnalysisJob,
+        scheduler: StageScheduler,
+        node: StageNode,
+        error: Exception,
+    ) -> None:
+        logger.error(
+            "Stage failed",
+            job_id=str(job.id),
+            stage=node.key,
+            error=str(error),
+            exc_info=error,
+        )
+        scheduler.fail(node.key, str(error))
+
+    def _save_stage_result(
+        self,
+        job: AnalysisJob,
+        stage: str,
+        qualified_stage: str,
+        result: dict[str, Any],
+        context: dict,
+        memo: SerializationMemo | None = None,
+    ) -> None:
+        """Persist a stage result and merge its output into the run context."""
+        persist_started = time.monotonic()
+        cost_usd = stage_cost_usd(
+            result.get("model"),
+            result.get("tokens_input") or 0,
+            result.get("tokens_output") or 0,
+            result.get("tokens_cached") or 0,
+        )
         analysis_result = AnalysisResult(
             job_id=job.id,
             stage=qualified_stage,
-            input_data=result.get("input"),
+            input_refs=(
+                store_inputs(self.db, result["input"], memo)
+                if result.get("input") is not None
+                else None
+            ),
             output_data=result.get("output"),
             llm_model=result.get("model"),
             tokens_input=result.get("tokens_input"),
             tokens_output=result.get("tokens_output"),
             latency_ms=result.get("latency_ms"),
+            ttft_ms=result.get("ttft_ms"),
+            tokens_cached=result.get("tokens_cached"),
+            queue_wait_ms=result.get("queue_wait_ms"),
+            render_ms=result.get("render_ms"),
+            cost_usd=cost_usd,
+            cache_hit=result.get("cache_hit", False),
+            tokens_saved_input=result.get("tokens_saved_input"),
+            tokens_saved_output=result.get("tokens_saved_output"),
+            input_hash=result.get("input_hash"),
+            memo_key=(
+                result.get("memo_key")
+                if _is_reusable_output(result.get("output"))
+                and not result["output"].get("errors")
+                else None
+            ),
+            skip_reason=result.get("skip_reason"),
         )
         self.db.add(analysis_result)
 
         if result.get("output"):
             context[qualified_stage] = result["output"]
-            job.context_json = context
 
         # Persist claim elements after Stage 10
         if stage == "10_claim_element_extractor":
             self._persist_claim_elements(result.get("output"), context)
 
+        # Cache writes happen here, on the session's thread, not in claim workers
+        if result.get("cache_hit") and result.get("cache_key"):
+            self.response_cache.mark_hit(self.db, result["cache_key"])
+        elif result.get("cache_store"):
+            self.response_cache.store(self.db, *result["cache_store"])
+
         self.db.flush()
 
+        # Skipped stages made no call; they would only skew the telemetry
+        if result.get("skip_reason"):
+            return
+        record_stage_sample(
+            StageSample(
+                day=datetime.now(UTC).date(),
+                stage=stage,
+                model=result.get("model") or "unknown",
+                tokens_input=result.get("tokens_input") or 0,
+                tokens_output=result.get("tokens_output") or 0,
+                tokens_cached=result.get("tokens_cached") or 0,
+                cost_usd=cost_usd,
+                queue_wait_ms=result.get("queue_wait_ms") or 0,
+                render_ms=result.get("render_ms") or 0,
+                llm_ms=result.get("latency_ms") or 0,
+                persist_ms=int((time.monotonic() - persist_started) * 1000),
+                cache_hit=bool(result.get("cache_hit")),
+                error=bool((result.get("output") or {}).get("errors")),
+                tenant_id=job.tenant_id or DEFAULT_TENANT_ID,
+            ),
+        )
+
         if result.get("output", {}).get("errors"):
             logger.warning(
                 "Stage returned errors",
@@ -642,38 +989,241 @@ class AnalysisService:
                 errors=result["output"]["errors"],
             )
 
-        return result
+    def _execute_stage_call(
+        self,
+        stage: str,
+        call: dict[str, Any],
+        force_refresh: bool = False,
+    ) -> dict[str, Any]:
+        """Execute a rendered stage prompt (served from the response cache when possible)."""
+        queue_wait_ms = None
+        if "submitted_at" in call:
+            queue_wait_ms = int((time.monotonic() - call["submitted_at"]) * 1000)
+        cached = None if force_refresh else self._cached_stage_result(stage, call)
+        if cached:
+            return {**cached, "queue_wait_ms": queue_wait_ms}
 
-    def _run_stage(
+        # Call LLM
+        if settings.llm_streaming:
+            response = self.llm_provider.stream(
+                system_prompt=call["system_prompt"],
+                user_prompt=call["user_prompt"],
+                temperature=call["temperature"],
+                item_keys=self.prompt_manager.load_prompt(stage).get("stream_items") or (),
+                on_item=lambda key, item: self._streamed_items.put((stage, key, item)),
+                prompt_prefix=call["prompt_prefix"],
+            )
+        else:
+            response = self.llm_provider.call(
+                system_prompt=call["system_prompt"],
+                user_prompt=call["user_prompt"],
+                temperature=call["temperature"],
+                prompt_prefix=call["prompt_prefix"],
+            )
+        return {**self._stage_result(call, response), "queue_wait_ms": queue_wait_ms}
+
+    def _prepare_stage_call(
         self,
-        job: AnalysisJob,
         stage: str,
         context: dict,
+        model: str,
+        memo: SerializationMemo | None = None,
     ) -> dict[str, Any]:
-        """Run a single stage of the pipeline."""
-        # Prepare variables for the prompt
+        """Render a stage prompt and derive its response cache key."""
+        started = time.monotonic()
         variables = self._prepare_stage_variables(stage, context)
+        call = self._render_stage_call(stage, variables, context, model, memo, started)
+        claim = variables.get("claim") or {}
+        if stage == CLAIM_ELEMENT_STAGE and claim.get("claim_text") and claim.get("claim_id"):
+            call["memo_key"] = _claim_memo_key(
+                claim["claim_text"], self.prompt_manager.prompt_version(stage), model
+            )
+            call["claim_id"] = claim["claim_id"]
+        return call
 
-        # Render prompt
-        system_prompt, user_prompt = self.prompt_manager.render(stage, variables)
+    def _render_stage_call(
+        self,
+        stage: str,
+        variables: dict[str, Any],
+        context: dict,
+        model: str,
+        memo: SerializationMemo | None = None,
+        started: float | None = None,
+    ) -> dict[str, Any]:
+        started = time.monotonic() if started is None else started
+        # Render prompt; job-wide context goes first so provider prompt
+        # caches can reuse it across the calls of the job
+        prompt_prefix = ""
+        if settings.llm_prompt_caching and self.prompt_manager.load_prompt(stage).get(
+            "shared_prefix"
+        ):
+            shared = {
+                name: context[key] for name, key in SHARED_CONTEXT.items() if context.get(key)
+            }
+            system_prompt, prompt_prefix, user_prompt = self.prompt_manager.render_with_prefix(
+                stage, variables, shared, memo
+            )
+        else:
+            system_prompt, user_prompt = self.prompt_manager.render(stage, variables, memo)
 
-        # Call LLM
-        response = self.llm_provider.call(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            temperature=0.0,
+        temperature = 0.0
+        return {
+            "variables": variables,
+            "system_prompt": system_prompt,
+            "prompt_prefix": prompt_prefix,
+            "user_prompt": user_prompt,
+            "temperature": temperature,
+            "cache_key": response_cache_key(
+                model, system_prompt, prompt_prefix + user_prompt, temperature
+            ),
+            "render_ms": int((time.monotonic() - started) * 1000),
+        }
+
+    def _memoized_stage_result(self, call: dict[str, Any]) -> dict[str, Any] | None:
+        """Claim elements extracted by an earlier job for the same claim text,
+        prompt version and model, if they were also persisted as ``ClaimElement`` rows."""
+        memo_key = call.get("memo_key")
+        if not memo_key:
+            return None
+        try:
+            claim_uuid = uuid.UUID(str(call["claim_id"]))
+        except ValueError:
+            return None
+        if self.db.query(ClaimElement.id).filter(ClaimElement.claim_id == claim_uuid).first() is None:
+            return None
+        source = (
+            self.db.query(AnalysisResult)
+            .filter(AnalysisResult.memo_key == memo_key)
+            .order_by(AnalysisResult.created_at.desc())
+            .first()
         )
+        if source is None or not _is_reusable_output(source.output_data):
+            return None
+        logger.info("Reusing claim elements from an earlier job", claim_id=str(claim_uuid))
+        return {
+            "input": call["variables"],
+            "output": source.output_data,
+            "model": source.llm_model,
+            "tokens_input": 0,
+            "tokens_output": 0,
+            "latency_ms": 0,
+            "render_ms": call.get("render_ms"),
+            "cache_hit": True,
+            "input_hash": call["cache_key"],
+            "memo_key": memo_key,
+            "tokens_saved_input": source.tokens_input or source.tokens_saved_input,
+            "tokens_saved_output": source.tokens_output or source.tokens_saved_output,
+        }
 
+    def _cached_stage_result(self, stage: str, call: dict[str, Any]) -> dict[str, Any] | None:
+        """Stage result replayed from the response cache, or None on a miss."""
+        cached = self.response_cache.get(call["cache_key"])
+        if not cached:
+            return None
+        logger.info("LLM response cache hit", stage=stage, cache_key=call["cache_key"][:12])
         return {
-            "input": variables,
-            "output": response.parsed_json
-            or {"raw": response.content, "errors": ["JSON parse failed"]},
+            "input": call["variables"],
+            "output": cached.parsed_json,
+            "model": cached.model,
+            "tokens_input": 0,
+            "tokens_output": 0,
+            "latency_ms": 0,
+            "render_ms": call.get("render_ms"),
+            "cache_hit": True,
+            "cache_key": call["cache_key"],
+            "input_hash": call["cache_key"],
+            "memo_key": call.get("memo_key"),
+            "tokens_saved_input": cached.tokens_input,
+            "tokens_saved_output": cached.tokens_output,
+        }
+
+    def _stage_result(self, call: dict[str, Any], response: LLMResponse) -> dict[str, Any]:
+        """Stage result for a fresh LLM response."""
+        errors = ["JSON parse failed"]
+        if response.truncated:
+            errors.append(f"Response truncated ({response.finish_reason})")
+        return {
+            "input": call["variables"],
+            "output": response.parsed_json or {"raw": response.content, "errors": errors},
             "model": response.model,
             "tokens_input": response.tokens_input,
             "tokens_output": response.tokens_output,
             "latency_ms": response.latency_ms,
+            "ttft_ms": response.ttft_ms,
+            "tokens_cached": response.tokens_cached,
+            "render_ms": call.get("render_ms"),
+            "input_hash": call["cache_key"],
+            "memo_key": call.get("memo_key"),
+            # Only successfully parsed responses are worth replaying
+            "cache_store": (
+                (call["cache_key"], response, call["temperature"]) if response.parsed_json else None
+            ),
         }
 
+    def _consume_streamed_items(self, context: dict) -> None:
+        """Act on array items streamed by in-flight calls (scheduler thread only).
+
+        Each claim element from stage 10 warms the retrieval cache with the
+        exact query stages 11-13 will issue for it, so evidence search runs
+        while the rest of the extraction is still being generated.
+        """
+        documents = context.get("evidence_documents") or []
+        while True:
+            try:
+                stage, key, item = self._streamed_items.get_nowait()
+            except queue.Empty:
+                return
+            if stage != CLAIM_ELEMENT_STAGE or key != "elements" or not documents:
+                continue
+            query = claim_query([item])
+            if not query or query in self._retrieval_cache:
+                continue
+            try:
+                self._retrieval_cache[query] = self._search_evidence(documents, query)
+            except Exception as e:
+                # Best effort: the stage retrieves again when it renders
+                logger.warning("Evidence prefetch failed", error=str(e))
+
+    def _search_evidence(self, documents: list[dict], query: str) -> list:
+        return self.evidence_index.search(
+            [doc["evidence_id"] for doc in documents],
+            query,
+            limit=settings.evidence_retrieval_top_k,
+        )
+
+    def _retrieve_evidence(
+        self, stage: str, context: dict, elements: list, budget: int | None = None
+    ) -> list[dict]:
+        """Evidence chunks retrieved per claim element, packed into the stage's token budget."""
+        documents = context.get("evidence_documents") or []
+        if not documents:
+            return []
+        if budget is None:
+            budget = self.prompt_manager.load_prompt(stage).get(
+                "evidence_token_budget", settings.analysis_evidence_token_budget
+            )
+        queries = [claim_query([element]) for element in elements] or [
+            claim_query([], context.get("_current_claim"))
+        ]
+        evidence_ids = [doc["evidence_id"] for doc in documents]
+        positions = {evidence_id: index for index, evidence_id in enumerate(evidence_ids)}
+
+        hit_lists = []
+        for query in queries:
+            if query not in self._retrieval_cache:
+                self._retrieval_cache[query] = self._search_evidence(documents, query)
+            hit_lists.append(self._retrieval_cache[query])
+
+        # Round-robin over elements so every element gets its best passages in
+        ranked: list[tuple[int, dict]] = []
+        seen: set[tuple[str, int]] = set()
+        for rank in range(max(len(hits) for hits in hit_lists)):
+            for hits in hit_lists:
+                if rank < len(hits) and (hits[rank].evidence_id, hits[rank].chunk_index) not in seen:
+                    seen.add((hits[rank].evidence_id, hits[rank].chunk_index))
+                    ranked.append((positions[hits[rank].evidence_id], hits[rank].to_chunk()))
+        return pack_chunks(documents, ranked, budget)
+
     def _prepare_stage_variables(self, stage: str, context: dict) -> dict[str, Any]:
         """Prepare variables for a specific stage prompt."""
         variables: dict[str, Any] = {}
@@ -726,13 +1276,16 @@ class AnalysisService:
         elif stage == "11_evidence_query_builder":
             # Get elements from per-claim qualified key
             elements_key = f"10_claim_element_extractor{suffix}"
-            variables["claim_elements"] = context.get(elements_key, {}).get("elements", [])
+            elements = context.get(elements_key, {}).get("elements", [])
+            variables["claim_elements"] = elements
             variables["target_product"] = context.get("target_product", "")
+            variables["evidence_passages"] = self._retrieve_evidence(stage, context, elements)
 
         elif stage == "12_product_fact_extractor":
             elements_key = f"10_claim_element_extractor{suffix}"
-            variables["evidence_documents"] = context.get("evidence_documents", [])
-            variables["target_elements"] = context.get(elements_key, {}).get("elements", [])
+            elements = context.get(elements_key, {}).get("elements", [])
+            variables["evidence_documents"] = self._retrieve_evidence(stage, context, elements)
+            variables["target_elements"] = elements
 
         elif stage == "13_element_assessment":
             # Batch: pass all elements for this claim
@@ -741,6 +1294,7 @@ class AnalysisService:
             variables["claim_elements"] = elements
             facts_key = f"12_product_fact_extractor{suffix}"
             variables["product_facts"] = context.get(facts_key, {}).get("product_facts", [])
+            variables["evidence_passages"] = self._retrieve_evidence(stage, context, elements)
 
         elif stage == "14_claim_decision_aggregator":
             patent_id = context.get("patent_info", {}).get("patent_id", "")
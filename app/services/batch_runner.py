@@ -0,0 +1,234 @@
+"""Run analysis jobs through a provider batch API.
+
+Every job's ready stages (nodes of its stage graph whose dependencies are
+done) are collected across all jobs into one provider batch per wave.
+Results are saved exactly like synchronous runs, then the next wave is
+scheduled, so a sweep of N jobs needs about as many batches as the stage
+graph is deep rather than one request at a time.
+"""
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core import get_logger
+from app.db.models import AnalysisJob
+from app.llm.batch import BatchClient, BatchRequest
+from app.llm.prompt_manager import SerializationMemo
+from app.services.analysis_service import AnalysisService
+from app.services.job_scheduler import mark_started
+from app.services.short_circuit import ClaimShortCircuit
+from app.services.stage_graph import StageNode, StageScheduler
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _JobState:
+    job: AnalysisJob
+    context: dict
+    claims: list[dict]
+    scheduler: StageScheduler
+    failed: bool = False
+    memo: SerializationMemo = field(default_factory=SerializationMemo)
+    short_circuit: ClaimShortCircuit | None = None
+
+
+@dataclass
+class _PendingStage:
+    state: _JobState
+    node: StageNode
+    call: dict[str, Any]
+
+
+class BatchAnalysisRunner:
+    """Drive analysis jobs to completion with batched LLM calls."""
+
+    def __init__(
+        self,
+        db: Session,
+        client: BatchClient,
+        poll_interval: float = 60.0,
+        max_batch_requests: int = 10000,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.db = db
+        self.client = client
+        self.poll_interval = poll_interval
+        self.max_batch_requests = max_batch_requests
+        self.sleep = sleep
+        self.service = AnalysisService(db)
+
+    def run(self, jobs: list[AnalysisJob]) -> dict[str, int]:
+        """Run jobs until each one completes or fails; returns counters."""
+        summary = dict.fromkeys(("completed", "failed", "batches", "requests", "cache_hits"), 0)
+        summary["jobs"] = len(jobs)
+        states = [state for state in (self._start(job) for job in jobs) if state]
+        self.db.commit()
+
+        while states:
+            pending: list[_PendingStage] = []
+            for state in states:
+                for node in state.scheduler.ready():
+                    skipped = (
+                        state.short_circuit.skip(node, state.context)
+                        if state.short_circuit
+                        else None
+                    )
+                    if skipped:
+                        self._save(state, node, skipped)
+                        continue
+                    try:
+                        context = self.service._node_context(node, state.context, state.claims)
+                        call = self.service._prepare_stage_call(
+                            node.stage, context, self.client.model, state.memo
+                        )
+                    except Exception as e:
+                        state.scheduler.fail(node.key, str(e))
+                        continue
+
+                    reused = state.scheduler.reusable(node, call["cache_key"])
+                    if reused is not None:
+                        state.context[node.key] = reused
+                        state.scheduler.finish(node.key, executed=False)
+                        continue
+                    cached = (
+                        None
+                        if state.job.force_refresh
+                        else self.service._memoized_stage_result(call)
+                        or self.service._cached_stage_result(node.stage, call)
+                    )
+                    if cached:
+                        self._save(state, node, cached)
+                        summary["cache_hits"] += 1
+                    else:
+                        state.scheduler.start(node.key)
+                        pending.append(_PendingStage(state, node, call))
+
+            for start in range(0, len(pending), self.max_batch_requests):
+                chunk = pending[start : start + self.max_batch_requests]
+                self._run_batch(chunk)
+                summary["batches"] += 1
+                summary["requests"] += len(chunk)
+
+            for state in states:
+                if state.failed or state.scheduler.finished:
+                    self._finish(state)
+                    summary["failed" if state.failed else "completed"] += 1
+            states = [s for s in states if s.job.status == "analyzing"]
+            self.db.commit()
+
+        return summary
+
+    def _start(self, job: AnalysisJob) -> _JobState | None:
+        if job.status not in {"pending", "failed"}:
+            logger.warning("Skipping job not ready for batch run", job_id=str(job.id), status=job.status)
+            return None
+
+        if job.status == "pending":
+            mark_started(job)
+        job.status = "analyzing"
+        job.error_message = None
+        if not job.queued_at:
+            job.queued_at = datetime.now(UTC)
+        job.started_at = datetime.now(UTC)
+        job.completed_at = None
+        job.current_stage = None
+
+        try:
+            context = self.service._initialize_context(job, job.context_json or {})
+            claims = self.service._resolve_claims(job, context)
+            graph = self.service.build_stage_graph(job.pipeline, claims)
+        except Exception as e:
+            job.status = "failed"
+            job.error_message = str(e)
+            self.db.flush()
+            logger.error("Job failed (batch)", job_id=str(job.id), error=str(e))
+            return None
+
+        checkpoints = self.service._load_checkpoints(job)
+        context.update({key: checkpoint.output for key, checkpoint in checkpoints.items()})
+        self.service._persist_context(job, context)
+        return _JobState(
+            job,
+            context,
+            claims,
+            StageScheduler(graph, checkpoints),
+            short_circuit=ClaimShortCircuit.from_settings(claims),
+        )
+
+    def _run_batch(self, items: list[_PendingStage]) -> None:
+        requests = [
+            BatchRequest(
+                custom_id=f"req-{index}",
+                system_prompt=item.call["system_prompt"],
+                user_prompt=item.call["user_prompt"],
+                temperature=item.call["temperature"],
+                prompt_prefix=item.call["prompt_prefix"],
+            )
+            for index, item in enumerate(items)
+        ]
+        jobs = {id(item.state): item.state for item in items}.values()
+
+        try:
+            batch_id = self.client.submit(requests)
+            logger.info("Submitted LLM batch", batch_id=batch_id, requests=len(requests), jobs=len(jobs))
+            for item in items:
+                item.state.job.batch_id = batch_id
+                item.state.job.current_stage = item.node.key
+            self.db.commit()
+
+            while not self.client.is_done(batch_id):
+                self.sleep(self.poll_interval)
+            results = {result.custom_id: result for result in self.client.results(batch_id)}
+        except Exception as e:
+            # BatchFailedError, or a transport/API error from submit or polling.
+            # Fail the wave so its jobs do not stay "analyzing" with a batch_id
+            # nobody polls; retries resume them from their checkpoints.
+            logger.error("LLM batch failed", error=str(e), requests=len(requests), jobs=len(jobs))
+            for item in items:
+                item.state.scheduler.fail(item.node.key, str(e))
+            for state in jobs:
+                state.failed = True
+            return
+
+        for request, item in zip(requests, items, strict=True):
+            result = results.get(request.custom_id)
+            if result is None or result.response is None:
+                error = result.error if result else "no result returned by batch"
+                item.state.scheduler.fail(item.node.key, error)
+                continue
+            self._save(item.state, item.node, self.service._stage_result(item.call, result.response))
+        self.db.commit()
+
+    def _save(self, state: _JobState, node: StageNode, result: dict[str, Any]) -> None:
+        if node.claim:
+            state.context["_current_claim"] = node.claim
+            state.context["_current_claim_no"] = node.claim["claim_no"]
+        state.job.current_stage = node.key
+        self.service._save_stage_result(
+            state.job, node.stage, node.key, result, state.context, state.memo
+        )
+        state.scheduler.finish(node.key)
+
+    def _finish(self, state: _JobState) -> None:
+        """Complete or fail a job once its graph has nothing left to run."""
+        job = state.job
+        failure = state.scheduler.first_failure
+        self.service._persist_context(job, state.context)
+        job.batch_id = None
+        job.current_stage = None
+        if failure or state.failed:
+            state.failed = True
+            job.status = "failed"
+            job.error_message = failure or "Provider batch failed"
+            logger.error("Job failed (batch)", job_id=str(job.id), error=job.error_message)
+        else:
+            job.status = "completed"
+            job.completed_at = datetime.now(UTC)
+            logger.info("Job completed (batch)", job_id=str(job.id))
+        self.db.flush()
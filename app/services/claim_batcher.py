@@ -0,0 +1,161 @@
+"""Cross-claim batching of element assessments (``claim_batch_token_budget``).
+
+One claim's elements fill a fraction of a prompt, and dependent claims
+mostly repeat claim 1's elements, so ready nodes of a batched claim stage are
+packed into one call up to the prompt's token budget. Elements with the same
+normalized text are sent once, elements already assessed earlier in the job
+are not sent at all, and the assessments are split back into one result per
+claim.
+"""
+
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.services.stage_graph import StageNode
+
+# Set on a split output with errors: resuming must rerun it, not reuse it
+INCOMPLETE_KEY = "batch_incomplete"
+
+TOKEN_FIELDS = (
+    "tokens_input",
+    "tokens_output",
+    "tokens_cached",
+    "tokens_saved_input",
+    "tokens_saved_output",
+)
+
+
+def normalize_element_text(element: dict) -> str:
+    """Comparison key of a claim element: NFKC, case- and whitespace-folded."""
+    text = element.get("normalized_text") or element.get("quote_text") or ""
+    return " ".join(unicodedata.normalize("NFKC", str(text)).split()).lower()
+
+
+def split_tokens(total: int | None, weights: list[int]) -> list[int]:
+    """Distribute ``total`` over ``weights``; the remainder goes to the first share."""
+    total = total or 0
+    weight_sum = sum(weights)
+    if not weight_sum:
+        return [total] + [0] * (len(weights) - 1)
+    shares = [total * weight // weight_sum for weight in weights]
+    shares[0] += total - sum(shares)
+    return shares
+
+
+@dataclass
+class BatchItem:
+    """A ready claim node waiting to be batched, with its own rendered call."""
+
+    node: StageNode
+    call: dict[str, Any]
+    elements: list[dict]
+    tokens: int
+
+
+def pack(items: list[BatchItem], budget_tokens: int) -> list[list[BatchItem]]:
+    """Greedy packing in arrival order; an item larger than the budget goes alone."""
+    batches: list[list[BatchItem]] = []
+    used = 0
+    for item in items:
+        if batches and used + item.tokens <= budget_tokens:
+            batches[-1].append(item)
+            used += item.tokens
+        else:
+            batches.append([item])
+            used = item.tokens
+    return batches
+
+
+@dataclass
+class ClaimBatch:
+    """Elements of several claims renumbered into one assessment request."""
+
+    items: list[BatchItem]
+    elements: list[dict] = field(default_factory=list)
+    # batch element_no -> [(node key, claim element_no)]
+    targets: dict[int, list[tuple[str, Any]]] = field(default_factory=dict)
+    # node key -> assessments copied from earlier results of the job
+    reused: dict[str, list[dict]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, items: list[BatchItem], assessed: dict[str, dict]) -> "ClaimBatch":
+        batch = cls(items, reused={item.node.key: [] for item in items})
+        by_text: dict[str, int] = {}
+        for item in items:
+            for element in item.elements:
+                element_no = element.get("element_no")
+                text = normalize_element_text(element)
+                if text and text in assessed:
+                    batch.reused[item.node.key].append(
+                        {**assessed[text], "element_no": element_no}
+                    )
+                    continue
+                batch_no = by_text.get(text) if text else None
+                if batch_no is None:
+                    batch_no = len(batch.elements) + 1
+                    batch.elements.append({**element, "element_no": batch_no})
+                    if text:
+                        by_text[text] = batch_no
+                batch.targets.setdefault(batch_no, []).append((item.node.key, element_no))
+        return batch
+
+    def split(self, result: dict[str, Any] | None, model: str) -> dict[str, dict[str, Any]]:
+        """Per-node stage results from the batched call (None: nothing was sent)."""
+        output = (result or {}).get("output") or {}
+        parsed = result is None or "assessments" in output
+        assessments = {
+            a.get("element_no"): a
+            for a in output.get("assessments") or []
+            if isinstance(a, dict)
+        }
+        outputs: dict[str, dict] = {}
+        for item in self.items:
+            key = item.node.key
+            if parsed:
+                outputs[key] = {
+                    "assessments": list(self.reused[key]),
+                    "errors": list(output.get("errors") or []),
+                }
+            else:
+                outputs[key] = dict(output)
+        if parsed:
+            for batch_no, targets in self.targets.items():
+                assessment = assessments.get(batch_no)
+                for key, element_no in targets:
+                    if assessment is None:
+                        outputs[key]["errors"].append(f"No assessment for element {element_no}")
+                    else:
+                        outputs[key]["assessments"].append(
+                            {**assessment, "element_no": element_no}
+                        )
+            for value in outputs.values():
+                value["assessments"].sort(key=lambda a: str(a.get("element_no")).zfill(6))
+                if value["errors"]:
+                    value[INCOMPLETE_KEY] = True
+
+        weights = [
+            sum(1 for targets in self.targets.values() for key, _ in targets if key == item.node.key)
+            for item in self.items
+        ]
+        result = result or {"model": model}
+        shares = {name: split_tokens(result.get(name), weights) for name in TOKEN_FIELDS}
+        split: dict[str, dict[str, Any]] = {}
+        for index, item in enumerate(self.items):
+            first = index == 0
+            split[item.node.key] = {
+                "input": item.call["variables"],
+                "output": outputs[item.node.key],
+                "model": result.get("model"),
+                **{name: values[index] for name, values in shares.items()},
+                "latency_ms": result.get("latency_ms", 0),
+                "ttft_ms": result.get("ttft_ms"),
+                "queue_wait_ms": result.get("queue_wait_ms"),
+                "render_ms": item.call.get("render_ms"),
+                "cache_hit": bool(result.get("cache_hit")),
+                "input_hash": item.call["cache_key"],
+                # The batched response is cached (or its hit counted) once
+                "cache_key": result.get("cache_key") if first else None,
+                "cache_store": result.get("cache_store") if first else None,
+            }
+        return split
@@ -0,0 +1,45 @@
+"""Claim dependency graph parsed from claim text.
+
+A dependent claim refers to earlier claims ("請求項1に記載の装置",
+"請求項1又は2に記載の", "請求項1から3のいずれか一項に記載の", "the device of
+claim 1", "any one of claims 1 to 3") and includes all of their elements. A
+claim referring to several claims in the alternative is a shorthand for one
+claim per referenced claim.
+"""
+
+import re
+import unicodedata
+
+_JOINER = r"(?:又は|または|若しくは|もしくは|及び|および|並びに|ならびに|、|,|\bor\b|\band\b)"
+_RANGE = r"(?:から|乃至|ないし|~|〜|-|–|\bto\b|\bthrough\b)"
+_PREFIX = r"(?:請求項|\bclaims?\s*)"
+_REFERENCE = re.compile(
+    rf"{_PREFIX}(\d+(?:\s*(?:{_JOINER}|{_RANGE})\s*{_PREFIX}?\d+)*)",
+    re.IGNORECASE,
+)
+_PART = re.compile(rf"(\d+)(?:\s*{_RANGE}\s*{_PREFIX}?(\d+))?", re.IGNORECASE)
+
+
+def parse_claim_refs(claim_text: str, claim_no: int) -> tuple[int, ...]:
+    """Earlier claims ``claim_no`` refers to, in ascending order (empty if independent)."""
+    text = unicodedata.normalize("NFKC", claim_text or "")
+    refs: set[int] = set()
+    for match in _REFERENCE.finditer(text):
+        for part in _PART.finditer(match.group(1)):
+            first = int(part.group(1))
+            last = int(part.group(2)) if part.group(2) else first
+            refs.update(range(first, min(last, claim_no - 1) + 1))
+    return tuple(sorted(ref for ref in refs if 0 < ref < claim_no))
+
+
+def claim_parents(claims: list[dict]) -> dict[int, tuple[int, ...]]:
+    """Referenced claims of every dependent claim, by claim number."""
+    parents: dict[int, tuple[int, ...]] = {}
+    for claim in claims:
+        claim_no = claim.get("claim_no")
+        if not isinstance(claim_no, int):
+            continue
+        refs = parse_claim_refs(claim.get("claim_text") or "", claim_no)
+        if refs:
+            parents[claim_no] = refs
+    return parents
@@ -0,0 +1,155 @@
+"""Pack retrieved evidence chunks into a stage prompt's token budget.
+
+The evidence index ranks chunks by relevance to the current claim's
+elements; ``pack_chunks`` takes them best first until the budget is spent
+and regroups them per document in reading order, so a prompt carries the
+few passages that matter instead of the first pages of every manual.
+Documents without stored chunks are split into passages before indexing.
+
+Token counts use tiktoken when it is installed (``pip install -e
+.[tokenizer]``) and fall back to the conservative character estimate.
+"""
+
+import json
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any
+
+from app.core import get_logger
+from app.llm.limits import estimate_tokens
+
+logger = get_logger(__name__)
+
+# Runs of ASCII alphanumerics, or of kana/kanji (after NFKC + lowercasing)
+_TERM_RE = re.compile("[0-9a-z]+|[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]+")
+PASSAGE_CHARS = 1200
+
+
+def tokenize(text: str) -> list[str]:
+    """Index terms: ASCII words plus character bigrams of Japanese runs."""
+    terms: list[str] = []
+    for run in _TERM_RE.findall(unicodedata.normalize("NFKC", text).lower()):
+        if run.isascii() or len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Any:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:  # encoding files are fetched on first use
+        logger.warning("tiktoken encoding unavailable, estimating tokens", error=str(e))
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def split_passages(text: str, max_chars: int = PASSAGE_CHARS) -> list[str]:
+    """Split text on line breaks into passages of at most ``max_chars``."""
+    passages: list[str] = []
+    current = ""
+    for line in text.splitlines():
+        line = line.strip()
+        while len(line) > max_chars:
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(line[:max_chars])
+            line = line[max_chars:]
+        if not line:
+            continue
+        if current and len(current) + len(line) + 1 > max_chars:
+            passages.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        passages.append(current)
+    return passages
+
+
+def claim_query(elements: list[dict], claim: dict | None = None) -> str:
+    """Retrieval query for a claim: its elements' text and key terms."""
+    parts: list[str] = []
+    for element in elements:
+        if not isinstance(element, dict):
+            continue
+        parts.append(str(element.get("quote_text") or ""))
+        parts.append(str(element.get("plain_description") or ""))
+        parts.extend(str(term) for term in element.get("key_terms") or [])
+    if not any(parts) and claim:
+        parts.append(str(claim.get("claim_text") or ""))
+    return "\n".join(part for part in parts if part)
+
+
+def pack_chunks(
+    documents: list[dict], ranked: list[tuple[int, dict]], budget_tokens: int
+) -> list[dict]:
+    """Take ``(document index, chunk)`` pairs best first while they fit in the budget.
+
+    Chunks that do not fit are skipped so smaller ones further down can still
+    be used. The result keeps each document's metadata and its chunks in
+    reading order.
+    """
+    headers = [{k: v for k, v in doc.items() if k not in {"text", "chunks"}} for doc in documents]
+    selected: dict[int, list[dict]] = {}
+    used = 2  # enclosing brackets
+    for doc_index, chunk in ranked:
+        cost = count_tokens(compact_json(chunk)) + 1
+        if doc_index not in selected:
+            cost += count_tokens(compact_json({**headers[doc_index], "chunks": []}))
+        if used + cost > budget_tokens:
+            continue
+        used += cost
+        selected.setdefault(doc_index, []).append(chunk)
+
+    logger.debug(
+        "Packed evidence",
+        chunks=sum(len(chunks) for chunks in selected.values()),
+        candidates=len(ranked),
+        tokens=used,
+        budget=budget_tokens,
+    )
+    return [
+        {
+            **headers[doc_index],
+            "chunks": sorted(selected[doc_index], key=lambda chunk: chunk.get("chunk_index", 0)),
+        }
+        for doc_index in sorted(selected)
+    ]
+
+
+def merge_packed(packed_lists: list[list[dict]]) -> list[dict]:
+    """Union of several ``pack_chunks`` results, each chunk once, in reading order.
+
+    The result fits in the sum of the budgets the inputs were packed to.
+    """
+    merged: dict[Any, dict] = {}
+    seen: set[tuple[Any, Any]] = set()
+    for packed in packed_lists:
+        for doc in packed:
+            doc_id = doc.get("evidence_id")
+            target = merged.setdefault(doc_id, {**doc, "chunks": []})
+            for chunk in doc.get("chunks") or []:
+                if (doc_id, chunk.get("chunk_index")) not in seen:
+                    seen.add((doc_id, chunk.get("chunk_index")))
+                    target["chunks"].append(chunk)
+    for doc in merged.values():
+        doc["chunks"].sort(key=lambda chunk: chunk.get("chunk_index", 0))
+    return list(merged.values())
@@ -0,0 +1,352 @@
+"""Local retrieval index over evidence chunks (``DocChunk``).
+
+Each evidence document gets its own index segment on disk under
+``EVIDENCE_INDEX_PATH``: an inverted index (term -> postings) over the
+character-bigram terms of its chunks, plus the chunk texts. Adding evidence
+only builds that document's segment. A segment records a signature of its
+source rows (chunk count, last chunk write, content hash) and is rebuilt on
+the next query when the rows change, so every worker host keeps a correct
+local copy without coordination. BM25 statistics are combined across the
+segments being searched.
+
+With ``EVIDENCE_EMBEDDING_MODEL`` pointing at a local sentence-transformers
+model (``pip install -e .[retrieval]``), segments also store normalized
+chunk embeddings as ``.npy`` files. They are memory-mapped at query time and
+searched brute force; dense and BM25 rankings are merged by reciprocal rank
+fusion. Nothing is downloaded: retrieval runs fully offline.
+"""
+
+import json
+import math
+import re
+import threading
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Protocol
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core import get_logger, settings
+from app.db.models import DocChunk, Evidence
+from app.services.context_packer import split_passages, tokenize
+
+logger = get_logger(__name__)
+
+INDEX_VERSION = 1
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60
+
+
+class Embedder(Protocol):
+    name: str
+
+    def encode(self, texts: list[str]) -> Any:
+        """Return an (n, dim) float array."""
+        ...
+
+
+@dataclass
+class ChunkHit:
+    evidence_id: str
+    chunk_index: int
+    text: str
+    section_type: str | None
+    page_no: int | None
+    score: float
+
+    def to_chunk(self) -> dict[str, Any]:
+        return {
+            "chunk_index": self.chunk_index,
+            "text": self.text,
+            "section_type": self.section_type,
+            "page_no": self.page_no,
+        }
+
+
+class EvidenceSegment:
+    """Inverted index of one evidence document's chunks."""
+
+    def __init__(
+        self,
+        evidence_id: str,
+        signature: str,
+        chunks: list[dict[str, Any]],
+        lengths: list[int],
+        postings: dict[str, list[list[int]]],
+    ):
+        self.evidence_id = evidence_id
+        self.signature = signature
+        self.chunks = chunks
+        self.lengths = lengths
+        self.postings = postings
+        self.embeddings: Any = None
+
+    @classmethod
+    def build(cls, evidence_id: str, signature: str, chunks: list[dict[str, Any]]) -> "EvidenceSegment":
+        postings: dict[str, list[list[int]]] = {}
+        lengths = []
+        for position, chunk in enumerate(chunks):
+            terms = tokenize(chunk["text"])
+            lengths.append(len(terms))
+            for term, freq in Counter(terms).items():
+                postings.setdefault(term, []).append([position, freq])
+        return cls(evidence_id, signature, chunks, lengths, postings)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "evidence_id": self.evidence_id,
+            "signature": self.signature,
+            "chunks": self.chunks,
+            "lengths": self.lengths,
+            "postings": self.postings,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> "EvidenceSegment":
+        return cls(
+            data["evidence_id"], data["signature"], data["chunks"], data["lengths"], data["postings"]
+        )
+
+
+def _segment_name(evidence_id: str) -> str:
+    # Evidence ids are UUIDs; never let a value escape the index directory
+    return re.sub(r"[^0-9A-Za-z-]", "_", evidence_id)
+
+
+@lru_cache(maxsize=1)
+def get_embedder() -> Embedder | None:
+    """Local embedding model from EVIDENCE_EMBEDDING_MODEL, or None for BM25 only."""
+    model_path = settings.evidence_embedding_model
+    if not model_path:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError as exc:  # noqa: BLE001
+        raise RuntimeError(
+            "sentence-transformers is required for EVIDENCE_EMBEDDING_MODEL"
+        ) from exc
+
+    model = SentenceTransformer(model_path, device="cpu", local_files_only=True)
+
+    class _SentenceEmbedder:
+        name = Path(model_path).name
+
+        def encode(self, texts: list[str]) -> Any:
+            return model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+
+    return _SentenceEmbedder()
+
+
+# Segments loaded by this process, shared by every EvidenceIndex instance
+_segments: dict[tuple[Path, str], EvidenceSegment] = {}
+_segments_lock = threading.Lock()
+
+
+class EvidenceIndex:
+    """Query and maintain the on-disk segments for a set of evidence documents."""
+
+    def __init__(self, db: Session, root: Path | None = None, embedder: Embedder | None = None):
+        self.db = db
+        self.root = Path(root or settings.evidence_index_path)
+        self.embedder = embedder if embedder is not None else get_embedder()
+
+    def signatures(self, evidence_ids: list[str]) -> dict[str, str]:
+        """Current source signature of each evidence document that has text."""
+        if not evidence_ids:
+            return {}
+        chunk_stats = {
+            str(evidence_id): (count, max_index, max_created)
+            for evidence_id, count, max_index, max_created in (
+                self.db.query(
+                    DocChunk.evidence_id,
+                    func.count(DocChunk.id),
+                    func.max(DocChunk.chunk_index),
+                    func.max(DocChunk.created_at),
+                )
+                .filter(DocChunk.evidence_id.in_(_as_uuids(evidence_ids)))
+                .group_by(DocChunk.evidence_id)
+            )
+        }
+        signatures = {}
+        for evidence_id, content_hash, text_length in self.db.query(
+            Evidence.id, Evidence.content_hash, func.length(Evidence.full_text)
+        ).filter(Evidence.id.in_(_as_uuids(evidence_ids))):
+            stats = chunk_stats.get(str(evidence_id))
+            if not stats and not text_length:
+                continue
+            count, max_index, max_created = stats or (0, None, None)
+            signatures[str(evidence_id)] = (
+                f"v{INDEX_VERSION}:{count}:{max_index}:{max_created}:{content_hash}:{text_length}"
+            )
+        return signatures
+
+    def refresh(self, evidence_ids: list[str]) -> list[EvidenceSegment]:
+        """Load the segments for ``evidence_ids``, (re)building stale or missing ones."""
+        segments = []
+        signatures = self.signatures(evidence_ids)
+        for evidence_id in dict.fromkeys(str(evidence_id) for evidence_id in evidence_ids):
+            signature = signatures.get(evidence_id)
+            if signature is None:
+                continue
+            key = (self.root, evidence_id)
+            with _segments_lock:
+                segment = _segments.get(key)
+            if segment is None or segment.signature != signature:
+                segment = self._load(evidence_id, signature) or self.build(evidence_id, signature)
+                with _segments_lock:
+                    _segments[key] = segment
+            if self.embedder is not None and segment.embeddings is None:
+                segment.embeddings = self._load_embeddings(segment)
+            segments.append(segment)
+        return segments
+
+    def build(self, evidence_id: str, signature: str | None = None) -> EvidenceSegment:
+        """Index one evidence document from the database and write its segment."""
+        if signature is None:
+            signature = self.signatures([evidence_id]).get(evidence_id, "")
+        rows = (
+            self.db.query(DocChunk)
+            .filter(DocChunk.evidence_id == _as_uuids([evidence_id])[0])
+            .order_by(DocChunk.chunk_index)
+            .all()
+        )
+        chunks = [
+            {
+                "chunk_index": row.chunk_index,
+                "text": row.text,
+                "section_type": row.section_type,
+                "page_no": row.page_no,
+            }
+            for row in rows
+            if row.text
+        ]
+        if not rows:
+            evidence = self.db.get(Evidence, _as_uuids([evidence_id])[0])
+            text = evidence.full_text if evidence else None
+            chunks = [
+                {"chunk_index": index, "text": passage, "section_type": None, "page_no": None}
+                for index, passage in enumerate(split_passages(text or ""))
+            ]
+
+        segment = EvidenceSegment.build(evidence_id, signature, chunks)
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f"{_segment_name(evidence_id)}.json"
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(segment.to_json(), ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
+        if self.embedder is not None:
+            self._write_embeddings(segment)
+        logger.info("Indexed evidence", evidence_id=evidence_id, chunks=len(chunks))
+        return segment
+
+    def search(self, evidence_ids: list[str], query: str, limit: int = 10) -> list[ChunkHit]:
+        """Chunks of ``evidence_ids`` ranked by relevance to ``query``."""
+        segments = self.refresh(evidence_ids)
+        if not segments or not query.strip():
+            return []
+        ranked = self._bm25(segments, tokenize(query))
+        if self.embedder is not None:
+            ranked = _fuse(ranked, self._dense(segments, query))
+        hits = []
+        for (segment_no, position), score in ranked[:limit]:
+            segment = segments[segment_no]
+            chunk = segment.chunks[position]
+            hits.append(
+                ChunkHit(
+                    evidence_id=segment.evidence_id,
+                    chunk_index=chunk["chunk_index"],
+                    text=chunk["text"],
+                    section_type=chunk.get("section_type"),
+                    page_no=chunk.get("page_no"),
+                    score=score,
+                )
+            )
+        return hits
+
+    def _bm25(
+        self, segments: list[EvidenceSegment], query: list[str]
+    ) -> list[tuple[tuple[int, int], float]]:
+        total = sum(len(segment.lengths) for segment in segments)
+        avg_length = sum(sum(segment.lengths) for segment in segments) / (total or 1)
+        scores: dict[tuple[int, int], float] = {}
+        for term in set(query):
+            doc_freq = sum(len(segment.postings.get(term, ())) for segment in segments)
+            if not doc_freq:
+                continue
+            idf = math.log(1 + (total - doc_freq + 0.5) / (doc_freq + 0.5))
+            for segment_no, segment in enumerate(segments):
+                for position, freq in segment.postings.get(term, ()):
+                    norm = BM25_K1 * (
+                        1 - BM25_B + BM25_B * segment.lengths[position] / (avg_length or 1)
+                    )
+                    key = (segment_no, position)
+                    scores[key] = scores.get(key, 0.0) + idf * freq * (BM25_K1 + 1) / (freq + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def _dense(
+        self, segments: list[EvidenceSegment], query: str
+    ) -> list[tuple[tuple[int, int], float]]:
+        query_vector = self.embedder.encode([query])[0]
+        scored = []
+        for segment_no, segment in enumerate(segments):
+            if segment.embeddings is None or not len(segment.embeddings):
+                continue
+            similarities = segment.embeddings @ query_vector
+            scored.extend(
+                ((segment_no, position), float(score)) for position, score in enumerate(similarities)
+            )
+        return sorted(scored, key=lambda item: (-item[1], item[0]))
+
+    def _load(self, evidence_id: str, signature: str) -> EvidenceSegment | None:
+        path = self.root / f"{_segment_name(evidence_id)}.json"
+        if not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning("Unreadable evidence index segment", path=str(path), error=str(e))
+            return None
+        if data.get("version") != INDEX_VERSION or data.get("signature") != signature:
+            return None
+        return EvidenceSegment.from_json(data)
+
+    def _embeddings_path(self, segment: EvidenceSegment) -> Path:
+        return self.root / f"{_segment_name(segment.evidence_id)}.{self.embedder.name}.npy"
+
+    def _write_embeddings(self, segment: EvidenceSegment) -> None:
+        import numpy as np
+
+        vectors = self.embedder.encode([chunk["text"] for chunk in segment.chunks])
+        path = self._embeddings_path(segment)
+        with open(path.with_suffix(".tmp"), "wb") as handle:
+            np.save(handle, np.asarray(vectors, dtype=np.float32))
+        path.with_suffix(".tmp").replace(path)
+        (path.with_suffix(".sig")).write_text(segment.signature, encoding="utf-8")
+
+    def _load_embeddings(self, segment: EvidenceSegment) -> Any:
+        import numpy as np
+
+        path = self._embeddings_path(segment)
+        sig_path = path.with_suffix(".sig")
+        if not path.exists() or not sig_path.exists() or sig_path.read_text() != segment.signature:
+            self._write_embeddings(segment)
+        return np.load(path, mmap_mode="r")
+
+
+def _fuse(*rankings: list[tuple[Any, float]]) -> list[tuple[Any, float]]:
+    """Reciprocal rank fusion of several rankings."""
+    fused: dict[Any, float] = {}
+    for ranking in rankings:
+        for rank, (key, _) in enumerate(ranking):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+
+
+def _as_uuids(evidence_ids: list[str]) -> list[uuid.UUID]:
+    return [uuid.UUID(str(evidence_id)) for evidence_id in evidence_ids]
@@ -0,0 +1,353 @@
+"""Weighted fair scheduling of analysis jobs across tenants.
+
+Ordering the whole queue by ``priority, created_at`` lets one tenant's bulk
+submission hold every slot until it drains. Instead each pick goes to the
+tenant with the least running work relative to its weight (weighted fair
+queuing with unit-size jobs), where the weight is scaled by the priority of
+that tenant's best waiting job. Within a tenant jobs run by priority, and a
+job gains one priority step per ``analysis_priority_aging_seconds`` waited,
+so low-priority work is not starved by a steady stream of urgent jobs.
+
+Tenants at their concurrency cap or past their daily token budget are
+skipped. Planning reads running counts without locks, so workers re-check
+the cap with ``tenant_slot_available`` when they claim a job. Policies come from the settings and can be overridden per tenant in
+``tenants.settings["scheduler"]`` (``weight``, ``max_concurrent_jobs``,
+``daily_token_budget``).
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import func, or_, text
+from sqlalchemy.orm import Session
+
+from app.core import get_logger, settings
+from app.db.models import AnalysisJob, AnalysisQueueWait, AnalysisTenantUsage, Tenant
+from app.services.analysis_metrics import (
+    QUEUE_WAIT_BUCKETS_MS,
+    histogram_percentile,
+    record_job_start,
+)
+
+logger = get_logger(__name__)
+
+DEFAULT_TENANT_ID = uuid.UUID("a0000000-0000-0000-0000-000000000001")
+ACTIVE_STATUSES = ("researching", "analyzing", "running")  # running = legacy
+
+
+@dataclass
+class TenantPolicy:
+    """Share and caps of one tenant; 0 disables a cap."""
+
+    weight: float = 1.0
+    max_concurrent_jobs: int = 0
+    daily_token_budget: int = 0
+
+    @classmethod
+    def from_settings(cls, tenant_settings: dict | None) -> "TenantPolicy":
+        overrides = (tenant_settings or {}).get("scheduler") or {}
+        policy = cls(
+            max_concurrent_jobs=settings.analysis_tenant_max_concurrent_jobs,
+            daily_token_budget=settings.analysis_tenant_daily_token_budget,
+        )
+        for name in ("weight", "max_concurrent_jobs", "daily_token_budget"):
+            value = overrides.get(name)
+            if isinstance(value, int | float) and value >= 0:
+                setattr(policy, name, type(getattr(policy, name))(value))
+        if policy.weight <= 0:
+            policy.weight = 1.0
+        return policy
+
+
+@dataclass
+class TenantQueue:
+    """Scheduling state of one tenant during a planning pass."""
+
+    tenant_id: uuid.UUID
+    policy: TenantPolicy
+    running: int = 0
+    tokens_today: int = 0
+    pending: list[AnalysisJob] = field(default_factory=list)
+
+    def blocked(self, enforce_concurrency: bool = True) -> str | None:
+        """Why this tenant cannot start another job now, if it cannot."""
+        budget = self.policy.daily_token_budget
+        if budget and self.tokens_today >= budget:
+            return "token_budget"
+        cap = self.policy.max_concurrent_jobs
+        if enforce_concurrency and cap and self.running >= cap:
+            return "concurrency"
+        return None
+
+    def virtual_finish(self, now: datetime) -> float:
+        """WFQ finish tag of the tenant's next job; the smallest runs first."""
+        share = self.policy.weight * (1 + effective_priority(self.pending[0], now) / 10)
+        return (self.running + 1) / share
+
+
+def tenant_of(job: AnalysisJob) -> uuid.UUID:
+    return job.tenant_id or DEFAULT_TENANT_ID
+
+
+def _waiting_since(job: AnalysisJob) -> datetime:
+    since = _as_utc(job.created_at)
+    if job.scheduled_for and _as_utc(job.scheduled_for) > since:
+        since = _as_utc(job.scheduled_for)
+    return since
+
+
+def effective_priority(job: AnalysisJob, now: datetime) -> float:
+    """Priority plus one step per aging interval spent waiting."""
+    aging = settings.analysis_priority_aging_seconds
+    priority = float(job.priority or 0)
+    if aging:
+        priority += max(0.0, (now - _waiting_since(job)).total_seconds()) / aging
+    return priority
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+def _tenant_filter(tenant_id: uuid.UUID):
+    if tenant_id == DEFAULT_TENANT_ID:
+        return or_(AnalysisJob.tenant_id == tenant_id, AnalysisJob.tenant_id.is_(None))
+    return AnalysisJob.tenant_id == tenant_id
+
+
+def _runnable(now: datetime) -> list:
+    return [
+        AnalysisJob.status == "pending",
+        or_(AnalysisJob.scheduled_for.is_(None), AnalysisJob.scheduled_for <= now),
+    ]
+
+
+def _count_by_tenant(rows) -> dict[uuid.UUID, int]:
+    counts: dict[uuid.UUID, int] = {}
+    for tenant_id, count in rows:
+        key = tenant_id or DEFAULT_TENANT_ID
+        counts[key] = counts.get(key, 0) + count
+    return counts
+
+
+def load_queues(db: Session, candidates: int, now: datetime | None = None) -> list[TenantQueue]:
+    """Per-tenant state with up to ``candidates`` runnable jobs each, best first.
+
+    Each tenant's candidates are its top jobs by priority plus its oldest
+    jobs, so aged low-priority jobs are seen without scanning the queue.
+    """
+    now = now or datetime.now(UTC)
+    pending = _count_by_tenant(
+        db.query(AnalysisJob.tenant_id, func.count(AnalysisJob.id))
+        .filter(*_runnable(now))
+        .group_by(AnalysisJob.tenant_id)
+        .all()
+    )
+    if not pending:
+        return []
+    running = _count_by_tenant(
+        db.query(AnalysisJob.tenant_id, func.count(AnalysisJob.id))
+        .filter(
+            AnalysisJob.status.in_(ACTIVE_STATUSES),
+            # Provider-batch jobs use no slot
+            AnalysisJob.batch_id.is_(None),
+        )
+        .group_by(AnalysisJob.tenant_id)
+        .all()
+    )
+    tokens = dict(
+        db.query(
+            AnalysisTenantUsage.tenant_id,
+            AnalysisTenantUsage.tokens_input + AnalysisTenantUsage.tokens_output,
+        )
+        .filter(AnalysisTenantUsage.day == now.date())
+        .all()
+    )
+    tenant_settings = dict(
+        db.query(Tenant.id, Tenant.settings).filter(Tenant.id.in_(list(pending))).all()
+    )
+
+    queues = []
+    for tenant_id in pending:
+        jobs: dict[uuid.UUID, AnalysisJob] = {}
+        for order in (
+            (AnalysisJob.priority.desc(), AnalysisJob.created_at.asc()),
+            (AnalysisJob.created_at.asc(),),
+        ):
+            for job in (
+                db.query(AnalysisJob)
+                .filter(*_runnable(now), _tenant_filter(tenant_id))
+                .order_by(*order)
+                .limit(candidates)
+            ):
+                jobs[job.id] = job
+        queues.append(
+            TenantQueue(
+                tenant_id=tenant_id,
+                policy=TenantPolicy.from_settings(tenant_settings.get(tenant_id)),
+                running=running.get(tenant_id, 0),
+                tokens_today=tokens.get(tenant_id) or 0,
+                pending=sorted(
+                    jobs.values(),
+                    key=lambda j: (-effective_priority(j, now), _waiting_since(j)),
+                ),
+            )
+        )
+    return queues
+
+
+def plan_jobs(
+    db: Session,
+    slots: int,
+    enforce_concurrency: bool = True,
+    now: datetime | None = None,
+) -> list[AnalysisJob]:
+    """The next ``slots`` pending jobs to start, in fair order (not locked or claimed)."""
+    now = now or datetime.now(UTC)
+    if slots <= 0:
+        return []
+    queues = load_queues(db, slots, now)
+    picked: list[AnalysisJob] = []
+    while len(picked) < slots:
+        eligible = [q for q in queues if q.pending and not q.blocked(enforce_concurrency)]
+        if not eligible:
+            break
+        queue = min(
+            eligible,
+            key=lambda q: (q.virtual_finish(now), _waiting_since(q.pending[0])),
+        )
+        picked.append(queue.pending.pop(0))
+        queue.running += 1
+
+    skipped = {str(q.tenant_id): q.blocked(enforce_concurrency) for q in queues if q.pending}
+    if any(skipped.values()):
+        logger.info(
+            "Tenants held back by scheduler caps",
+            tenants={tenant: reason for tenant, reason in skipped.items() if reason},
+        )
+    return picked
+
+
+def tenant_slot_available(db: Session, job: AnalysisJob) -> bool:
+    """Whether the job's tenant is still below its concurrency cap.
+
+    Called by a worker holding the job's row lock, before it marks the job
+    running and commits. On Postgres, claims for one tenant are serialized
+    with a transaction-scoped advisory lock, and running jobs are counted
+    again under it. A concurrent claim therefore either committed before
+    this count or waits until this transaction ends.
+    """
+    tenant_id = tenant_of(job)
+    tenant_settings = db.query(Tenant.settings).filter(Tenant.id == tenant_id).scalar()
+    cap = TenantPolicy.from_settings(tenant_settings).max_concurrent_jobs
+    if not cap:
+        return True
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(hashtextextended(:key, 0))"),
+            {"key": f"analysis-tenant:{tenant_id}"},
+        )
+    running = (
+        db.query(func.count(AnalysisJob.id))
+        .filter(
+            AnalysisJob.status.in_(ACTIVE_STATUSES),
+            AnalysisJob.batch_id.is_(None),
+            _tenant_filter(tenant_id),
+        )
+        .scalar()
+    )
+    return running < cap
+
+
+def mark_started(job: AnalysisJob, now: datetime | None = None) -> None:
+    """Record the job's queue wait in its tenant's rollups."""
+    now = now or datetime.now(UTC)
+    wait_ms = max(0, int((now - _waiting_since(job)).total_seconds() * 1000))
+    record_job_start(now.date(), tenant_of(job), wait_ms)
+
+
+def queue_snapshot(db: Session, now: datetime | None = None) -> list[dict[str, Any]]:
+    """Queue depth, running jobs, caps and today's queue waits per tenant."""
+    now = now or datetime.now(UTC)
+    today = now.date()
+    depth: dict[uuid.UUID, dict[int, int]] = {}
+    oldest: dict[uuid.UUID, datetime] = {}
+    for tenant_id, priority, count, first_created in (
+        db.query(
+            AnalysisJob.tenant_id,
+            AnalysisJob.priority,
+            func.count(AnalysisJob.id),
+            func.min(AnalysisJob.created_at),
+        )
+        .filter(AnalysisJob.status == "pending")
+        .group_by(AnalysisJob.tenant_id, AnalysisJob.priority)
+    ):
+        key = tenant_id or DEFAULT_TENANT_ID
+        by_priority = depth.setdefault(key, {})
+        by_priority[priority or 0] = by_priority.get(priority or 0, 0) + count
+        if first_created is not None:
+            first_created = _as_utc(first_created)
+            oldest[key] = min(oldest.get(key, first_created), first_created)
+
+    running = _count_by_tenant(
+        db.query(AnalysisJob.tenant_id, func.count(AnalysisJob.id))
+        .filter(AnalysisJob.status.in_(ACTIVE_STATUSES), AnalysisJob.batch_id.is_(None))
+        .group_by(AnalysisJob.tenant_id)
+        .all()
+    )
+    usage = {
+        row.tenant_id: row
+        for row in db.query(AnalysisTenantUsage).filter(AnalysisTenantUsage.day == today)
+    }
+    waits: dict[uuid.UUID, dict[int, int]] = {}
+    for row in db.query(AnalysisQueueWait).filter(AnalysisQueueWait.day == today):
+        waits.setdefault(row.tenant_id, {})[row.le_ms] = row.jobs
+
+    tenant_ids = set(depth) | set(running) | set(usage)
+    tenant_settings = dict(
+        db.query(Tenant.id, Tenant.settings).filter(Tenant.id.in_(list(tenant_ids))).all()
+    )
+    rows = []
+    for tenant_id in sorted(tenant_ids, key=str):
+        policy = TenantPolicy.from_settings(tenant_settings.get(tenant_id))
+        today_usage = usage.get(tenant_id)
+        queue = TenantQueue(
+            tenant_id=tenant_id,
+            policy=policy,
+            running=running.get(tenant_id, 0),
+            tokens_today=(
+                today_usage.tokens_input + today_usage.tokens_output if today_usage else 0
+            ),
+        )
+        started = today_usage.jobs_started if today_usage else 0
+        rows.append(
+            {
+                "tenant_id": str(tenant_id),
+                "weight": policy.weight,
+                "max_concurrent_jobs": policy.max_concurrent_jobs,
+                "daily_token_budget": policy.daily_token_budget,
+                "pending": sum(depth.get(tenant_id, {}).values()),
+                "pending_by_priority": {
+                    str(p): n for p, n in sorted(depth.get(tenant_id, {}).items(), reverse=True)
+                },
+                "running": queue.running,
+                "tokens_today": queue.tokens_today,
+                "blocked": queue.blocked() if tenant_id in depth else None,
+                "oldest_pending_wait_s": (
+                    int((now - oldest[tenant_id]).total_seconds()) if tenant_id in oldest else None
+                ),
+                "jobs_started_today": started,
+                "queue_wait_avg_ms": (
+                    today_usage.queue_wait_ms // started if today_usage and started else None
+                ),
+                "queue_wait_p50_ms": histogram_percentile(
+                    waits.get(tenant_id, {}), 0.5, QUEUE_WAIT_BUCKETS_MS
+                ),
+                "queue_wait_p95_ms": histogram_percentile(
+                    waits.get(tenant_id, {}), 0.95, QUEUE_WAIT_BUCKETS_MS
+                ),
+            }
+        )
+    return rows
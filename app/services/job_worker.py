@@ -0,0 +1,251 @@
+"""Standalone analysis worker (``phase2 worker``).
+
+Workers claim pending jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` so any
+number of processes on any number of hosts can share the queue. A claimed
+job carries a lease that a heartbeat thread renews; if a worker dies, its
+lease expires and another worker reclaims the job, which then resumes from
+its stage checkpoints.
+"""
+
+import os
+import socket
+import threading
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.core import get_logger, settings
+from app.db.models import AnalysisJob
+from app.db.session import SessionLocal
+from app.llm.providers import LLMProvider
+from app.services.analysis_service import AnalysisService
+from app.services.job_scheduler import mark_started, plan_jobs, tenant_slot_available
+
+logger = get_logger(__name__)
+
+# Scheduler picks tried per claim, in case other workers lock the first ones
+CLAIM_CANDIDATES = 8
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_job(db: Session, worker_id: str, lease_seconds: int) -> AnalysisJob | None:
+    """Claim the next runnable job, reclaiming expired leases first.
+
+    Pending jobs are picked by the tenant-fair scheduler. Reclaimed jobs
+    count as a retry; once retries are exhausted they are failed instead of
+    being run again.
+    """
+    while True:
+        now = datetime.now(UTC)
+        job = (
+            db.query(AnalysisJob)
+            .filter(AnalysisJob.status == "analyzing", AnalysisJob.lease_expires_at < now)
+            .order_by(AnalysisJob.priority.desc(), AnalysisJob.created_at.asc())
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .first()
+        ) or _lock_planned_job(db, now)
+        if job is None:
+            db.rollback()
+            return None
+
+        if job.status == "analyzing":
+            logger.warning(
+                "Reclaiming job with expired lease",
+                job_id=str(job.id),
+                previous_owner=job.lease_owner,
+            )
+            job.retry_count = (job.retry_count or 0) + 1
+            if job.retry_count > (job.max_retries or 0):
+                job.status = "failed"
+                job.error_message = f"Worker lease expired ({job.lease_owner})"
+                job.completed_at = now
+                job.lease_owner = None
+                job.lease_expires_at = None
+                db.commit()
+                continue
+
+        if job.status == "pending":
+            mark_started(job, now)
+        job.status = "analyzing"
+        job.current_stage = None
+        job.error_message = None
+        job.lease_owner = worker_id
+        job.lease_expires_at = now + timedelta(seconds=lease_seconds)
+        job.heartbeat_at = now
+        db.commit()
+        return job
+
+
+def _lock_planned_job(db: Session, now: datetime) -> AnalysisJob | None:
+    """Lock the first of the scheduler's picks that no other worker holds.
+
+    The plan is made without locks, so the tenant's concurrency cap is checked
+    again under the job's row lock; a pick whose tenant filled up meanwhile
+    is released and the next one tried.
+    """
+    candidate_ids = [job.id for job in plan_jobs(db, CLAIM_CANDIDATES, now=now)]
+    for candidate_id in candidate_ids:
+        job = (
+            db.query(AnalysisJob)
+            .filter(AnalysisJob.id == candidate_id, AnalysisJob.status == "pending")
+            .with_for_update(skip_locked=True)
+            .populate_existing()
+            .first()
+        )
+        if job is None:
+            continue
+        if tenant_slot_available(db, job):
+            return job
+        logger.info("Tenant reached its concurrency cap", job_id=str(candidate_id))
+        # Release the row and tenant locks before trying another tenant's job
+        db.rollback()
+    return None
+
+
+def renew_lease(job_id: uuid.UUID, worker_id: str, lease_seconds: int) -> bool:
+    """Extend a lease; False if the job is no longer leased to this worker."""
+    now = datetime.now(UTC)
+    with SessionLocal() as db:
+        updated = (
+            db.query(AnalysisJob)
+            .filter(AnalysisJob.id == job_id, AnalysisJob.lease_owner == worker_id)
+            .update(
+                {
+                    AnalysisJob.lease_expires_at: now + timedelta(seconds=lease_seconds),
+                    AnalysisJob.heartbeat_at: now,
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+    return updated == 1
+
+
+class LeaseHeartbeat:
+    """Background thread renewing one job's lease every ``lease_seconds / 3``."""
+
+    def __init__(self, job_id: uuid.UUID, worker_id: str, lease_seconds: int):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"lease-{job_id}", daemon=True
+        )
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                renewed = renew_lease(self.job_id, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                # Transient DB errors: keep trying until the lease runs out
+                logger.warning("Lease heartbeat failed", job_id=str(self.job_id), error=str(e))
+                continue
+            if not renewed:
+                self.lost = True
+                logger.error("Lost job lease", job_id=str(self.job_id), worker_id=self.worker_id)
+                return
+
+
+class AnalysisWorker:
+    """Runs ``concurrency`` job slots in threads until stopped."""
+
+    def __init__(
+        self,
+        concurrency: int = 1,
+        worker_id: str | None = None,
+        lease_seconds: int | None = None,
+        poll_interval: float | None = None,
+        llm_provider: LLMProvider | None = None,
+    ):
+        self.concurrency = concurrency
+        self.llm_provider = llm_provider
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds or settings.analysis_worker_lease_seconds
+        self.poll_interval = (
+            settings.analysis_worker_poll_seconds if poll_interval is None else poll_interval
+        )
+        self.processed = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Stop claiming new jobs; running jobs finish first."""
+        self._stop.set()
+
+    def run(self, max_jobs: int | None = None) -> int:
+        """Process jobs until stopped (or ``max_jobs`` are done); returns the count."""
+        threads = [
+            threading.Thread(target=self._slot, args=(max_jobs,), name=f"analysis-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        # Join with a timeout so signal handlers still run on the main thread
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(0.5)
+        return self.processed
+
+    def _slot(self, max_jobs: int | None) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                if max_jobs is not None and self.processed >= max_jobs:
+                    return
+            try:
+                ran = self.run_once()
+            except Exception:
+                logger.exception("Worker slot error", worker_id=self.worker_id)
+                ran = False
+            if not ran:
+                self._stop.wait(self.poll_interval)
+
+    def run_once(self) -> bool:
+        """Claim and run one job; False if the queue was empty."""
+        with SessionLocal() as db:
+            job = claim_next_job(db, self.worker_id, self.lease_seconds)
+            if job is None:
+                return False
+
+            job_id = job.id
+            logger.info("Worker claimed job", job_id=str(job_id), worker_id=self.worker_id)
+            with LeaseHeartbeat(job_id, self.worker_id, self.lease_seconds) as heartbeat:
+                try:
+                    service = AnalysisService(db, llm_provider=self.llm_provider, commit_stages=True)
+                    service.run_job(job_id)
+                    db.commit()
+                except Exception as e:
+                    logger.exception("Job failed", job_id=str(job_id))
+                    db.rollback()
+                    job = db.get(AnalysisJob, job_id)
+                    job.status = "failed"
+                    job.error_message = str(e)
+
+            if heartbeat.lost:
+                # Another worker owns the job now; leave its state alone
+                db.rollback()
+            else:
+                job = db.get(AnalysisJob, job_id)
+                job.lease_owner = None
+                job.lease_expires_at = None
+                if job.status in {"completed", "failed"} and not job.completed_at:
+                    job.completed_at = datetime.now(UTC)
+                db.commit()
+
+        with self._lock:
+            self.processed += 1
+        return True
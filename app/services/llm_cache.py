@@ -0,0 +1,157 @@
+"""Persistent LLM response cache keyed by the rendered prompt."""
+
+import hashlib
+import itertools
+import json
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core import get_logger, settings
+from app.db.models import LlmResponseCache
+from app.db.session import SessionLocal
+from app.llm.providers import LLMResponse
+
+logger = get_logger(__name__)
+
+# Prune expired/excess entries once every N writes from this process
+PRUNE_EVERY = 200
+
+
+def response_cache_key(model: str, system_prompt: str, user_prompt: str, temperature: float) -> str:
+    """sha256 over the exact inputs that determine an LLM response."""
+    payload = json.dumps(
+        [model, system_prompt, user_prompt, float(temperature)], ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """DB-backed cache with TTL and size limits.
+
+    Lookups use their own short session so they are safe from claim worker
+    threads. Writes go through the caller's session inside a savepoint, so
+    they commit with the job and a lost insert race never fails the stage.
+    Cache errors are logged and treated as misses.
+    """
+
+    _writes = itertools.count(1)
+
+    def __init__(
+        self,
+        ttl_seconds: int | None = None,
+        max_entries: int | None = None,
+        max_entry_bytes: int | None = None,
+    ):
+        self.ttl_seconds = settings.llm_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.max_entries = settings.llm_cache_max_entries if max_entries is None else max_entries
+        self.max_entry_bytes = (
+            settings.llm_cache_max_entry_bytes if max_entry_bytes is None else max_entry_bytes
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: str) -> LLMResponse | None:
+        if not self.enabled:
+            return None
+        try:
+            with SessionLocal() as db:
+                entry = db.get(LlmResponseCache, key)
+                if not entry or _is_expired(entry.expires_at):
+                    return None
+                return LLMResponse(
+                    content=entry.content,
+                    parsed_json=entry.parsed_json,
+                    model=entry.model,
+                    tokens_input=entry.tokens_input or 0,
+                    tokens_output=entry.tokens_output or 0,
+                    latency_ms=0,
+                )
+        except Exception as e:
+            logger.warning("LLM cache lookup failed", error=str(e))
+            return None
+
+    def mark_hit(self, db: Session, key: str) -> None:
+        try:
+            with db.begin_nested():
+                db.query(LlmResponseCache).filter(LlmResponseCache.cache_key == key).update(
+                    {
+                        LlmResponseCache.hit_count: LlmResponseCache.hit_count + 1,
+                        LlmResponseCache.last_used_at: datetime.now(UTC),
+                    },
+                    synchronize_session=False,
+                )
+        except Exception as e:
+            logger.warning("LLM cache hit update failed", error=str(e))
+
+    def store(self, db: Session, key: str, response: LLMResponse, temperature: float) -> None:
+        if not self.enabled:
+            return
+        size = len(response.content.encode("utf-8"))
+        if size > self.max_entry_bytes:
+            return
+        now = datetime.now(UTC)
+        try:
+            with db.begin_nested():
+                db.merge(
+                    LlmResponseCache(
+                        cache_key=key,
+                        model=response.model,
+                        temperature=temperature,
+                        content=response.content,
+                        parsed_json=response.parsed_json,
+                        tokens_input=response.tokens_input,
+                        tokens_output=response.tokens_output,
+                        size_bytes=size,
+                        hit_count=0,
+                        created_at=now,
+                        last_used_at=now,
+                        expires_at=now + timedelta(seconds=self.ttl_seconds),
+                    )
+                )
+        except Exception as e:
+            logger.warning("LLM cache write failed", error=str(e))
+            return
+
+        if next(self._writes) % PRUNE_EVERY == 0:
+            self.prune(db)
+
+    def prune(self, db: Session) -> int:
+        """Delete expired entries, then least recently used ones beyond max_entries."""
+        removed = 0
+        try:
+            with db.begin_nested():
+                removed += (
+                    db.query(LlmResponseCache)
+                    .filter(LlmResponseCache.expires_at <= datetime.now(UTC))
+                    .delete(synchronize_session=False)
+                )
+                excess = (db.query(func.count(LlmResponseCache.cache_key)).scalar() or 0) - (
+                    self.max_entries
+                )
+                if excess > 0:
+                    stale_keys = [
+                        row[0]
+                        for row in db.query(LlmResponseCache.cache_key)
+                        .order_by(LlmResponseCache.last_used_at.asc())
+                        .limit(excess)
+                    ]
+                    removed += (
+                        db.query(LlmResponseCache)
+                        .filter(LlmResponseCache.cache_key.in_(stale_keys))
+                        .delete(synchronize_session=False)
+                    )
+        except Exception as e:
+            logger.warning("LLM cache prune failed", error=str(e))
+        return removed
+
+
+def _is_expired(expires_at: datetime | None) -> bool:
+    if expires_at is None:
+        return False
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=UTC)
+    return expires_at <= datetime.now(UTC)
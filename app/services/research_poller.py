@@ -0,0 +1,193 @@
+"""Deep Research poller (``phase2 research-poller``, ``/cron/poll-research``).
+
+Research jobs are submitted as OpenAI background responses. The response id
+is stored on the job (``openai_response_id``) and one loop polls every
+outstanding response, rescheduling each job through ``next_poll_at`` with a
+delay that grows with the job's age. All state lives in the database, so a
+restarted poller, or another replica, carries on where the last one stopped.
+"""
+
+import asyncio
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, or_
+
+from app.core import get_logger, settings
+from app.db.models import AnalysisJob
+from app.db.session import SessionLocal
+from app.llm.deep_research import DeepResearchProvider, get_http_client
+
+logger = get_logger(__name__)
+
+RESEARCH_PIPELINE = "research"
+# A submission interrupted by a crash is retried after this long
+SUBMIT_RETRY_SECONDS = 300
+
+
+def poll_delay(elapsed_seconds: float) -> float:
+    """Seconds until the next poll of a response that has run for ``elapsed_seconds``."""
+    return min(
+        max(elapsed_seconds / 10, settings.deep_research_poll_min_seconds),
+        settings.deep_research_poll_max_seconds,
+    )
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=UTC) if value.tzinfo is None else value
+
+
+@dataclass
+class _ClaimedJob:
+    id: uuid.UUID
+    patent_id: str
+    claim_text: str | None
+    response_id: str | None
+
+
+class DeepResearchPoller:
+    """Submits research jobs and polls their background responses in batches."""
+
+    def __init__(
+        self,
+        provider: DeepResearchProvider | None = None,
+        batch_size: int = 100,
+        concurrency: int = 16,
+    ):
+        self.provider = provider or DeepResearchProvider()
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    async def run(self) -> None:
+        """Poll until stopped, sleeping until the next job is due."""
+        while not self._stop.is_set():
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Research poll pass failed")
+            idle_seconds = await asyncio.to_thread(self._idle_seconds)
+            await asyncio.to_thread(self._stop.wait, idle_seconds)
+
+    async def run_once(self, job_id: uuid.UUID | None = None) -> dict[str, int]:
+        """Submit new jobs and poll due responses once (only ``job_id`` if given)."""
+        # Database work runs in a thread so row locks never block the event loop
+        jobs = await asyncio.to_thread(self._claim_due, job_id)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        client = get_http_client()
+
+        async def check(job: _ClaimedJob) -> tuple[_ClaimedJob, dict[str, Any]]:
+            async with semaphore:
+                if job.response_id is None:
+                    try:
+                        return job, await self.provider.submit(job.patent_id, job.claim_text, client)
+                    except Exception as e:
+                        return job, {"error": str(e)}
+                try:
+                    data = await self.provider.retrieve(job.response_id, client)
+                except Exception as e:
+                    # Transient; the job was already rescheduled when claimed
+                    logger.warning("Deep Research poll failed", job_id=str(job.id), error=str(e))
+                    return job, {}
+                return job, self.provider.to_outcome(data)
+
+        outcomes = await asyncio.gather(*(check(job) for job in jobs))
+        return await asyncio.to_thread(self._record, outcomes)
+
+    def _claim_due(self, job_id: uuid.UUID | None) -> list[_ClaimedJob]:
+        """Lock due jobs, fail expired ones and push the rest's ``next_poll_at``
+        forward so a crash or a second poller does not act on them twice."""
+        now = datetime.now(UTC)
+        claimed: list[_ClaimedJob] = []
+        with SessionLocal() as db:
+            query = db.query(AnalysisJob).filter(
+                AnalysisJob.pipeline == RESEARCH_PIPELINE,
+                AnalysisJob.status == "researching",
+                or_(AnalysisJob.next_poll_at.is_(None), AnalysisJob.next_poll_at <= now),
+            )
+            if job_id is not None:
+                query = query.filter(AnalysisJob.id == job_id)
+            jobs = (
+                query.order_by(AnalysisJob.created_at.asc())
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            for job in jobs:
+                elapsed = (now - _as_utc(job.started_at or job.created_at)).total_seconds()
+                if elapsed > settings.deep_research_timeout_seconds:
+                    logger.warning("Deep Research timed out", job_id=str(job.id))
+                    self._finish(job, now, error="Deep Research timeout")
+                    continue
+                delay = poll_delay(elapsed) if job.openai_response_id else SUBMIT_RETRY_SECONDS
+                job.next_poll_at = now + timedelta(seconds=delay)
+                claimed.append(
+                    _ClaimedJob(job.id, job.patent_id, job.claim_text, job.openai_response_id)
+                )
+            db.commit()
+        return claimed
+
+    def _record(self, outcomes: list[tuple[_ClaimedJob, dict[str, Any]]]) -> dict[str, int]:
+        counts = {"checked": len(outcomes), "submitted": 0, "completed": 0, "failed": 0}
+        if not outcomes:
+            return counts
+        now = datetime.now(UTC)
+        with SessionLocal() as db:
+            for claimed, outcome in outcomes:
+                job = db.get(AnalysisJob, claimed.id)
+                if job is None or job.status != "researching":
+                    continue
+                if "response_id" in outcome:
+                    job.openai_response_id = outcome["response_id"]
+                    job.next_poll_at = now + timedelta(seconds=poll_delay(0))
+                    counts["submitted"] += 1
+                    logger.info(
+                        "Deep Research submitted",
+                        job_id=str(job.id),
+                        response_id=outcome["response_id"],
+                    )
+                elif "result" in outcome:
+                    self._finish(job, now, result=outcome["result"])
+                    counts["completed"] += 1
+                elif "error" in outcome:
+                    logger.error("Deep Research failed", job_id=str(job.id), error=outcome["error"])
+                    self._finish(job, now, error=outcome["error"])
+                    counts["failed"] += 1
+            db.commit()
+        return counts
+
+    @staticmethod
+    def _finish(
+        job: AnalysisJob,
+        now: datetime,
+        result: dict | None = None,
+        error: str | None = None,
+    ) -> None:
+        job.status = "failed" if error else "completed"
+        job.error_message = error
+        if result is not None:
+            job.research_results = result
+        job.completed_at = now
+        job.next_poll_at = None
+
+    def _idle_seconds(self) -> float:
+        """Time until the earliest outstanding job is due (bounded by the max poll delay)."""
+        with SessionLocal() as db:
+            next_poll_at = (
+                db.query(func.min(AnalysisJob.next_poll_at))
+                .filter(
+                    AnalysisJob.pipeline == RESEARCH_PIPELINE,
+                    AnalysisJob.status == "researching",
+                )
+                .scalar()
+            )
+        if next_poll_at is None:
+            return settings.deep_research_poll_max_seconds
+        delay = (_as_utc(next_poll_at) - datetime.now(UTC)).total_seconds()
+        return min(max(delay, 1.0), settings.deep_research_poll_max_seconds)
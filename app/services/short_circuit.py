@@ -0,0 +1,148 @@
+"""Skipping stages of claims whose literal outcome is decided (``ANALYSIS_SHORT_CIRCUIT``).
+
+One element clearly absent from the product fails a claim literally: stage
+13 assessed it ``not_satisfied`` with at least
+``ANALYSIS_SHORT_CIRCUIT_MIN_CONFIDENCE`` and cited a document linked to the
+product. Stage 14 would only apply its aggregation rule to that, so the
+decision is written without an LLM call. A dependent claim includes every
+element of the claims it refers to, so once all of them fail it fails too,
+and its evidence, assessment and decision stages are skipped. Element
+extraction still runs, since its output is reused by later jobs.
+
+Skipped stages are saved like any other result, with a synthesized output
+and ``skip_reason``. ``speculative`` skips only stages that have not started
+when the decision becomes known; ``ordered`` makes a dependent claim's
+evidence stages wait for its parents' assessment so the skip always applies.
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+from app.core import settings
+from app.services.claim_dependencies import claim_parents
+from app.services.stage_graph import StageGraph, StageNode, qualify
+
+ASSESSMENT_STAGE = "13_element_assessment"
+DECISION_STAGE = "14_claim_decision_aggregator"
+# Dependent claim stages skipped when the parent claims fail
+INHERITED_STAGES = (
+    "11_evidence_query_builder",
+    "12_product_fact_extractor",
+    ASSESSMENT_STAGE,
+    DECISION_STAGE,
+)
+# Stages that wait for the parents' assessment in ``ordered`` mode
+GATED_STAGES = ("11_evidence_query_builder", "12_product_fact_extractor")
+
+
+def product_evidence(context: dict) -> set[str]:
+    """Evidence ids of the documents linked to the job's product."""
+    return {str(doc.get("evidence_id")) for doc in context.get("evidence_documents") or []}
+
+
+def blocking_elements(
+    assessment: dict | None, evidence_ids: set[str], min_confidence: float
+) -> list[Any]:
+    """Elements assessed as clearly absent, backed by a product document."""
+    blocking = []
+    for item in (assessment or {}).get("assessments") or []:
+        if not isinstance(item, dict) or item.get("status") != "not_satisfied":
+            continue
+        try:
+            confidence = float(item.get("confidence") or 0)
+        except (TypeError, ValueError):
+            continue
+        cited = {
+            str(evidence.get("evidence_id"))
+            for evidence in item.get("supporting_evidence") or []
+            if isinstance(evidence, dict)
+        }
+        if confidence >= min_confidence and cited & evidence_ids:
+            blocking.append(item.get("element_no"))
+    return blocking
+
+
+def gate_dependent_claims(graph: StageGraph, claims: list[dict]) -> StageGraph:
+    """Graph where dependent claims' evidence stages also wait for the parents' assessment."""
+    parents = claim_parents(claims)
+    nodes = []
+    for node in graph.nodes.values():
+        deps = node.deps
+        if node.claim and node.stage in GATED_STAGES:
+            gates = (
+                qualify(ASSESSMENT_STAGE, {"claim_no": parent})
+                for parent in parents.get(node.claim["claim_no"], ())
+            )
+            deps = tuple(dict.fromkeys(deps + tuple(g for g in gates if g in graph.nodes)))
+        nodes.append(StageNode(node.key, node.stage, node.scope, node.claim, deps))
+    return StageGraph(nodes)
+
+
+@dataclass
+class ClaimShortCircuit:
+    """Short-circuit decisions for the claims of one job run."""
+
+    parents: dict[int, tuple[int, ...]]
+    min_confidence: float
+
+    @classmethod
+    def from_settings(cls, claims: list[dict]) -> "ClaimShortCircuit | None":
+        if settings.analysis_short_circuit == "off":
+            return None
+        return cls(claim_parents(claims), settings.analysis_short_circuit_min_confidence)
+
+    def failed(self, claim_no: int, context: dict) -> str | None:
+        """Why the claim is known to fail literally, if it is."""
+        blocking = blocking_elements(
+            context.get(f"{ASSESSMENT_STAGE}:claim_{claim_no}"),
+            product_evidence(context),
+            self.min_confidence,
+        )
+        if blocking:
+            return "element_not_satisfied: " + ", ".join(str(no) for no in blocking)
+        return self.inherited(claim_no, context)
+
+    def inherited(self, claim_no: int, context: dict) -> str | None:
+        """Failure of every claim ``claim_no`` refers to, if they all fail."""
+        parents = self.parents.get(claim_no)
+        if not parents or not all(self.failed(parent, context) for parent in parents):
+            return None
+        return "parent_claim_failed: " + ", ".join(str(no) for no in parents)
+
+    def skip(self, node: StageNode, context: dict) -> dict[str, Any] | None:
+        """Stage result replacing a node of a decided claim, or None to run it."""
+        if not node.claim or node.stage not in INHERITED_STAGES:
+            return None
+        claim_no = node.claim["claim_no"]
+        if node.stage == DECISION_STAGE:
+            reason = self.failed(claim_no, context)
+        else:
+            reason = self.inherited(claim_no, context)
+        if not reason:
+            return None
+
+        output: dict[str, Any] = {"skipped": True, "errors": []}
+        if node.stage == DECISION_STAGE:
+            patent_id = (context.get("patent_info") or {}).get("patent_id", "")
+            blocking = blocking_elements(
+                context.get(f"{ASSESSMENT_STAGE}:claim_{claim_no}"),
+                product_evidence(context),
+                self.min_confidence,
+            )
+            output = {
+                "claim_id": f"{patent_id}_claim{claim_no}",
+                "literal_status": "fail",
+                "blocking_elements": blocking,
+                "summary": f"Decided without aggregation ({reason})",
+                "next_action": "drop",
+                "errors": [],
+            }
+        return {
+            "input": None,
+            "output": output,
+            "model": None,
+            "tokens_input": 0,
+            "tokens_output": 0,
+            "latency_ms": 0,
+            "skip_reason": reason,
+        }
@@ -0,0 +1,202 @@
+"""Stage dependency graph built from the inputs/outputs declared in prompt YAML.
+
+Each prompt declares a ``scope`` (``case``: once per job, ``claim``: once
+per claim, ``aggregate``: once per job after the claims) plus the context
+keys it reads (``inputs``) and provides (``outputs``). A stage depends on
+every stage of the same pipeline whose outputs it reads; claim-scoped
+producers are matched per claim, or across all claims for aggregates.
+Inputs no stage produces are base context and are always available.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+SCOPES = {"case", "claim", "aggregate"}
+
+
+@dataclass(frozen=True)
+class StageSpec:
+    """Scheduling metadata of one prompt."""
+
+    stage: str
+    scope: str
+    inputs: tuple[str, ...]
+    outputs: tuple[str, ...]
+
+    @classmethod
+    def from_prompt(cls, stage: str, config: dict[str, Any]) -> "StageSpec":
+        scope = config.get("scope", "case")
+        if scope not in SCOPES:
+            raise ValueError(f"Invalid scope for prompt {stage}: {scope}")
+        return cls(
+            stage=stage,
+            scope=scope,
+            inputs=tuple(config.get("inputs") or ()),
+            outputs=tuple(config.get("outputs") or (stage,)),
+        )
+
+
+@dataclass(frozen=True)
+class StageNode:
+    """One executable stage; ``key`` is the qualified stage name used in context."""
+
+    key: str
+    stage: str
+    scope: str
+    claim: dict | None
+    deps: tuple[str, ...]
+
+
+@dataclass
+class StageCheckpoint:
+    """Output of a stage completed by an earlier attempt of the job."""
+
+    output: Any
+    input_hash: str | None = None
+
+
+def qualify(stage: str, claim: dict | None) -> str:
+    return f"{stage}:claim_{claim['claim_no']}" if claim else stage
+
+
+class StageGraph:
+    """DAG of stage nodes for one job (stages x claims)."""
+
+    def __init__(self, nodes: list[StageNode]):
+        self.nodes = {node.key: node for node in nodes}
+        self.dependents: dict[str, list[str]] = {key: [] for key in self.nodes}
+        for node in nodes:
+            for dep in node.deps:
+                self.dependents[dep].append(node.key)
+
+    @classmethod
+    def build(cls, specs: list[StageSpec], claims: list[dict]) -> "StageGraph":
+        """Build the graph for stages in pipeline order; nodes keep that order, claim-major."""
+        producers: dict[str, StageSpec] = {}
+        for spec in specs:
+            for output in spec.outputs:
+                producers[output] = spec
+
+        def deps_for(spec: StageSpec, claim: dict | None) -> tuple[str, ...]:
+            deps: list[str] = []
+            for name in spec.inputs:
+                producer = producers.get(name)
+                if producer is None or producer is spec:
+                    continue
+                if producer.scope != "claim":
+                    deps.append(producer.stage)
+                elif claim is not None:
+                    deps.append(qualify(producer.stage, claim))
+                else:
+                    deps.extend(qualify(producer.stage, c) for c in claims)
+            return tuple(dict.fromkeys(deps))
+
+        nodes: list[StageNode] = []
+        claim_specs = [spec for spec in specs if spec.scope == "claim"]
+        for spec in specs:
+            if spec.scope != "claim":
+                nodes.append(StageNode(spec.stage, spec.stage, spec.scope, None, deps_for(spec, None)))
+            elif spec is claim_specs[0]:
+                for claim in claims:
+                    for claim_spec in claim_specs:
+                        nodes.append(
+                            StageNode(
+                                qualify(claim_spec.stage, claim),
+                                claim_spec.stage,
+                                "claim",
+                                claim,
+                                deps_for(claim_spec, claim),
+                            )
+                        )
+
+        graph = cls(nodes)
+        graph._check_acyclic()
+        return graph
+
+    def _check_acyclic(self) -> None:
+        order = self.topological_order()
+        if len(order) != len(self.nodes):
+            cyclic = sorted(set(self.nodes) - set(order))
+            raise ValueError(f"Stage dependencies contain a cycle: {cyclic}")
+
+    def topological_order(self) -> list[str]:
+        pending = {key: len(node.deps) for key, node in self.nodes.items()}
+        order = [key for key, count in pending.items() if count == 0]
+        for key in order:
+            for dependent in self.dependents[key]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    order.append(dependent)
+        return order
+
+    def descendants(self, key: str) -> set[str]:
+        seen: set[str] = set()
+        stack = list(self.dependents[key])
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self.dependents[current])
+        return seen
+
+
+@dataclass
+class StageScheduler:
+    """Tracks node state for one job run and decides which nodes are ready.
+
+    A checkpointed node is reused when its recorded input hash matches the
+    hash of its freshly rendered inputs. Checkpoints without a hash are
+    reused only if none of their dependencies ran again in this attempt.
+    """
+
+    graph: StageGraph
+    checkpoints: dict[str, StageCheckpoint] = field(default_factory=dict)
+    done: set[str] = field(default_factory=set)
+    executed: set[str] = field(default_factory=set)
+    running: set[str] = field(default_factory=set)
+    failed: dict[str, str] = field(default_factory=dict)
+    blocked: set[str] = field(default_factory=set)
+
+    def ready(self) -> list[StageNode]:
+        unavailable = self.done | self.running | self.blocked | set(self.failed)
+        return [
+            node
+            for key, node in self.graph.nodes.items()
+            if key not in unavailable and all(dep in self.done for dep in node.deps)
+        ]
+
+    def reusable(self, node: StageNode, input_hash: str) -> Any | None:
+        checkpoint = self.checkpoints.get(node.key)
+        if checkpoint is None:
+            return None
+        if checkpoint.input_hash is not None:
+            return checkpoint.output if checkpoint.input_hash == input_hash else None
+        if any(dep in self.executed for dep in node.deps):
+            return None
+        return checkpoint.output
+
+    def start(self, key: str) -> None:
+        self.running.add(key)
+
+    def finish(self, key: str, executed: bool = True) -> None:
+        self.running.discard(key)
+        self.done.add(key)
+        if executed:
+            self.executed.add(key)
+
+    def fail(self, key: str, error: str) -> None:
+        self.running.discard(key)
+        self.failed[key] = error
+        self.blocked |= self.graph.descendants(key)
+
+    @property
+    def finished(self) -> bool:
+        return not self.running and not self.ready()
+
+    @property
+    def first_failure(self) -> str | None:
+        """Error message of the earliest failed node in graph order."""
+        for key in self.graph.nodes:
+            if key in self.failed:
+                return f"Stage {key} failed: {self.failed[key]}"
+        return None
@@ -0,0 +1,108 @@
+"""Content-addressed storage of stage prompt variables.
+
+Each variable a stage renders is stored once in ``analysis_input_blobs`` as
+compact JSON keyed by its sha256; ``AnalysisResult.input_refs`` maps
+variable names to those hashes. Job-wide values (patent info, evidence,
+earlier stage outputs) are shared by every stage of a job, and by reruns,
+so they are written once instead of with every result. Blobs of at least
+``ANALYSIS_BLOB_COMPRESS_MIN_BYTES`` are zstd-compressed when
+``ANALYSIS_BLOB_COMPRESSION=zstd`` (``zstd`` extra).
+"""
+
+import hashlib
+import json
+from typing import Any
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core import settings
+from app.db.models import AnalysisInputBlob, AnalysisResult
+from app.llm.prompt_manager import SerializationMemo
+
+
+def _zstandard() -> Any:
+    try:
+        import zstandard
+    except ImportError as exc:  # noqa: BLE001
+        raise RuntimeError("zstandard is required for ANALYSIS_BLOB_COMPRESSION=zstd") from exc
+    return zstandard
+
+
+def to_json(value: Any, memo: SerializationMemo | None = None) -> str:
+    """Compact JSON of a variable (reusing the prompt serialization when memoized)."""
+    if memo is not None and isinstance(value, (dict, list)):
+        return memo.serialize(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_blob(text: str) -> tuple[str, bytes]:
+    """(encoding, data) for a JSON document."""
+    data = text.encode("utf-8")
+    if (
+        settings.analysis_blob_compression == "zstd"
+        and len(data) >= settings.analysis_blob_compress_min_bytes
+    ):
+        return "zstd", _zstandard().ZstdCompressor().compress(data)
+    return "json", data
+
+
+def decode_blob(encoding: str, data: bytes) -> Any:
+    if encoding == "zstd":
+        data = _zstandard().ZstdDecompressor().decompress(data)
+    return json.loads(data.decode("utf-8"))
+
+
+def store_inputs(
+    db: Session,
+    variables: dict[str, Any],
+    memo: SerializationMemo | None = None,
+) -> dict[str, str]:
+    """Write the blobs of ``variables`` that are not stored yet; returns name -> hash."""
+    texts: dict[str, str] = {}
+    refs: dict[str, str] = {}
+    for name, value in variables.items():
+        text = to_json(value, memo)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        texts[digest] = text
+        refs[name] = digest
+
+    existing = {
+        digest
+        for (digest,) in db.query(AnalysisInputBlob.hash).filter(
+            AnalysisInputBlob.hash.in_(list(texts))
+        )
+    }
+    for digest, text in texts.items():
+        if digest in existing:
+            continue
+        encoding, data = encode_blob(text)
+        try:
+            with db.begin_nested():
+                db.add(
+                    AnalysisInputBlob(
+                        hash=digest, encoding=encoding, data=data, size_bytes=len(text.encode("utf-8"))
+                    )
+                )
+                db.flush()
+        except IntegrityError:
+            # Written concurrently by another job
+            pass
+    return refs
+
+
+def load_inputs(db: Session, result: AnalysisResult) -> dict[str, Any] | None:
+    """Prompt variables of a stage result (legacy rows carry them in ``input_data``)."""
+    if not result.input_refs:
+        return result.input_data
+    blobs = {
+        blob.hash: blob
+        for blob in db.query(AnalysisInputBlob).filter(
+            AnalysisInputBlob.hash.in_(set(result.input_refs.values()))
+        )
+    }
+    return {
+        name: decode_blob(blobs[digest].encoding, blobs[digest].data)
+        for name, digest in result.input_refs.items()
+        if digest in blobs
+    }
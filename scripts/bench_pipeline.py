@@ -0,0 +1,224 @@
+"""Benchmark: run pipeline C jobs end to end against the fake LLM.
+
+Seeds synthetic patents (N claims each) with a product and its evidence
+chunks, runs ``AnalysisService.run_job`` with ``FakeLLMProvider`` and
+reports jobs/hour, the share of job time spent in database calls, prompt
+render time and peak memory. Uses ``DATABASE_URL`` when set (apply the
+migrations or pass ``--init-schema``), otherwise a temporary SQLite file.
+
+    python scripts/bench_pipeline.py --jobs 10 --claims 10 --latency-ms 200 --latency-jitter 0.5
+    python scripts/bench_pipeline.py --save scripts/bench_pipeline_baseline.json
+    python scripts/bench_pipeline.py --check scripts/bench_pipeline_baseline.json  # CI
+
+``--check`` exits with status 1 when jobs/hour falls more than
+``--tolerance`` below the baseline. Baselines are only comparable on the
+same database backend and with the same workload options, which are stored
+with them; keep the default zero latency in CI so the number measures the
+pipeline's own overhead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+# app.db.session reads the environment at import
+_scratch = Path(tempfile.mkdtemp(prefix="bench-pipeline-"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_scratch / 'bench.db'}")
+os.environ.setdefault("EVIDENCE_INDEX_PATH", str(_scratch / "evidence_index"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("PROMPTS_DIR", str(ROOT / "prompts"))
+
+from sqlalchemy import event, func  # noqa: E402
+
+from app.core import settings  # noqa: E402
+from app.db.models import (  # noqa: E402
+    AnalysisResult,
+    Claim,
+    Company,
+    DocChunk,
+    Document,
+    Evidence,
+    Product,
+    ProductDocument,
+)
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.llm.fake import FakeLLMProvider  # noqa: E402
+from app.main import init_database  # noqa: E402
+from app.services.analysis_service import AnalysisService  # noqa: E402
+
+WORKLOAD_OPTIONS = ("jobs", "claims", "elements", "evidence_docs", "chunks", "workers")
+
+
+class DbTimer:
+    """Wall time spent inside cursor executions, across all threads."""
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.statements = 0
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("bench_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - conn.info["bench_started"].pop()
+        with self._lock:
+            self.seconds += elapsed
+            self.statements += 1
+
+
+def seed_job(args: argparse.Namespace, rng: random.Random) -> tuple[str, uuid.UUID]:
+    """A patent with ``claims`` claims and a product with evidence documents."""
+    suffix = rng.randint(1000000, 9999999)
+    words = ["端子", "制御部", "筐体", "通信回路", "電源", "センサ", "表示部", "記憶部"]
+    with SessionLocal() as db:
+        doc = Document(country="JP", doc_number=str(suffix), kind="B2", title="ベンチマーク特許")
+        company = Company(name=f"ベンチマーク株式会社{suffix}")
+        db.add_all([doc, company])
+        db.flush()
+        for claim_no in range(1, args.claims + 1):
+            text = "、".join(rng.sample(words, 4)) + f"を備える装置（請求項{claim_no}）"
+            db.add(Claim(document_id=doc.id, claim_no=claim_no, claim_text=text))
+        product = Product(company_id=company.id, name=f"製品{suffix}")
+        db.add(product)
+        db.flush()
+        for doc_no in range(args.evidence_docs):
+            evidence = Evidence(url=f"https://example.com/{suffix}/{doc_no}", title="取扱説明書")
+            db.add(evidence)
+            db.flush()
+            db.add(
+                ProductDocument(product_id=product.id, evidence_id=evidence.id, doc_type="manual")
+            )
+            db.add_all(
+                DocChunk(
+                    evidence_id=evidence.id,
+                    chunk_index=i,
+                    text="本機は" + "と".join(rng.sample(words, 3)) + "を備える。" * 20,
+                )
+                for i in range(args.chunks)
+            )
+        db.commit()
+        return f"JP{suffix}B2", product.id
+
+
+def run_job(
+    provider: FakeLLMProvider, patent_id: str, product_id: uuid.UUID
+) -> tuple[uuid.UUID, float]:
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        service = AnalysisService(db, llm_provider=provider)
+        job = service.create_job(patent_id=patent_id, pipeline="C", product_id=product_id)
+        db.commit()
+        service.run_job(job.id)
+        db.commit()
+        if job.status != "completed":
+            raise RuntimeError(f"Job {job.id} {job.status}: {job.error_message}")
+        return job.id, time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=5)
+    parser.add_argument("--claims", type=int, default=10)
+    parser.add_argument("--elements", type=int, default=4, help="claim elements per claim")
+    parser.add_argument("--evidence-docs", type=int, default=3)
+    parser.add_argument("--chunks", type=int, default=40, help="chunks per evidence document")
+    parser.add_argument("--workers", type=int, default=1, help="jobs run in parallel")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="median fake LLM latency")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="log-normal sigma")
+    parser.add_argument("--tokens-output", type=int, default=400, help="median output tokens")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--init-schema", action="store_true", help="create tables first")
+    parser.add_argument("--save", type=Path, help="write the result as a baseline")
+    parser.add_argument("--check", type=Path, help="fail on a regression against a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    args = parser.parse_args()
+
+    if args.init_schema or engine.dialect.name == "sqlite":
+        settings.allow_schema_init = True
+        init_database()
+
+    rng = random.Random(args.seed)
+    provider = FakeLLMProvider(
+        latency_ms=args.latency_ms,
+        latency_jitter=args.latency_jitter,
+        tokens_output=args.tokens_output,
+        elements=args.elements,
+        seed=args.seed,
+    )
+    workload = [seed_job(args, rng) for _ in range(args.jobs)]
+
+    timer = DbTimer()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        runs = list(pool.map(lambda job: run_job(provider, *job), workload))
+    wall = time.perf_counter() - started
+
+    job_ids = [job_id for job_id, _ in runs]
+    job_seconds = sum(seconds for _, seconds in runs)
+    with SessionLocal() as db:
+        stages, render_ms, llm_ms = (
+            db.query(
+                func.count(AnalysisResult.id),
+                func.coalesce(func.sum(AnalysisResult.render_ms), 0),
+                func.coalesce(func.sum(AnalysisResult.latency_ms), 0),
+            )
+            .filter(AnalysisResult.job_id.in_(job_ids))
+            .one()
+        )
+
+    result = {
+        "backend": engine.dialect.name,
+        "workload": {name: getattr(args, name) for name in WORKLOAD_OPTIONS},
+        "jobs_per_hour": round(args.jobs / wall * 3600, 1),
+        "seconds_per_job": round(job_seconds / args.jobs, 3),
+        "stage_results": stages,
+        "db_seconds": round(timer.seconds, 3),
+        "db_statements": timer.statements,
+        "db_share": round(timer.seconds / job_seconds, 3) if job_seconds else 0.0,
+        "render_ms_per_job": round(render_ms / args.jobs, 1),
+        "llm_ms_per_job": round(llm_ms / args.jobs, 1),
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    if args.save:
+        args.save.write_text(
+            json.dumps(result, indent=2, ensure_ascii=False) + "\n", encoding="utf-8"
+        )
+    if args.check:
+        baseline = json.loads(args.check.read_text(encoding="utf-8"))
+        if (baseline["backend"], baseline["workload"]) != (result["backend"], result["workload"]):
+            print("Baseline was recorded with a different backend or workload", file=sys.stderr)
+            return 2
+        floor = baseline["jobs_per_hour"] * (1 - args.tolerance)
+        if result["jobs_per_hour"] < floor:
+            print(
+                f"Throughput regression: {result['jobs_per_hour']} jobs/hour "
+                f"< {floor:.1f} ({baseline['jobs_per_hour']} - {args.tolerance:.0%})",
+                file=sys.stderr,
+            )
+            return 1
+        print(f"Throughput OK: {result['jobs_per_hour']} >= {floor:.1f} jobs/hour")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
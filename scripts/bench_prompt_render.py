@@ -0,0 +1,144 @@
+"""Benchmark: render the C-pipeline prompts for a synthetic multi-claim job.
+
+Compares the compiled prompt registry (single join, per-job serialization
+memo) with the previous renderer (``str.replace`` per variable, indented
+JSON, placeholder regex). Variables come from
+``AnalysisService._prepare_stage_variables`` so prompt contents match a real
+run; evidence retrieval is replaced by a fixed packed result.
+
+    python scripts/bench_prompt_render.py --claims 20 --elements 8 --rounds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.llm.prompt_manager import PromptManager, SerializationMemo  # noqa: E402
+from app.services.analysis_service import PIPELINE_STAGES, AnalysisService  # noqa: E402
+
+
+def build_context(claims: int, elements: int) -> tuple[dict, list[dict]]:
+    claim_rows = [
+        {"claim_id": f"c{n}", "claim_no": n, "claim_text": "前記制御部は、" * 40 + f"請求項{n}"}
+        for n in range(1, claims + 1)
+    ]
+    context: dict = {
+        "patent_info": {
+            "patent_id": "JP7000000B2",
+            "title": "無線通信装置",
+            "abstract": "本発明は無線通信装置に関する。" * 30,
+            "assignee": "テスト株式会社",
+        },
+        "claims": claim_rows,
+        "target_product": {"name": "カメラX", "product": {"description": "小型カメラ" * 50}},
+        "today": "2026-01-01",
+    }
+    for claim in claim_rows:
+        suffix = f":claim_{claim['claim_no']}"
+        element_rows = [
+            {
+                "element_no": e,
+                "quote_text": f"要素{e}の引用テキスト" * 5,
+                "plain_description": "説明" * 20,
+                "key_terms": ["端子", "制御部", "通信"],
+            }
+            for e in range(1, elements + 1)
+        ]
+        context[f"10_claim_element_extractor{suffix}"] = {"elements": element_rows}
+        context[f"11_evidence_query_builder{suffix}"] = {"queries": []}
+        context[f"12_product_fact_extractor{suffix}"] = {
+            "product_facts": [
+                {"fact_id": f"f{e}", "fact_text": "事実" * 30, "quote": "引用" * 30}
+                for e in range(elements)
+            ]
+        }
+        context[f"13_element_assessment{suffix}"] = {
+            "assessments": [
+                {"element_no": e, "judgement": "unknown", "missing_information": ["仕様書"]}
+                for e in range(1, elements + 1)
+            ]
+        }
+        context[f"14_claim_decision_aggregator{suffix}"] = {"decision": "likely", "open_items": []}
+    return context, claim_rows
+
+
+def stage_variables(service: AnalysisService, context: dict, claims: list[dict]) -> list[tuple]:
+    packed = [
+        {
+            "evidence_id": "ev1",
+            "title": "取扱説明書",
+            "chunks": [{"chunk_index": i, "text": "本機は端子を備える。" * 40} for i in range(12)],
+        }
+    ]
+    service._retrieve_evidence = lambda stage, ctx, elements: packed  # no database in the benchmark
+    calls = []
+    for claim in claims:
+        node_context = dict(context, _current_claim=claim, _current_claim_no=claim["claim_no"])
+        for stage in PIPELINE_STAGES["C"][:5]:
+            calls.append((stage, service._prepare_stage_variables(stage, node_context)))
+    service._collect_claim_results(context, claims)
+    for stage in PIPELINE_STAGES["C"][5:]:
+        calls.append((stage, service._prepare_stage_variables(stage, context)))
+    return calls
+
+
+def legacy_render(manager: PromptManager, stage: str, variables: dict) -> tuple[str, str]:
+    config = manager.load_prompt(stage)
+    system_prompt = config.get("system_prompt", "").replace(
+        "{{common_system_prompt}}", manager.get_common_system_prompt()
+    )
+    user_prompt = config.get("user_prompt", "")
+    for key, value in variables.items():
+        placeholder = "{{" + key + "}}"
+        if value is None:
+            text = "null"
+        elif isinstance(value, (dict, list)):
+            text = json.dumps(value, ensure_ascii=False, indent=2)
+        else:
+            text = str(value)
+        system_prompt = system_prompt.replace(placeholder, text)
+        user_prompt = user_prompt.replace(placeholder, text)
+    set(re.findall(r"\{\{(\w+)\}\}", user_prompt))
+    return system_prompt, user_prompt
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--claims", type=int, default=20)
+    parser.add_argument("--elements", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    manager = PromptManager()
+    service = AnalysisService(None)  # type: ignore[arg-type]
+    context, claims = build_context(args.claims, args.elements)
+    calls = stage_variables(service, context, claims)
+
+    def run_legacy() -> int:
+        return sum(len(u) for stage, v in calls for _, u in [legacy_render(manager, stage, v)])
+
+    def run_compiled() -> int:
+        memo = SerializationMemo()
+        return sum(len(manager.render(stage, v, memo)[1]) for stage, v in calls)
+
+    for label, fn in (("legacy", run_legacy), ("compiled+memo", run_compiled)):
+        fn()  # warm up
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            chars = fn()
+        elapsed = (time.perf_counter() - start) / args.rounds
+        print(
+            f"{label:>14}: {elapsed * 1000:8.2f} ms/job  "
+            f"{len(calls)} prompts  {chars / 1000:8.1f}k user-prompt chars"
+        )
+
+
+if __name__ == "__main__":
+    main()
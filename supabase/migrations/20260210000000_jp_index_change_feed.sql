@@ -0,0 +1,26 @@
+-- JP Index change feed: monotonic change sequence stamped on jp_cases at ingest time
+
+CREATE SEQUENCE IF NOT EXISTS phase2.jp_case_change_seq;
+
+ALTER TABLE phase2.jp_cases
+  ADD COLUMN IF NOT EXISTS change_seq bigint;
+
+-- Backfill existing cases in last_update_date order so old data is replayable
+UPDATE phase2.jp_cases c
+SET change_seq = s.seq
+FROM (
+  SELECT id, nextval('phase2.jp_case_change_seq') AS seq
+  FROM (
+    SELECT id
+    FROM phase2.jp_cases
+    WHERE change_seq IS NULL
+    ORDER BY last_update_date NULLS FIRST, created_at
+  ) ordered
+) s
+WHERE c.id = s.id;
+
+CREATE INDEX IF NOT EXISTS idx_jp_cases_change_seq
+  ON phase2.jp_cases (change_seq);
+
+COMMENT ON COLUMN phase2.jp_cases.change_seq IS
+  'Monotonic change sequence (cursor for GET /v1/jp-index/changes?since=)';
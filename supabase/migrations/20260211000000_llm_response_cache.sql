@@ -0,0 +1,34 @@
+-- Content-addressed LLM response cache for analysis stages
+CREATE TABLE IF NOT EXISTS phase2.llm_response_cache (
+    cache_key varchar(64) PRIMARY KEY,
+    model varchar(100) NOT NULL,
+    temperature double precision NOT NULL DEFAULT 0,
+    content text NOT NULL,
+    parsed_json jsonb,
+    tokens_input integer DEFAULT 0,
+    tokens_output integer DEFAULT 0,
+    size_bytes integer DEFAULT 0,
+    hit_count integer DEFAULT 0,
+    created_at timestamptz DEFAULT now(),
+    last_used_at timestamptz DEFAULT now(),
+    expires_at timestamptz
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_expires_at
+  ON phase2.llm_response_cache (expires_at);
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_last_used_at
+  ON phase2.llm_response_cache (last_used_at);
+
+COMMENT ON TABLE phase2.llm_response_cache IS
+  'LLM responses keyed by sha256(model, system prompt, user prompt, temperature).';
+
+ALTER TABLE phase2.analysis_jobs
+  ADD COLUMN IF NOT EXISTS force_refresh boolean DEFAULT false;
+
+COMMENT ON COLUMN phase2.analysis_jobs.force_refresh IS
+  'Bypass the LLM response cache for this job.';
+
+ALTER TABLE phase2.analysis_results
+  ADD COLUMN IF NOT EXISTS cache_hit boolean DEFAULT false,
+  ADD COLUMN IF NOT EXISTS tokens_saved_input integer,
+  ADD COLUMN IF NOT EXISTS tokens_saved_output integer;
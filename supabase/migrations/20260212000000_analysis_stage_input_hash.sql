@@ -0,0 +1,6 @@
+-- Hash of each stage's rendered inputs, used to skip unchanged stages on rerun
+ALTER TABLE phase2.analysis_results
+  ADD COLUMN IF NOT EXISTS input_hash varchar(64);
+
+COMMENT ON COLUMN phase2.analysis_results.input_hash IS
+  'sha256 of model + rendered prompts; a rerun reuses the output while it matches.';
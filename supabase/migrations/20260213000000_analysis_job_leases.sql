@@ -0,0 +1,13 @@
+-- Lease columns for the standalone analysis worker (phase2 worker)
+ALTER TABLE phase2.analysis_jobs
+  ADD COLUMN IF NOT EXISTS lease_owner text,
+  ADD COLUMN IF NOT EXISTS lease_expires_at timestamptz,
+  ADD COLUMN IF NOT EXISTS heartbeat_at timestamptz;
+
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_lease
+  ON phase2.analysis_jobs (status, lease_expires_at);
+
+COMMENT ON COLUMN phase2.analysis_jobs.lease_owner IS
+  'Worker id (host:pid) currently running the job.';
+COMMENT ON COLUMN phase2.analysis_jobs.lease_expires_at IS
+  'Renewed by worker heartbeats; analyzing jobs past this are reclaimed by other workers.';
@@ -0,0 +1,28 @@
+-- Evidence documents attached to products and their text chunks, read by
+-- the analysis context packer (stage 12 evidence_documents)
+ALTER TABLE phase2.evidence
+  ADD COLUMN IF NOT EXISTS full_text text;
+
+CREATE TABLE IF NOT EXISTS phase2.product_documents (
+    id uuid PRIMARY KEY,
+    product_id uuid NOT NULL REFERENCES phase2.products(id),
+    evidence_id uuid NOT NULL REFERENCES phase2.evidence(id),
+    doc_type character varying(50),
+    title text,
+    created_at timestamptz DEFAULT now(),
+    CONSTRAINT uq_product_documents UNIQUE (product_id, evidence_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_product_documents_product
+  ON phase2.product_documents (product_id);
+
+CREATE TABLE IF NOT EXISTS phase2.doc_chunks (
+    id uuid PRIMARY KEY,
+    evidence_id uuid NOT NULL REFERENCES phase2.evidence(id) ON DELETE CASCADE,
+    chunk_index integer NOT NULL,
+    text text NOT NULL,
+    section_type character varying(50),
+    page_no integer,
+    created_at timestamptz DEFAULT now(),
+    CONSTRAINT uq_doc_chunks_evidence_index UNIQUE (evidence_id, chunk_index)
+);
@@ -0,0 +1,3 @@
+-- Time to first token of streamed stage calls
+ALTER TABLE phase2.analysis_results
+  ADD COLUMN IF NOT EXISTS ttft_ms integer;
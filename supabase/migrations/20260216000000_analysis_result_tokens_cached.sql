@@ -0,0 +1,3 @@
+-- Prompt tokens served from the provider's prompt cache (shared job prefix)
+ALTER TABLE phase2.analysis_results
+  ADD COLUMN IF NOT EXISTS tokens_cached integer;
@@ -0,0 +1,9 @@
+-- Deep Research jobs are polled by a persistent poller (phase2 research-poller)
+ALTER TABLE phase2.analysis_jobs
+  ADD COLUMN IF NOT EXISTS next_poll_at timestamptz;
+
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_research_poll
+  ON phase2.analysis_jobs (status, next_poll_at);
+
+COMMENT ON COLUMN phase2.analysis_jobs.next_poll_at IS
+  'Next check of the job''s background response (openai_response_id); pushed forward while a poller works on it.';
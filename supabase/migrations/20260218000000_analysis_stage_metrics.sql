@@ -0,0 +1,38 @@
+-- Analysis telemetry: per-stage timings and cost on each result, plus daily
+-- rollups maintained as results are saved (GET /v1/analysis/metrics)
+ALTER TABLE phase2.analysis_results
+  ADD COLUMN IF NOT EXISTS queue_wait_ms integer,
+  ADD COLUMN IF NOT EXISTS render_ms integer,
+  ADD COLUMN IF NOT EXISTS cost_usd double precision;
+
+CREATE TABLE IF NOT EXISTS phase2.analysis_stage_metrics (
+  day date NOT NULL,
+  stage varchar(50) NOT NULL,
+  model varchar(100) NOT NULL,
+  calls integer NOT NULL DEFAULT 0,
+  cache_hits integer NOT NULL DEFAULT 0,
+  error_calls integer NOT NULL DEFAULT 0,
+  unpriced_calls integer NOT NULL DEFAULT 0,
+  tokens_input bigint NOT NULL DEFAULT 0,
+  tokens_output bigint NOT NULL DEFAULT 0,
+  tokens_cached bigint NOT NULL DEFAULT 0,
+  cost_usd double precision NOT NULL DEFAULT 0,
+  queue_wait_ms bigint NOT NULL DEFAULT 0,
+  render_ms bigint NOT NULL DEFAULT 0,
+  llm_ms bigint NOT NULL DEFAULT 0,
+  persist_ms bigint NOT NULL DEFAULT 0,
+  updated_at timestamptz DEFAULT now(),
+  PRIMARY KEY (day, stage, model)
+);
+
+CREATE TABLE IF NOT EXISTS phase2.analysis_stage_latency (
+  day date NOT NULL,
+  stage varchar(50) NOT NULL,
+  model varchar(100) NOT NULL,
+  le_ms integer NOT NULL,
+  calls integer NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, stage, model, le_ms)
+);
+
+COMMENT ON TABLE phase2.analysis_stage_latency IS
+  'Histogram of stage wall time (queue + render + LLM + persist); le_ms is the bucket upper bound.';
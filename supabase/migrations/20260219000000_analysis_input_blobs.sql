@@ -0,0 +1,15 @@
+-- Stage inputs stored once by content hash; analysis_results reference them
+-- through input_refs (variable name -> hash) instead of copying input_data
+CREATE TABLE IF NOT EXISTS phase2.analysis_input_blobs (
+  hash varchar(64) PRIMARY KEY,
+  encoding varchar(10) NOT NULL DEFAULT 'json',
+  data bytea NOT NULL,
+  size_bytes integer NOT NULL,
+  created_at timestamptz DEFAULT now()
+);
+
+ALTER TABLE phase2.analysis_results
+  ADD COLUMN IF NOT EXISTS input_refs jsonb;
+
+COMMENT ON COLUMN phase2.analysis_results.input_data IS
+  'Legacy: full prompt variables. New rows store input_refs instead.';
@@ -0,0 +1,8 @@
+-- Claim element extraction reused across jobs: sha256 of (claim text hash,
+-- prompt version, model) on stage 10 results
+ALTER TABLE phase2.analysis_results
+  ADD COLUMN IF NOT EXISTS memo_key varchar(64);
+
+CREATE INDEX IF NOT EXISTS idx_analysis_results_memo_key
+  ON phase2.analysis_results (memo_key)
+  WHERE memo_key IS NOT NULL;
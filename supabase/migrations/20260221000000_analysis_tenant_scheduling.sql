@@ -0,0 +1,29 @@
+-- Weighted fair job scheduling across tenants: daily per-tenant LLM usage
+-- (token budgets) and queue wait rollups (GET /v1/analysis/queue).
+-- Per-tenant weights and caps live in tenants.settings->'scheduler'.
+CREATE TABLE IF NOT EXISTS phase2.analysis_tenant_usage (
+  day date NOT NULL,
+  tenant_id uuid NOT NULL,
+  calls integer NOT NULL DEFAULT 0,
+  tokens_input bigint NOT NULL DEFAULT 0,
+  tokens_output bigint NOT NULL DEFAULT 0,
+  jobs_started integer NOT NULL DEFAULT 0,
+  queue_wait_ms bigint NOT NULL DEFAULT 0,
+  updated_at timestamptz DEFAULT now(),
+  PRIMARY KEY (day, tenant_id)
+);
+
+CREATE TABLE IF NOT EXISTS phase2.analysis_queue_wait (
+  day date NOT NULL,
+  tenant_id uuid NOT NULL,
+  le_ms bigint NOT NULL,
+  jobs integer NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, tenant_id, le_ms)
+);
+
+COMMENT ON TABLE phase2.analysis_queue_wait IS
+  'Histogram of analysis job queue wait per tenant; le_ms is the bucket upper bound.';
+
+-- Pending jobs are grouped by tenant when picking the next jobs to run
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_tenant_queue
+  ON phase2.analysis_jobs (tenant_id, status, priority, created_at);
@@ -0,0 +1,4 @@
+-- Claim short-circuiting: stages not run because the claim's literal outcome
+-- was already decided keep a row with a synthesized output and the reason
+ALTER TABLE phase2.analysis_results
+  ADD COLUMN IF NOT EXISTS skip_reason text;
@@ -0,0 +1,7 @@
+-- Resume cursors for recurring JP Index maintenance jobs, so bounded cron
+-- runs (e.g. snapshot compaction) continue where the previous run stopped
+CREATE TABLE IF NOT EXISTS phase2.jp_maintenance_state (
+  name varchar(50) PRIMARY KEY,
+  cursor varchar(64),
+  updated_at timestamptz DEFAULT now()
+);
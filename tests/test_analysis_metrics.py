@@ -0,0 +1,81 @@
+"""Tests for analysis cost and latency telemetry."""
+
+import dataclasses
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import settings
+from app.db.models import AnalysisResult
+from app.db.session import SessionLocal
+from app.llm.pricing import get_price, stage_cost_usd
+from app.main import app
+from app.services.analysis_metrics import histogram_percentile, latency_bucket
+from app.services.analysis_service import AnalysisService
+from tests.test_analysis_service import FakeProvider, _seed_patent
+
+
+class PricedProvider(FakeProvider):
+    """FakeProvider reporting a per-test model name, so rollup rows are not shared."""
+
+    def __init__(self, model: str) -> None:
+        super().__init__()
+        self.model = model
+
+    def call(self, system_prompt, user_prompt, temperature=0.0, prompt_prefix=""):
+        response = super().call(system_prompt, user_prompt, temperature, prompt_prefix)
+        return dataclasses.replace(response, model=self.model)
+
+
+def test_price_table_matches_longest_prefix_and_honours_overrides(monkeypatch) -> None:
+    assert get_price("gpt-4o-mini-2024-07-18") == (0.15, 0.075, 0.60)
+    assert get_price("gpt-4o-2024-08-06") == (2.50, 1.25, 10.00)
+    assert get_price("fake") is None and stage_cost_usd("fake", 10, 5) is None
+
+    monkeypatch.setattr(settings, "llm_prices", '{"fake": [1, 0.5, 2]}')
+    # 6 uncached + 4 cached input tokens, 5 output tokens
+    assert stage_cost_usd("fake", 10, 5, tokens_cached=4) == pytest.approx(18e-6)
+
+
+def test_percentiles_interpolate_within_histogram_buckets() -> None:
+    assert latency_bucket(0) == 100 and latency_bucket(150) == 200
+    assert histogram_percentile({}, 0.5) is None
+    # 10 calls in (0, 100], 10 in (100, 200]
+    assert histogram_percentile({100: 10, 200: 10}, 0.5) == 100
+    assert histogram_percentile({100: 10, 200: 10}, 0.95) == 190
+
+
+def test_stage_results_feed_the_metrics_endpoint(monkeypatch) -> None:
+    model = f"fake-{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(settings, "llm_prices", f'{{"{model}": [1, 0.5, 2]}}')
+    patent_id = _seed_patent(claim_count=2)
+
+    with SessionLocal() as db:
+        service = AnalysisService(db, llm_provider=PricedProvider(model))
+        job = service.create_job(patent_id=patent_id, pipeline="C")
+        service.run_job(job.id)
+        db.commit()
+        results = db.query(AnalysisResult).filter(AnalysisResult.job_id == job.id).all()
+        assert all(r.render_ms is not None and r.queue_wait_ms is not None for r in results)
+        assert all(r.cost_usd is not None for r in results)
+        stage_count = len(results)
+        tokens_input = sum(r.tokens_input for r in results)
+        total_cost = sum(r.cost_usd for r in results)
+
+    response = TestClient(app).get("/v1/analysis/metrics", params={"group_by": "model"})
+    assert response.status_code == 200
+    rows = [row for row in response.json()["rows"] if row["model"] == model]
+    assert len(rows) == 1 and rows[0]["stage"] is None
+    row = rows[0]
+    assert row["calls"] == stage_count
+    assert row["tokens_input"] == tokens_input
+    assert row["cost_usd"] == pytest.approx(total_cost)
+    assert row["unpriced_calls"] == 0
+    assert 0 < row["latency_p50_ms"] <= row["latency_p95_ms"]
+
+    by_stage = TestClient(app).get("/v1/analysis/metrics", params={"group_by": "stage,model"})
+    stages = {row["stage"] for row in by_stage.json()["rows"] if row["model"] == model}
+    assert "13_element_assessment" in stages
+
+    assert TestClient(app).get("/v1/analysis/metrics", params={"group_by": "job"}).status_code == 400
@@ -0,0 +1,279 @@
+"""Tests for the analysis pipeline executor with a fake LLM provider."""
+
+import random
+import threading
+import time
+
+from app.db.models import AnalysisResult, Claim, Document
+from app.db.session import SessionLocal
+from app.llm.providers import LLMProvider, LLMResponse
+from app.services.analysis_service import CLAIM_ELEMENT_STAGE, AnalysisService
+from app.services.context_packer import claim_query
+from app.services.evidence_index import ChunkHit
+
+
+class FakeProvider(LLMProvider):
+    """Returns stage-shaped JSON; sleeps randomly so claim chains finish out of order."""
+
+    def __init__(self, fail_on: str | None = None, delay: float | None = None) -> None:
+        self.fail_on = fail_on
+        self.delay = delay
+        self.calls: list[str] = []
+        self.prefixes: list[str] = []
+        self._lock = threading.Lock()
+
+    def call(
+        self, system_prompt: str, user_prompt: str, temperature: float = 0.0, prompt_prefix: str = ""
+    ) -> LLMResponse:
+        time.sleep(random.uniform(0, 0.01) if self.delay is None else self.delay)
+        with self._lock:
+            self.calls.append(user_prompt)
+            self.prefixes.append(prompt_prefix)
+        if self.fail_on and self.fail_on in user_prompt:
+            raise RuntimeError("provider exploded")
+        payload = {
+            "elements": [{"element_no": 1, "quote_text": "A"}],
+            "assessments": [{"element_no": 1, "missing_information": ["spec sheet"]}],
+            "decision": "likely",
+            "open_items": [],
+        }
+        return LLMResponse(
+            content="{}",
+            parsed_json=payload,
+            model="fake",
+            tokens_input=10,
+            tokens_output=5,
+            latency_ms=1,
+            tokens_cached=8 if prompt_prefix else 0,
+        )
+
+
+def _seed_patent(claim_count: int) -> str:
+    doc_number = str(random.randint(1000000, 9999999))
+    with SessionLocal() as db:
+        doc = Document(country="JP", doc_number=doc_number, kind="B2", title="テスト特許")
+        db.add(doc)
+        db.flush()
+        for claim_no in range(1, claim_count + 1):
+            db.add(Claim(document_id=doc.id, claim_no=claim_no, claim_text=f"請求項{claim_no}"))
+        db.commit()
+    return f"JP{doc_number}B2"
+
+
+def _run(
+    patent_id: str, provider: FakeProvider, force_refresh: bool = False, pipeline: str = "C"
+) -> tuple[str, list[str], dict, str | None]:
+    with SessionLocal() as db:
+        service = AnalysisService(db, llm_provider=provider)
+        job = service.create_job(patent_id=patent_id, pipeline=pipeline, force_refresh=force_refresh)
+        service.run_job(job.id)
+        db.commit()
+        stages = [r.stage for r in service.get_job_results(job.id)]
+        return job.status, stages, job.context_json, job.error_message
+
+
+def test_stage_graph_declares_claim_dependencies() -> None:
+    with SessionLocal() as db:
+        graph = AnalysisService(db).build_stage_graph("C", [{"claim_no": 1}, {"claim_no": 2}])
+
+    node = graph.nodes["13_element_assessment:claim_2"]
+    assert node.deps == ("10_claim_element_extractor:claim_2", "12_product_fact_extractor:claim_2")
+    assert graph.nodes["15_case_summary"].deps == (
+        "14_claim_decision_aggregator:claim_1",
+        "14_claim_decision_aggregator:claim_2",
+    )
+    # Pipeline A normalizers only read base context, so they are all roots
+    with SessionLocal() as db:
+        graph_a = AnalysisService(db).build_stage_graph("A", [])
+    assert all(not n.deps for n in graph_a.nodes.values())
+
+
+def test_stages_run_after_their_dependencies() -> None:
+    patent_id = _seed_patent(4)
+    status, stages, context, _ = _run(patent_id, FakeProvider())
+
+    assert status == "completed"
+    assert len(stages) == 4 * 5 + 2
+    with SessionLocal() as db:
+        graph = AnalysisService(db).build_stage_graph("C", [{"claim_no": n} for n in range(1, 5)])
+    position = {stage: index for index, stage in enumerate(stages)}
+    for key, node in graph.nodes.items():
+        assert all(position[dep] < position[key] for dep in node.deps)
+    assert [d["claim_no"] for d in context["claim_decisions"]] == [1, 2, 3, 4]
+
+
+def test_independent_stages_run_concurrently() -> None:
+    provider = FakeProvider(delay=0.1)
+    started = time.monotonic()
+    status, stages, _, _ = _run(_seed_patent(1), provider, pipeline="A", force_refresh=True)
+
+    # 7 independent stages at concurrency 4: two rounds instead of seven
+    assert status == "completed" and len(stages) == 7
+    assert time.monotonic() - started < 0.5
+
+
+def test_failed_stage_blocks_only_its_descendants() -> None:
+    provider = FakeProvider(fail_on="請求項3")
+    status, stages, _, error = _run(_seed_patent(4), provider)
+
+    assert status == "failed"
+    assert error.startswith("Stage 10_claim_element_extractor:claim_3 failed")
+    assert {s.split(":")[1] for s in stages} == {"claim_1", "claim_2", "claim_4"}
+    assert len(stages) == 3 * 5
+
+
+def test_claim_stages_share_one_cacheable_prompt_prefix() -> None:
+    provider = FakeProvider()
+    status, _, _, _ = _run(_seed_patent(3), provider)
+
+    assert status == "completed"
+    assert len(set(provider.prefixes)) == 1
+    prefix = provider.prefixes[0]
+    assert prefix.startswith("共通コンテキスト") and "テスト特許" in prefix
+    # Claim text only appears in the stage-specific part
+    assert "請求項1" not in prefix and any("請求項1" in call for call in provider.calls)
+    with SessionLocal() as db:
+        results = db.query(AnalysisResult).order_by(AnalysisResult.created_at.desc()).limit(17)
+        # Stage 13 shares one batched call (and its cached tokens) across claims
+        assert all(r.tokens_cached == 8 for r in results if not r.stage.startswith("13_"))
+
+
+def test_identical_prompts_are_served_from_response_cache() -> None:
+    patent_id = _seed_patent(2)
+    provider = FakeProvider()
+    _run(patent_id, provider)
+    first_calls = len(provider.calls)
+
+    with SessionLocal() as db:
+        service = AnalysisService(db, llm_provider=provider)
+        job = service.create_job(patent_id=patent_id, pipeline="C")
+        service.run_job(job.id)
+        db.commit()
+        results = service.get_job_results(job.id)
+        assert job.status == "completed"
+        assert all(r.cache_hit for r in results)
+        assert all(r.tokens_input == 0 for r in results)
+        assert sum(r.tokens_saved_input for r in results) == 10 * (len(results) - 1)
+    assert len(provider.calls) == first_calls
+
+    # 2 claims x stages 10-12 and 14, one batched stage 13, plus stages 15 and 16
+    _run(patent_id, provider, force_refresh=True)
+    assert len(provider.calls) == first_calls + 11
+
+
+def test_element_assessments_are_batched_across_claims() -> None:
+    provider = FakeProvider()
+    patent_id = _seed_patent(3)
+    with SessionLocal() as db:
+        service = AnalysisService(db, llm_provider=provider)
+        job = service.create_job(patent_id=patent_id, pipeline="C", force_refresh=True)
+        service.run_job(job.id)
+        db.commit()
+        assert job.status == "completed"
+        results = {r.stage: r for r in service.get_job_results(job.id)}
+
+    # Every claim has the same element: it is assessed once for all three
+    assert sum("product_facts:" in call for call in provider.calls) == 1
+    assessments = [results[f"13_element_assessment:claim_{n}"] for n in (1, 2, 3)]
+    assert all(r.output_data["assessments"][0]["element_no"] == 1 for r in assessments)
+    assert sum(r.tokens_input for r in assessments) == 10
+    # Rows keep the hash of their own claim's prompt, so reruns still skip them
+    assert all(r.input_hash and r.input_data is None for r in assessments)
+
+
+def test_retry_resumes_from_first_incomplete_stage() -> None:
+    patent_id = _seed_patent(3)
+    with SessionLocal() as db:
+        service = AnalysisService(db, llm_provider=FakeProvider(fail_on="請求項2"))
+        job = service.create_job(patent_id=patent_id, pipeline="C", force_refresh=True)
+        service.run_job(job.id)
+        db.commit()
+        assert job.status == "failed"
+        first_attempt = {r.stage for r in service.get_job_results(job.id)}
+
+        job.status = "pending"
+        job.force_refresh = False
+        db.commit()
+        service = AnalysisService(db, llm_provider=FakeProvider())
+        service.run_job(job.id)
+        db.commit()
+
+        assert job.status == "completed"
+        stages = [r.stage for r in service.get_job_results(job.id)]
+        rerun = stages[len(first_attempt):]
+        # Claims 1 and 3 are reused; claim 2 and the aggregates run once
+        assert not first_attempt & set(rerun)
+        assert {s.split(":")[-1] for s in rerun if ":" in s} == {"claim_2"}
+        assert set(rerun[-2:]) == {"15_case_summary", "16_investigation_tasks_generator"}
+        assert len(rerun) == 7
+        assert [d["claim_no"] for d in job.context_json["claim_decisions"]] == [1, 2, 3]
+
+
+def test_rerun_skips_stages_whose_inputs_are_unchanged() -> None:
+    patent_id = _seed_patent(2)
+    with SessionLocal() as db:
+        service = AnalysisService(db, llm_provider=FakeProvider())
+        job = service.create_job(patent_id=patent_id, pipeline="C", force_refresh=True)
+        service.run_job(job.id)
+        db.commit()
+
+        # Drop one upstream stage: it reruns, produces the same output, and
+        # every downstream stage sees identical inputs
+        db.query(AnalysisResult).filter(
+            AnalysisResult.job_id == job.id,
+            AnalysisResult.stage == "10_claim_element_extractor:claim_1",
+        ).delete()
+        job.status = "failed"
+        job.force_refresh = False
+        db.commit()
+
+        service.run_job(job.id)
+        db.commit()
+        assert job.status == "completed"
+        stages = [r.stage for r in service.get_job_results(job.id)]
+        assert len(stages) == 2 * 5 + 2
+        assert stages[-1] == "10_claim_element_extractor:claim_1"
+
+
+def test_claim_elements_are_reused_by_jobs_for_other_products() -> None:
+    patent_id = _seed_patent(2)
+    provider = FakeProvider()
+    with SessionLocal() as db:
+        service = AnalysisService(db, llm_provider=provider)
+        for product in ("カメラ", "スピーカー"):
+            job = service.create_job(patent_id=patent_id, pipeline="C", target_product=product)
+            service.run_job(job.id)
+            db.commit()
+            assert job.status == "completed"
+        results = {r.stage: r for r in service.get_job_results(job.id)}
+
+    # Only the first job extracted elements from the claim text
+    assert sum("分解ルール" in call for call in provider.calls) == 2
+    reused = results["10_claim_element_extractor:claim_1"]
+    assert reused.cache_hit and reused.tokens_input == 0 and reused.tokens_saved_input == 10
+    assert reused.output_data["elements"][0]["quote_text"] == "A"
+
+
+def test_streamed_claim_elements_prefetch_evidence() -> None:
+    searched = []
+
+    class RecordingIndex:
+        def search(self, evidence_ids, query, limit=10):
+            searched.append((evidence_ids, query))
+            return [ChunkHit("ev-1", 0, "温度センサを備える", None, None, 1.0)]
+
+    element = {"element_no": 1, "quote_text": "温度センサ", "key_terms": ["センサ"]}
+    with SessionLocal() as db:
+        service = AnalysisService(db, FakeProvider())
+        service._evidence_index = RecordingIndex()
+        service._streamed_items.put((CLAIM_ELEMENT_STAGE, "elements", element))
+        service._streamed_items.put(("15_case_summary", "best_claims", {"claim_no": 1}))
+        context = {"evidence_documents": [{"evidence_id": "ev-1"}]}
+        service._consume_streamed_items(context)
+
+        query = claim_query([element])
+        assert searched == [(["ev-1"], query)]
+        # The stage that later renders this element reuses the prefetched hits
+        packed = service._retrieve_evidence("13_element_assessment", context, [element], budget=1000)
+        assert len(searched) == 1
+        assert packed[0]["chunks"][0]["text"] == "温度センサを備える"
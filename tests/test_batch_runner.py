@@ -0,0 +1,227 @@
+"""Tests for batch-mode analysis against a local stand-in OpenAI Batch API."""
+
+import json
+import random
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from app.db.models import AnalysisJob, Claim, Document
+from app.db.session import SessionLocal
+from app.llm.batch import OpenAIBatchClient
+from app.llm.providers import OpenAIProvider
+from app.services.analysis_service import AnalysisService
+from app.services.batch_runner import BatchAnalysisRunner
+
+STAGE_PAYLOAD = {
+    "elements": [{"element_no": 1, "quote_text": "A"}],
+    "assessments": [{"element_no": 1, "missing_information": ["spec sheet"]}],
+    "decision": "likely",
+    "open_items": [],
+}
+
+
+class FakeBatchServer:
+    """Implements /v1/files and /v1/batches; each batch completes on the second poll."""
+
+    def __init__(self, fail_on: str | None = None) -> None:
+        self.fail_on = fail_on
+        self.files: dict[str, str] = {}
+        self.batches: dict[str, dict] = {}
+        self.batch_sizes: list[int] = []
+        self._lock = threading.RLock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:  # noqa: D401 - silence test output
+                pass
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path.endswith("/files"):
+                    self._send(server._upload(_multipart_file(body, self.headers["Content-Type"])))
+                else:
+                    self._send(server._create_batch(json.loads(body)["input_file_id"]))
+
+            def do_GET(self) -> None:
+                parts = self.path.strip("/").split("/")
+                if parts[-1] == "content":
+                    payload = server.files[parts[-2]].encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                else:
+                    self._send(server._poll(parts[-1]))
+
+            def _send(self, body: dict) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeBatchServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _upload(self, content: str) -> dict:
+        with self._lock:
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = content
+        return {
+            "id": file_id, "object": "file", "bytes": len(content), "created_at": 0,
+            "filename": "batch.jsonl", "purpose": "batch", "status": "processed",
+        }
+
+    def _create_batch(self, input_file_id: str) -> dict:
+        outputs, errors = [], []
+        for line in self.files[input_file_id].splitlines():
+            request = json.loads(line)
+            prompt = request["body"]["messages"][-1]["content"]
+            if self.fail_on and self.fail_on in prompt:
+                errors.append({"custom_id": request["custom_id"], "response": None,
+                               "error": {"code": "server_error", "message": "model exploded"}})
+                continue
+            outputs.append({
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": {
+                    "choices": [{"index": 0, "message": {"role": "assistant",
+                                                         "content": json.dumps(STAGE_PAYLOAD)}}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 5},
+                }},
+                "error": None,
+            })
+        with self._lock:
+            batch_id = f"batch-{len(self.batches)}"
+            output_id = self._upload("\n".join(json.dumps(o) for o in outputs))["id"]
+            error_id = self._upload("\n".join(json.dumps(e) for e in errors))["id"] if errors else None
+            self.batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": "/v1/chat/completions",
+                "input_file_id": input_file_id, "completion_window": "24h", "created_at": 0,
+                "status": "in_progress", "output_file_id": output_id, "error_file_id": error_id,
+            }
+            self.batch_sizes.append(len(outputs) + len(errors))
+        return self._view(batch_id, polled=False)
+
+    def _poll(self, batch_id: str) -> dict:
+        with self._lock:
+            batch = self.batches[batch_id]
+            batch["polls"] = batch.get("polls", 0) + 1
+        return self._view(batch_id, polled=batch["polls"] > 1)
+
+    def _view(self, batch_id: str, polled: bool) -> dict:
+        batch = {k: v for k, v in self.batches[batch_id].items() if k != "polls"}
+        if not polled:
+            batch.update(status="in_progress", output_file_id=None, error_file_id=None)
+        else:
+            batch["status"] = "completed"
+        return batch
+
+
+def _multipart_file(body: bytes, content_type: str) -> str:
+    boundary = content_type.split("boundary=")[1].encode()
+    for part in body.split(b"--" + boundary):
+        if b'name="file"' in part:
+            return part.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n", 1)[0].decode()
+    raise AssertionError("no file part")
+
+
+def _seed_job(claim_count: int) -> uuid.UUID:
+    doc_number = str(random.randint(1000000, 9999999))
+    with SessionLocal() as db:
+        doc = Document(country="JP", doc_number=doc_number, kind="B2", title="テスト特許")
+        db.add(doc)
+        db.flush()
+        for claim_no in range(1, claim_count + 1):
+            db.add(Claim(document_id=doc.id, claim_no=claim_no, claim_text=f"請求項{claim_no}"))
+        job = AnalysisService(db).create_job(
+            patent_id=f"JP{doc_number}B2", pipeline="C", force_refresh=True
+        )
+        db.commit()
+        return job.id
+
+
+def _runner(db, server: FakeBatchServer) -> BatchAnalysisRunner:
+    client = OpenAIBatchClient(OpenAIProvider("test-key", "fake-batch", base_url=server.base_url))
+    return BatchAnalysisRunner(db, client, poll_interval=0, sleep=lambda _: None)
+
+
+def test_batch_mode_runs_stage_waves_across_jobs() -> None:
+    job_ids = [_seed_job(2), _seed_job(2)]
+    with FakeBatchServer() as server, SessionLocal() as db:
+        jobs = db.query(AnalysisJob).filter(AnalysisJob.id.in_(job_ids)).all()
+        summary = _runner(db, server).run(jobs)
+
+        # Waves follow the stage graph: 10, then 11+12, 13, 14, then 15+16 for both jobs
+        assert server.batch_sizes == [4, 8, 4, 4, 4]
+        assert summary["completed"] == 2 and summary["requests"] == 24
+        service = AnalysisService(db)
+        for job in jobs:
+            assert job.status == "completed" and job.batch_id is None
+            stages = [r.stage for r in service.get_job_results(job.id)]
+            assert len(stages) == 12
+            assert set(stages[-2:]) == {"15_case_summary", "16_investigation_tasks_generator"}
+            assert [d["claim_no"] for d in job.context_json["claim_decisions"]] == [1, 2]
+
+
+def test_batch_request_errors_fail_job_and_resume() -> None:
+    job_id = _seed_job(2)
+    with SessionLocal() as db:
+        job = db.get(AnalysisJob, job_id)
+        with FakeBatchServer(fail_on="請求項2") as server:
+            summary = _runner(db, server).run([job])
+        assert summary["failed"] == 1
+        assert job.status == "failed"
+        assert job.error_message == "Stage 10_claim_element_extractor:claim_2 failed: model exploded"
+
+        job.force_refresh = False
+        with FakeBatchServer() as server:
+            _runner(db, server).run([job])
+        assert job.status == "completed"
+        # Claim 1's first stage was checkpointed, not rerun
+        stages = [r.stage for r in AnalysisService(db).get_job_results(job.id)]
+        assert stages.count("10_claim_element_extractor:claim_1") == 1
+
+
+class _DisconnectingClient:
+    """Submits through a real batch client, then loses the connection while polling."""
+
+    def __init__(self, inner: OpenAIBatchClient) -> None:
+        self.inner = inner
+        self.model = inner.model
+
+    def submit(self, requests):
+        return self.inner.submit(requests)
+
+    def is_done(self, batch_id: str) -> bool:
+        raise httpx.ConnectError("connection reset by peer")
+
+    def results(self, batch_id: str):
+        return self.inner.results(batch_id)
+
+
+def test_batch_transport_error_fails_wave_instead_of_hanging() -> None:
+    job_id = _seed_job(1)
+    with FakeBatchServer() as server, SessionLocal() as db:
+        job = db.get(AnalysisJob, job_id)
+        client = _DisconnectingClient(
+            OpenAIBatchClient(OpenAIProvider("test-key", "fake-batch", base_url=server.base_url))
+        )
+        summary = BatchAnalysisRunner(db, client, poll_interval=0, sleep=lambda _: None).run([job])
+
+        assert summary["failed"] == 1
+        assert job.status == "failed" and job.batch_id is None
+        assert "connection reset by peer" in job.error_message
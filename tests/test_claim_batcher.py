@@ -0,0 +1,87 @@
+"""Tests for cross-claim element batching."""
+
+from app.services.analysis_service import _is_reusable_output
+from app.services.claim_batcher import INCOMPLETE_KEY, BatchItem, ClaimBatch, pack, split_tokens
+from app.services.stage_graph import StageNode
+
+
+def _item(claim_no: int, elements: list[str], tokens: int = 100) -> BatchItem:
+    node = StageNode(
+        key=f"13_element_assessment:claim_{claim_no}",
+        stage="13_element_assessment",
+        scope="claim",
+        claim={"claim_no": claim_no},
+        deps=(),
+    )
+    return BatchItem(
+        node=node,
+        call={"variables": {"claim_no": claim_no}, "cache_key": f"key-{claim_no}"},
+        elements=[{"element_no": i + 1, "quote_text": text} for i, text in enumerate(elements)],
+        tokens=tokens,
+    )
+
+
+def test_duplicate_and_assessed_elements_are_not_resent() -> None:
+    items = [_item(1, ["端子 A", "筐体"]), _item(2, ["端子　A", "ばね"])]
+    batch = ClaimBatch.build(items, assessed={"筐体": {"element_no": 9, "status": "satisfied"}})
+
+    # "端子 A" and its full-width-space variant are one element; "筐体" was assessed
+    assert [e["quote_text"] for e in batch.elements] == ["端子 A", "ばね"]
+    assert batch.targets == {
+        1: [("13_element_assessment:claim_1", 1), ("13_element_assessment:claim_2", 1)],
+        2: [("13_element_assessment:claim_2", 2)],
+    }
+
+    response = {
+        "output": {
+            "assessments": [
+                {"element_no": 1, "status": "unknown"},
+                {"element_no": 2, "status": "not_satisfied"},
+            ],
+            "errors": [],
+        },
+        "model": "fake",
+        "tokens_input": 30,
+        "cache_key": "batch-key",
+    }
+    results = batch.split(response, "fake")
+
+    claim_1 = results["13_element_assessment:claim_1"]
+    assert [(a["element_no"], a["status"]) for a in claim_1["output"]["assessments"]] == [
+        (1, "unknown"),
+        (2, "satisfied"),
+    ]
+    claim_2 = results["13_element_assessment:claim_2"]
+    assert [(a["element_no"], a["status"]) for a in claim_2["output"]["assessments"]] == [
+        (1, "unknown"),
+        (2, "not_satisfied"),
+    ]
+    # Tokens follow the elements each claim sent; the batch cache key goes to one row
+    assert (claim_1["tokens_input"], claim_2["tokens_input"]) == (10, 20)
+    assert claim_1["cache_key"] == "batch-key" and claim_2["cache_key"] is None
+    assert claim_2["input_hash"] == "key-2"
+
+
+def test_missing_assessments_are_reported_per_claim() -> None:
+    batch = ClaimBatch.build([_item(1, ["A"]), _item(2, ["B"])], assessed={})
+    results = batch.split({"output": {"assessments": [{"element_no": 2}]}}, "fake")
+
+    assert results["13_element_assessment:claim_1"]["output"]["errors"] == [
+        "No assessment for element 1"
+    ]
+    assert results["13_element_assessment:claim_2"]["output"]["errors"] == []
+    # An incomplete share must be rerun on resume instead of becoming a checkpoint
+    assert results["13_element_assessment:claim_1"]["output"][INCOMPLETE_KEY] is True
+    assert INCOMPLETE_KEY not in results["13_element_assessment:claim_2"]["output"]
+    assert not _is_reusable_output(results["13_element_assessment:claim_1"]["output"])
+    assert _is_reusable_output(results["13_element_assessment:claim_2"]["output"])
+
+
+def test_pack_respects_the_token_budget() -> None:
+    items = [_item(n, ["A"], tokens=tokens) for n, tokens in enumerate([300, 300, 500, 900], 1)]
+    assert [[i.node.claim["claim_no"] for i in batch] for batch in pack(items, 1000)] == [
+        [1, 2],
+        [3],
+        [4],
+    ]
+    assert split_tokens(7, [1, 2]) == [3, 4] and split_tokens(5, [0, 0]) == [5, 0]
@@ -0,0 +1,99 @@
+"""Tests for packing retrieved evidence into stage prompts."""
+
+import random
+
+from app.core import settings
+from app.db.models import Claim, Company, DocChunk, Document, Evidence, Product, ProductDocument
+from app.db.session import SessionLocal
+from app.services.analysis_service import AnalysisService
+from app.services.context_packer import (
+    compact_json,
+    count_tokens,
+    merge_packed,
+    pack_chunks,
+    tokenize,
+)
+from tests.test_analysis_service import FakeProvider
+
+
+def _doc(evidence_id: str, texts: list[str]) -> dict:
+    return {
+        "evidence_id": evidence_id,
+        "url": f"https://example.com/{evidence_id}",
+        "title": evidence_id,
+        "text": None,
+        "chunks": [{"chunk_index": i, "text": text} for i, text in enumerate(texts)],
+    }
+
+
+def test_tokenize_splits_japanese_into_bigrams() -> None:
+    assert tokenize("ＵＳＢ端子を備える") == ["usb", "端子", "子を", "を備", "備え", "える"]
+
+
+def test_pack_takes_ranked_chunks_within_budget_in_reading_order() -> None:
+    filler = "保証規定および安全上のご注意。" * 40
+    documents = [
+        _doc("manual", [filler, "本機はUSB端子と充電回路を備える。", filler, "充電回路は過電流を検知する。"]),
+        _doc("brochure", [filler, filler]),
+    ]
+    ranked = [
+        (0, documents[0]["chunks"][3]),
+        (1, documents[1]["chunks"][0]),
+        (0, documents[0]["chunks"][1]),
+    ]
+
+    packed = pack_chunks(documents, ranked, budget_tokens=200)
+
+    assert [doc["evidence_id"] for doc in packed] == ["manual"]
+    assert [chunk["chunk_index"] for chunk in packed[0]["chunks"]] == [1, 3]
+    assert "text" not in packed[0]
+    assert count_tokens(compact_json(packed)) <= 200
+
+
+def test_product_fact_prompt_carries_only_relevant_evidence(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "evidence_index_path", tmp_path)
+    suffix = random.randint(1000000, 9999999)
+    with SessionLocal() as db:
+        doc = Document(country="JP", doc_number=str(suffix), kind="B2", title="テスト特許")
+        company = Company(name=f"テスト株式会社{suffix}")
+        db.add_all([doc, company])
+        db.flush()
+        db.add(Claim(document_id=doc.id, claim_no=1, claim_text="請求項1"))
+        product = Product(company_id=company.id, name="カメラX")
+        evidence = Evidence(url=f"https://example.com/manual-{suffix}", title="取扱説明書")
+        db.add_all([product, evidence])
+        db.flush()
+        db.add(ProductDocument(product_id=product.id, evidence_id=evidence.id, doc_type="manual"))
+        texts = ["保証規定について。" * 30] * 30 + ["端子Aは外部機器と接続する。"]
+        db.add_all(
+            DocChunk(evidence_id=evidence.id, chunk_index=i, text=text) for i, text in enumerate(texts)
+        )
+
+        provider = FakeProvider()
+        service = AnalysisService(db, llm_provider=provider)
+        job = service.create_job(
+            patent_id=f"JP{suffix}B2", pipeline="C", product_id=product.id, force_refresh=True
+        )
+        service.run_job(job.id)
+        db.commit()
+
+        assert job.status == "completed"
+        # FakeProvider extracts a single element with quote_text "A"
+        prompt = next(call for call in provider.calls if "evidence_documents" in call)
+        assert "端子Aは外部機器と接続する。" in prompt
+        assert "保証規定" not in prompt
+        assert '"chunk_index":30' in prompt
+
+
+def test_merge_packed_keeps_each_chunk_once_in_reading_order() -> None:
+    first = [{"evidence_id": "a", "title": "A", "chunks": [{"chunk_index": 3, "text": "c"}]}]
+    second = [
+        {"evidence_id": "a", "title": "A", "chunks": [{"chunk_index": 1, "text": "b"},
+                                                      {"chunk_index": 3, "text": "c"}]},
+        {"evidence_id": "b", "title": "B", "chunks": [{"chunk_index": 0, "text": "x"}]},
+    ]
+    merged = merge_packed([first, second])
+
+    assert [doc["evidence_id"] for doc in merged] == ["a", "b"]
+    assert [chunk["chunk_index"] for chunk in merged[0]["chunks"]] == [1, 3]
+    assert first[0]["chunks"] == [{"chunk_index": 3, "text": "c"}]  # inputs untouched
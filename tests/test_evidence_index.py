@@ -0,0 +1,63 @@
+"""Tests for the local evidence retrieval index."""
+
+import uuid
+
+from app.db.models import DocChunk, Evidence
+from app.db.session import SessionLocal
+from app.services.evidence_index import EvidenceIndex
+
+
+def _manual(db, texts: list[str]) -> str:
+    evidence = Evidence(url="https://example.com/manual.pdf", title="取扱説明書")
+    db.add(evidence)
+    db.flush()
+    db.add_all(
+        DocChunk(evidence_id=evidence.id, chunk_index=i, text=text) for i, text in enumerate(texts)
+    )
+    db.flush()
+    return str(evidence.id)
+
+
+def test_search_finds_passages_deep_in_long_documents(tmp_path) -> None:
+    with SessionLocal() as db:
+        texts = [f"第{i}章 安全上のご注意と保証規定。" for i in range(200)]
+        texts[150] = "無線通信部はBluetooth規格に準拠し、充電端子から給電される。"
+        manual = _manual(db, texts)
+        other = _manual(db, ["本体を水洗いしないでください。"])
+
+        hits = EvidenceIndex(db, root=tmp_path).search([manual, other], "充電端子 給電", limit=3)
+
+        assert (hits[0].evidence_id, hits[0].chunk_index) == (manual, 150)
+        assert (tmp_path / f"{manual}.json").exists()
+
+
+def test_segments_rebuild_only_for_changed_evidence(tmp_path) -> None:
+    with SessionLocal() as db:
+        first = _manual(db, ["電源ボタンを長押しする。"])
+        second = _manual(db, ["画面の明るさを調整する。"])
+        index = EvidenceIndex(db, root=tmp_path)
+        before = {segment.evidence_id: segment for segment in index.refresh([first, second])}
+
+        db.add(
+            DocChunk(evidence_id=uuid.UUID(second), chunk_index=1, text="充電端子はUSB Type-Cである。")
+        )
+        db.flush()
+        after = {segment.evidence_id: segment for segment in index.refresh([first, second])}
+
+        assert after[first] is before[first]
+        assert after[second] is not before[second]
+        assert index.search([first, second], "USB", limit=1)[0].chunk_index == 1
+
+
+def test_full_text_without_chunks_is_split_into_passages(tmp_path) -> None:
+    with SessionLocal() as db:
+        evidence = Evidence(
+            url="https://example.com/spec",
+            full_text="仕様\n" + "\n".join(["外形寸法は120mm。" * 60, "防水等級はIPX7。"]),
+        )
+        db.add(evidence)
+        db.flush()
+
+        hits = EvidenceIndex(db, root=tmp_path).search([str(evidence.id)], "防水等級")
+
+        assert len(hits) == 1 and "IPX7" in hits[0].text
@@ -0,0 +1,167 @@
+"""Tests for tenant-fair analysis job scheduling."""
+
+import threading
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.models import AnalysisJob, AnalysisTenantUsage, Tenant
+from app.db.session import SessionLocal
+from app.main import app
+from app.services.job_scheduler import plan_jobs, tenant_slot_available
+from app.services.job_worker import claim_next_job
+
+_created_tenants: list[uuid.UUID] = []
+
+
+@pytest.fixture(autouse=True)
+def _drain_test_tenants():
+    """Drop the test tenants' jobs so later tests see only their own queue."""
+    yield
+    with SessionLocal() as db:
+        db.query(AnalysisJob).filter(AnalysisJob.tenant_id.in_(_created_tenants)).delete()
+        db.commit()
+    _created_tenants.clear()
+
+
+def _tenant(db, **scheduler) -> uuid.UUID:
+    slug = f"t-{uuid.uuid4().hex[:8]}"
+    tenant = Tenant(name=slug, slug=slug, settings={"scheduler": scheduler})
+    db.add(tenant)
+    db.flush()
+    _created_tenants.append(tenant.id)
+    return tenant.id
+
+
+def _jobs(db, tenant_id, count, priority=5, age_minutes=0, status="pending") -> list[uuid.UUID]:
+    created = datetime.now(UTC) - timedelta(minutes=age_minutes)
+    jobs = [
+        AnalysisJob(
+            patent_id="JP1234567B2",
+            pipeline="C",
+            status=status,
+            priority=priority,
+            tenant_id=tenant_id,
+            created_at=created + timedelta(milliseconds=n),
+        )
+        for n in range(count)
+    ]
+    db.add_all(jobs)
+    db.flush()
+    return [job.id for job in jobs]
+
+
+def _order(picked: list[AnalysisJob], tenants: dict[uuid.UUID, str]) -> str:
+    """Tenant letters of the picks, ignoring jobs left in the queue by other tests."""
+    return "".join(tenants[job.tenant_id] for job in picked if job.tenant_id in tenants)
+
+
+def test_bulk_submission_does_not_starve_other_tenants() -> None:
+    with SessionLocal() as db:
+        bulk, small = _tenant(db), _tenant(db)
+        _jobs(db, bulk, 20, age_minutes=1)
+        _jobs(db, small, 2)
+        db.commit()
+
+        order = _order(plan_jobs(db, 200), {bulk: "A", small: "B"})
+        assert order[:4] == "ABAB" and order[4:] == "A" * 18
+
+
+def test_weights_and_priority_set_each_tenants_share() -> None:
+    with SessionLocal() as db:
+        heavy, light, urgent = _tenant(db, weight=3), _tenant(db), _tenant(db)
+        _jobs(db, heavy, 10, age_minutes=1)
+        _jobs(db, light, 10)
+        db.commit()
+        assert _order(plan_jobs(db, 200), {heavy: "H", light: "L"})[:8] == "HHHLHHHL"
+
+        # A priority-10 job counts like a third more weight than priority 5
+        _jobs(db, urgent, 1, priority=10)
+        db.commit()
+        order = _order(plan_jobs(db, 200), {light: "L", urgent: "U"})
+        assert order[:2] == "UL"
+
+
+def test_caps_hold_back_tenants_and_aging_promotes_old_jobs() -> None:
+    today = datetime.now(UTC).date()
+    with SessionLocal() as db:
+        capped = _tenant(db, max_concurrent_jobs=1)
+        _jobs(db, capped, 1, status="analyzing")
+        capped_pending = _jobs(db, capped, 1)
+        spent = _tenant(db, daily_token_budget=100)
+        db.add(AnalysisTenantUsage(day=today, tenant_id=spent, tokens_input=90, tokens_output=20))
+        spent_pending = _jobs(db, spent, 1)
+        aging = _tenant(db)
+        new_urgent = _jobs(db, aging, 1, priority=5)
+        # 2 hours at 15 minutes per step: priority 1 + 8
+        old_low = _jobs(db, aging, 1, priority=1, age_minutes=120)
+        db.commit()
+
+        picked = [job.id for job in plan_jobs(db, 200)]
+        assert capped_pending[0] not in picked and spent_pending[0] not in picked
+        assert picked.index(old_low[0]) < picked.index(new_urgent[0])
+        # Provider batch runs hold no slot, so only the token budget applies
+        batch = [job.id for job in plan_jobs(db, 200, enforce_concurrency=False)]
+        assert capped_pending[0] in batch and spent_pending[0] not in batch
+
+    rows = {
+        row["tenant_id"]: row
+        for row in TestClient(app).get("/v1/analysis/queue").json()["tenants"]
+    }
+    assert rows[str(capped)]["blocked"] == "concurrency"
+    assert rows[str(capped)]["running"] == 1 and rows[str(capped)]["pending"] == 1
+    assert rows[str(spent)]["blocked"] == "token_budget"
+    assert rows[str(spent)]["tokens_today"] == 110
+    assert rows[str(aging)]["pending_by_priority"] == {"5": 1, "1": 1}
+    assert rows[str(aging)]["oldest_pending_wait_s"] >= 7200
+
+
+def test_claimed_jobs_record_their_queue_wait() -> None:
+    with SessionLocal() as db:
+        tenant = _tenant(db, weight=1000)
+        job_id = _jobs(db, tenant, 1, priority=10, age_minutes=3)[0]
+        db.commit()
+
+        claimed = claim_next_job(db, "host-a:1", 60)
+        assert claimed.id == job_id and claimed.status == "analyzing"
+
+    row = next(
+        row
+        for row in TestClient(app).get("/v1/analysis/queue").json()["tenants"]
+        if row["tenant_id"] == str(tenant)
+    )
+    assert row["jobs_started_today"] == 1 and row["running"] == 1
+    assert 180_000 <= row["queue_wait_avg_ms"] < 240_000
+    assert 131_072 <= row["queue_wait_p50_ms"] <= 262_144
+
+
+def test_tenant_cap_is_rechecked_under_the_claim_lock() -> None:
+    with SessionLocal() as db:
+        tenant = _tenant(db, max_concurrent_jobs=1)
+        first_id, second_id = _jobs(db, tenant, 2)
+        db.commit()
+
+    results: dict[str, bool] = {}
+    with SessionLocal() as worker_a, SessionLocal() as worker_b:
+        first = worker_a.get(AnalysisJob, first_id)
+        assert tenant_slot_available(worker_a, first)  # holds the tenant lock
+
+        # A second worker planned from the same snapshot; its check must wait
+        # for the first claim to commit and then see the tenant as full
+        thread = threading.Thread(
+            target=lambda: results.setdefault(
+                "second", tenant_slot_available(worker_b, worker_b.get(AnalysisJob, second_id))
+            )
+        )
+        thread.start()
+        thread.join(0.5)
+        assert thread.is_alive()
+
+        first.status = "analyzing"
+        worker_a.commit()
+        thread.join(5)
+        worker_b.rollback()
+
+    assert results == {"second": False}
@@ -0,0 +1,69 @@
+"""Tests for the lease-based analysis worker."""
+
+import random
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from app.db.models import AnalysisJob, Claim, Document
+from app.db.session import SessionLocal
+from app.services.job_worker import AnalysisWorker, claim_next_job, renew_lease
+from tests.test_analysis_service import FakeProvider
+
+
+def _enqueue(priority: int = 10) -> uuid.UUID:
+    doc_number = str(random.randint(1000000, 9999999))
+    with SessionLocal() as db:
+        doc = Document(country="JP", doc_number=doc_number, kind="B2", title="テスト特許")
+        db.add(doc)
+        db.flush()
+        db.add(Claim(document_id=doc.id, claim_no=1, claim_text="請求項1"))
+        job = AnalysisJob(
+            patent_id=f"JP{doc_number}B2",
+            pipeline="C",
+            status="pending",
+            context_json={},
+            priority=priority,
+        )
+        db.add(job)
+        db.commit()
+        return job.id
+
+
+def test_claimed_jobs_are_not_claimed_twice() -> None:
+    first, second = _enqueue(priority=10), _enqueue(priority=9)
+    with SessionLocal() as db:
+        claimed_a = claim_next_job(db, "host-a:1", 60)
+        claimed_b = claim_next_job(db, "host-b:1", 60)
+
+        assert [claimed_a.id, claimed_b.id] == [first, second]
+        assert claimed_a.status == "analyzing" and claimed_a.lease_owner == "host-a:1"
+        assert renew_lease(first, "host-a:1", 60)
+        assert not renew_lease(first, "host-b:1", 60)
+
+
+def test_expired_lease_is_reclaimed_as_retry() -> None:
+    expired = datetime.now(UTC) - timedelta(seconds=5)
+    job_id = _enqueue(priority=10)
+    with SessionLocal() as db:
+        stale = db.get(AnalysisJob, job_id)
+        stale.status = "analyzing"
+        stale.lease_owner = "dead-host:1"
+        stale.lease_expires_at = expired
+        db.commit()
+
+        reclaimed = claim_next_job(db, "host-a:1", 60)
+        assert reclaimed.id == job_id
+        assert reclaimed.lease_owner == "host-a:1"
+        assert reclaimed.retry_count == 1
+
+
+def test_worker_runs_job_and_releases_lease() -> None:
+    job_id = _enqueue(priority=10)
+    worker = AnalysisWorker(worker_id="host-a:1", poll_interval=0, llm_provider=FakeProvider())
+    assert worker.run_once()
+
+    with SessionLocal() as db:
+        done = db.get(AnalysisJob, job_id)
+        assert done.status == "completed"
+        assert done.lease_owner is None and done.lease_expires_at is None
+        assert done.completed_at is not None
@@ -1,6 +1,9 @@
 """Tests for JP Index API endpoints."""
 
+import json
+import uuid
 from datetime import date
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -15,11 +18,11 @@ def client() -> TestClient:
     return TestClient(app)
 
 
-def _seed_case() -> str:
+def _seed_case(number_raw: str = "特願2020-123456", number_norm: str = "JP2020123456") -> str:
     with SessionLocal() as db:
         case = JpCase(
-            application_number_raw="特願2020-123456",
-            application_number_norm="JP2020123456",
+            application_number_raw=number_raw,
+            application_number_norm=number_norm,
             title="テスト発明",
             current_status="pending",
             last_update_date=date(2026, 2, 4),
@@ -30,8 +33,8 @@ def _seed_case() -> str:
         alias = JpNumberAlias(
             case_id=case.id,
             number_type="application",
-            number_raw="特願2020-123456",
-            number_norm="JP2020123456",
+            number_raw=number_raw,
+            number_norm=number_norm,
             country="JP",
             is_primary=True,
         )
@@ -66,3 +69,76 @@ def test_jp_index_search_by_number(client: TestClient) -> None:
     data = response.json()
     assert data["total"] >= 1
     assert len(data["items"]) >= 1
+
+
+def test_jp_index_case_detail_etag(client: TestClient) -> None:
+    case_id = _seed_case("特願2021-000001", "JP2021000001")
+    response = client.get(f"/v1/jp-index/patents/{case_id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["case"]["case_id"] == case_id
+    assert data["numbers"][0]["number_norm"] == "JP2021000001"
+    etag = response.headers["etag"]
+    assert etag
+
+    cached = client.get(f"/v1/jp-index/patents/{case_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+
+def test_jp_index_case_detail_etag_tracks_case_version(client: TestClient) -> None:
+    case_id = _seed_case("特願2021-000002", "JP2021000002")
+    first = client.get(f"/v1/jp-index/patents/{case_id}")
+    etag = first.headers["etag"]
+
+    # Simulate a write committed by another process (e.g. the importer).
+    from app.jp_index.changes import next_change_seq
+
+    with SessionLocal() as db:
+        case = db.get(JpCase, uuid.UUID(case_id))
+        case.current_status = "registered"
+        case.change_seq = next_change_seq(db, is_postgres=True)
+        db.commit()
+
+    response = client.get(f"/v1/jp-index/patents/{case_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["case"]["current_status"] == "registered"
+
+
+def test_jp_index_changes_cursor_feed(client: TestClient, tmp_path) -> None:
+    from app.jp_index.ingest import create_ingest_batch, ingest_normalized_jsonl
+
+    path = tmp_path / "changes.jsonl"
+    path.write_text(
+        "\n".join(
+            json.dumps({"application_number": number, "title": "差分テスト"}, ensure_ascii=False)
+            for number in ("特願2022-000001", "特願2022-000002")
+        ),
+        encoding="utf-8",
+    )
+    with SessionLocal() as db:
+        batch = create_ingest_batch(db, "test", "delta", None, f"test:changes:{tmp_path.name}")
+        ingest_normalized_jsonl(db, path, batch, "test")
+        db.commit()
+        seqs = [
+            seq
+            for (seq,) in db.query(JpCase.change_seq).filter(
+                JpCase.application_number_norm.in_(["JP2022000001", "JP2022000002"])
+            )
+        ]
+    assert len(seqs) == 2
+    cursor = min(seqs) - 1
+    first = client.get("/v1/jp-index/changes", params={"since": str(cursor), "limit": 1}).json()
+    assert first["count"] == 1
+    assert first["has_more"] is True
+    second = client.get(
+        "/v1/jp-index/changes", params={"since": first["next_cursor"], "limit": 1}
+    ).json()
+    assert second["items"][0]["application_number"] == "JP2022000002"
+
+    streamed = client.get(
+        "/v1/jp-index/changes", params={"since": str(cursor), "format": "ndjson"}
+    )
+    lines = [json.loads(line) for line in streamed.text.splitlines() if line]
+    assert [item["application_number"] for item in lines[:2]] == ["JP2022000001", "JP2022000002"]
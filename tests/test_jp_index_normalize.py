@@ -22,3 +22,35 @@ def test_normalize_publication_number() -> None:
     assert normalized is not None
     assert normalized.number_norm == "JP2020123456A"
     assert normalized.number_type == "publication"
+
+
+def test_convert_writes_validated_parts_and_manifest(tmp_path) -> None:
+    import json
+
+    from app.jp_index.convert import (
+        convert_to_normalized_jsonl,
+        iter_jsonl,
+        resolve_normalized_paths,
+        validate_record,
+    )
+
+    raw = tmp_path / "raw.jsonl"
+    rows = [
+        {"出願番号": "特願2020-000001", "発明の名称": "A", "IPC": "G06F; H04L"},
+        {"出願番号": "特願2020-000002", "applicants": "not-a-list"},
+        {"出願番号": "特願2020-000003", "status": "granted", "status_date": "2021-01-01"},
+    ]
+    raw.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in rows), encoding="utf-8")
+
+    manifest = convert_to_normalized_jsonl(raw, tmp_path / "out", workers=1, chunk_size=2)
+    assert [part["path"] for part in manifest["parts"]] == ["part-00000.jsonl.gz", "part-00001.jsonl.gz"]
+    assert (manifest["records"], manifest["invalid"]) == (2, 1)
+    assert manifest["parts"][0]["errors"][0]["record"] == 1
+
+    records = [r for path in resolve_normalized_paths(tmp_path / "out") for r in iter_jsonl(path)]
+    assert [r["application_number"] for r in records] == ["特願2020-000001", "特願2020-000003"]
+    assert records[0]["classifications"][1] == {"type": "IPC", "code": "H04L"}
+    plain = tmp_path / "records.json"
+    plain.write_text("[]", encoding="utf-8")
+    assert resolve_normalized_paths(plain) == [plain]
+    assert validate_record({"application_number": "x", "extra": 1}) == ["extra: unknown field"]
@@ -18,3 +18,153 @@ def test_status_derivation_prefers_expired() -> None:
 def test_status_default_when_no_events() -> None:
     derived = derive_status([])
     assert derived.status == "pending"
+
+
+def test_snapshot_compaction_keeps_run_heads() -> None:
+    from datetime import datetime, timezone
+
+    from app.jp_index.compaction import _select_redundant
+
+    def snap(sid: str, status: str, day: int) -> SimpleNamespace:
+        return SimpleNamespace(
+            id=sid,
+            status=status,
+            logic_version="v1",
+            basis_event_ids={"event_ids": []},
+            derived_at=datetime(2024, 1, day, tzinfo=timezone.utc),
+        )
+
+    snapshots = [snap("a", "pending", 1), snap("b", "pending", 2), snap("c", "granted", 3), snap("d", "granted", 4)]
+    delete_ids, duplicates, expired = _select_redundant(snapshots, None)
+    assert delete_ids == ["b", "d"]
+    assert (duplicates, expired) == (2, 0)
+
+    cutoff = datetime(2024, 1, 10, tzinfo=timezone.utc)
+    delete_ids, _, expired = _select_redundant(snapshots[:3], cutoff)
+    assert delete_ids == ["a", "b"]
+    assert expired == 1
+
+
+def test_snapshot_compaction_resumes_from_stored_cursor() -> None:
+    import uuid
+
+    from app.db.models import JpCase, JpStatusSnapshot
+    from app.db.session import SessionLocal
+    from app.jp_index.compaction import compact_status_snapshots
+
+    with SessionLocal() as db:
+        for _ in range(2):
+            case = JpCase(title="圧縮テスト", current_status="pending")
+            db.add(case)
+            db.flush()
+            for _ in range(2):
+                db.add(JpStatusSnapshot(case_id=case.id, status="pending", basis_event_ids={}))
+        db.commit()
+
+        key = f"test_compaction_{uuid.uuid4().hex[:8]}"
+        first = compact_status_snapshots(db, batch_size=1, max_batches=1, resume_key=key)
+        second = compact_status_snapshots(db, batch_size=1, max_batches=1, resume_key=key)
+
+    assert first["batches"] == second["batches"] == 1
+    assert uuid.UUID(second["last_case_id"]) > uuid.UUID(first["last_case_id"])
+    assert not second["wrapped"]
+
+
+def test_status_derivation_breaks_ties_by_event_id() -> None:
+    events = [
+        SimpleNamespace(id="b", event_type="LAPSED", event_date="2024-01-01"),
+        SimpleNamespace(id="a", event_type="EXPIRED", event_date="2024-01-01"),
+        SimpleNamespace(id="c", event_type="GRANTED", event_date="2020-01-01"),
+    ]
+    assert derive_status(events).basis_event_ids == ["a"]
+    assert derive_status(list(reversed(events))).basis_event_ids == ["a"]
+
+
+def _seed_rederive_cases() -> dict:
+    from datetime import date
+
+    from app.db.models import JpCase, JpStatusEvent
+    from app.db.session import SessionLocal
+
+    # (event_type, event_date) per case; ties on priority and date are deliberate
+    seeds = [
+        [("LAPSED", date(2024, 1, 1)), ("EXPIRED", date(2024, 1, 1)), ("GRANTED", date(2020, 1, 1))],
+        [("GRANTED", None), ("REGISTERED", None), ("APPLICATION", date(2019, 5, 1))],
+        [("PUBLICATION", date(2021, 3, 1)), ("APPLICATION", date(2021, 3, 1))],
+        [],
+    ]
+    events_by_case: dict = {}
+    with SessionLocal() as db:
+        for seed in seeds:
+            case = JpCase(title="再導出テスト", current_status="unknown")
+            db.add(case)
+            db.flush()
+            events = [
+                JpStatusEvent(case_id=case.id, event_type=event_type, event_date=event_date, source="test")
+                for event_type, event_date in seed
+            ]
+            db.add_all(events)
+            db.flush()
+            events_by_case[case.id] = [
+                {"id": e.id, "event_type": e.event_type, "event_date": e.event_date} for e in events
+            ]
+        db.commit()
+    return events_by_case
+
+
+def _reset_and_rederive(events_by_case: dict, run) -> dict:
+    from app.db.models import JpCase, JpStatusSnapshot
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        db.query(JpCase).filter(JpCase.id.in_(list(events_by_case))).update(
+            {JpCase.current_status: "unknown"}, synchronize_session=False
+        )
+        db.commit()
+        report = run(db)
+        latest = {}
+        for case_id in events_by_case:
+            snapshot = (
+                db.query(JpStatusSnapshot)
+                .filter(JpStatusSnapshot.case_id == case_id)
+                .order_by(JpStatusSnapshot.derived_at.desc())
+                .first()
+            )
+            latest[case_id] = (snapshot.status, snapshot.basis_event_ids["event_ids"])
+    return {"report": report, "latest": latest}
+
+
+def test_rederive_paths_match_derive_status() -> None:
+    from app.jp_index.rederive import _rederive_batched, _rederive_postgres
+
+    events_by_case = _seed_rederive_cases()
+    expected = {}
+    for case_id, events in events_by_case.items():
+        derived = derive_status(events)
+        expected[case_id] = (derived.status, derived.basis_event_ids)
+
+    sql = _reset_and_rederive(events_by_case, lambda db: _rederive_postgres(db, dry_run=False))
+    batched = _reset_and_rederive(
+        events_by_case, lambda db: _rederive_batched(db, 2, dry_run=False, progress=None)
+    )
+    assert sql["latest"] == expected
+    assert batched["latest"] == expected
+
+
+def test_rederive_dry_run_reports_match() -> None:
+    from app.db.session import SessionLocal
+    from app.jp_index.rederive import _rederive_batched, _rederive_postgres
+
+    events_by_case = _seed_rederive_cases()
+    with SessionLocal() as db:
+        sql_report = _rederive_postgres(db, dry_run=True)
+        batched_report = _rederive_batched(db, 2, dry_run=True, progress=None)
+
+    def transitions(report: dict) -> set:
+        return {(t["from"], t["to"], t["count"]) for t in report["transitions"]}
+
+    assert transitions(sql_report) == transitions(batched_report)
+    assert sql_report["changed"] == batched_report["changed"]
+    assert sql_report["dry_run"] is True
+    unknown_to = {to for old, to, _ in transitions(sql_report) if old == "unknown"}
+    assert unknown_to >= {derive_status(events).status for events in events_by_case.values()}
@@ -0,0 +1,298 @@
+"""Tests for LLM providers against a local fake LLM server."""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from openai import RateLimitError
+
+from app.llm.fake import FakeLLMProvider
+from app.llm.limits import ProviderLimits, RetryPolicy
+from app.llm.providers import AnthropicProvider, OpenAIProvider
+from app.llm.streaming import IncrementalJSONParser
+
+FAST_RETRY = RetryPolicy(max_retries=3, base_delay=0.01, max_delay=0.05)
+
+
+class FakeLLMServer:
+    """OpenAI/Anthropic-compatible endpoint that can fail the first N requests."""
+
+    def __init__(
+        self,
+        fail_first: int = 0,
+        delay: float = 0.0,
+        stream_chunks: list[str] | None = None,
+        finish_reason: str = "stop",
+    ) -> None:
+        self.fail_first = fail_first
+        self.delay = delay
+        self.stream_chunks = stream_chunks or ['{"ok": true}']
+        self.finish_reason = finish_reason
+        self.requests = 0
+        self.bodies: list[dict] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:  # noqa: D401 - silence test output
+                pass
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with server._lock:
+                    server.requests += 1
+                    server.bodies.append(body)
+                    attempt = server.requests
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    time.sleep(server.delay)
+                    if attempt <= server.fail_first:
+                        self._send(429, {"error": {"message": "slow down", "type": "rate_limit"}})
+                    elif body.get("stream"):
+                        self._send_events(
+                            _openai_events(server.stream_chunks, server.finish_reason)
+                        )
+                    elif self.path.endswith("/chat/completions"):
+                        self._send(200, _openai_body())
+                    else:
+                        self._send(200, _anthropic_body())
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _send(self, status: int, body: dict) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _send_events(self, events: list[dict]) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for event in events:
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeLLMServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _openai_body() -> dict:
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "fake",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": '{"ok": true}'},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": 7,
+            "completion_tokens": 3,
+            "total_tokens": 10,
+            "prompt_tokens_details": {"cached_tokens": 4},
+        },
+    }
+
+
+def _anthropic_body() -> dict:
+    return {
+        "id": "msg_test",
+        "type": "message",
+        "role": "assistant",
+        "model": "fake",
+        "content": [{"type": "text", "text": '{"ok": true}'}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 7, "output_tokens": 3},
+    }
+
+
+def _openai_events(chunks: list[str], finish_reason: str) -> list[dict]:
+    base = {"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0, "model": "fake"}
+    events = [
+        {**base, "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+        for chunk in chunks
+    ]
+    events.append({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+    events.append(
+        {**base, "choices": [], "usage": {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10}}
+    )
+    return events
+
+
+def _limits(concurrency: int = 8) -> ProviderLimits:
+    return ProviderLimits(max_concurrency=concurrency, requests_per_minute=0, tokens_per_minute=0)
+
+
+def test_openai_acall_retries_rate_limit() -> None:
+    with FakeLLMServer(fail_first=2) as server:
+        provider = OpenAIProvider(
+            "test-key", "fake", base_url=f"{server.base_url}/v1",
+            limits=_limits(), retry_policy=FAST_RETRY,
+        )
+        response = asyncio.run(provider.acall("system", "user"))
+
+    assert response.parsed_json == {"ok": True}
+    assert (response.tokens_input, response.tokens_output) == (7, 3)
+    assert server.requests == 3
+
+
+def test_sync_call_uses_same_retry_path() -> None:
+    with FakeLLMServer(fail_first=1) as server:
+        provider = OpenAIProvider(
+            "test-key", "fake", base_url=f"{server.base_url}/v1",
+            limits=_limits(), retry_policy=FAST_RETRY,
+        )
+        response = provider.call("system", "user")
+
+    assert response.parsed_json == {"ok": True}
+    assert server.requests == 2
+
+
+def test_retries_exhausted_raises() -> None:
+    with FakeLLMServer(fail_first=10) as server:
+        provider = OpenAIProvider(
+            "test-key", "fake", base_url=f"{server.base_url}/v1",
+            limits=_limits(), retry_policy=RetryPolicy(max_retries=1, base_delay=0.01),
+        )
+        with pytest.raises(RateLimitError):
+            provider.call("system", "user")
+
+    assert server.requests == 2
+
+
+def test_concurrency_limit_is_shared_across_calls() -> None:
+    with FakeLLMServer(delay=0.05) as server:
+        provider = OpenAIProvider(
+            "test-key", "fake", base_url=f"{server.base_url}/v1",
+            limits=_limits(concurrency=2), retry_policy=FAST_RETRY,
+        )
+
+        async def run_many() -> list:
+            return await asyncio.gather(*(provider.acall("system", f"u{i}") for i in range(6)))
+
+        responses = asyncio.run(run_many())
+
+    assert len(responses) == 6
+    assert server.max_in_flight == 2
+
+
+ELEMENT_CHUNKS = ['```json\n{"claim_no": 1, "elem', 'ents": [{"element_no": 1, "quote_text": "a]"},',
+                  ' {"element_no": 2, "key_terms": ["x"]}', '], "errors": []}\n```']
+
+
+def test_incremental_parser_emits_items_as_they_close() -> None:
+    parser = IncrementalJSONParser(["elements"])
+    emitted = [parser.feed(chunk) for chunk in ELEMENT_CHUNKS]
+
+    assert emitted[0] == []
+    assert emitted[1] == [("elements", {"element_no": 1, "quote_text": "a]"})]
+    assert emitted[2] == [("elements", {"element_no": 2, "key_terms": ["x"]})]
+    assert parser.complete and parser.error is None
+
+
+def test_incremental_parser_flags_non_json_early() -> None:
+    parser = IncrementalJSONParser()
+    parser.feed("I'm sorry, I cannot")
+    assert parser.error is not None
+
+
+def test_incremental_parser_drops_consumed_text() -> None:
+    parser = IncrementalJSONParser(["elements"])
+    parser.feed('{"summary": "' + "x" * 10000 + '", "elements": [')
+    parser.feed('{"element_no": 1, "quote_text": "')
+    assert len(parser._buffer) < 100  # only the open item is kept
+
+    assert parser.feed('a"}]}') == [("elements", {"element_no": 1, "quote_text": "a"})]
+    assert parser.complete and parser._buffer == ""
+
+
+def test_stream_hands_off_items_and_records_ttft() -> None:
+    received = []
+    with FakeLLMServer(stream_chunks=ELEMENT_CHUNKS) as server:
+        provider = OpenAIProvider(
+            "test-key", "fake", base_url=f"{server.base_url}/v1",
+            limits=_limits(), retry_policy=FAST_RETRY,
+        )
+        response = provider.stream(
+            "system", "user", item_keys=["elements"], on_item=lambda k, item: received.append(item)
+        )
+
+    assert [item["element_no"] for item in received] == [1, 2]
+    assert response.parsed_json["elements"] == received
+    assert response.ttft_ms is not None and not response.truncated
+    assert (response.tokens_input, response.tokens_output) == (7, 3)
+
+
+def test_stream_reports_max_token_truncation() -> None:
+    with FakeLLMServer(stream_chunks=ELEMENT_CHUNKS[:2], finish_reason="length") as server:
+        provider = OpenAIProvider(
+            "test-key", "fake", base_url=f"{server.base_url}/v1",
+            limits=_limits(), retry_policy=FAST_RETRY,
+        )
+        response = provider.stream("system", "user", item_keys=["elements"])
+
+    assert response.truncated and response.finish_reason == "length"
+    assert response.parsed_json is None
+
+
+def test_prompt_prefix_leads_the_request_and_cached_tokens_are_reported() -> None:
+    with FakeLLMServer() as server:
+        provider = OpenAIProvider(
+            "test-key", "fake", base_url=f"{server.base_url}/v1",
+            limits=_limits(), retry_policy=FAST_RETRY,
+        )
+        response = provider.call("system", "claim 1", prompt_prefix="job context\n")
+
+    assert server.bodies[0]["messages"][1]["content"] == "job context\nclaim 1"
+    assert (response.tokens_input, response.tokens_cached) == (7, 4)
+
+    request = AnthropicProvider("test-key", "fake", limits=_limits())._request(
+        "system", "claim 1", 0.0, prompt_prefix="job context\n"
+    )
+    prefix_block, tail_block = request["messages"][0]["content"]
+    assert request["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert prefix_block == {
+        "type": "text", "text": "job context\n", "cache_control": {"type": "ephemeral"}
+    }
+    assert tail_block == {"type": "text", "text": "claim 1"}
+
+
+def test_fake_provider_is_deterministic_per_prompt() -> None:
+    provider = FakeLLMProvider(latency_ms=1, latency_jitter=0.5, tokens_jitter=0.5, seed=7)
+    first = provider.call("system", "claim 1", prompt_prefix="job context\n")
+    again = provider.call("system", "claim 1", prompt_prefix="job context\n")
+    other = provider.call("system", "claim 2", prompt_prefix="job context\n")
+
+    assert (first.content, first.tokens_output) == (again.content, again.tokens_output)
+    assert first.latency_ms == again.latency_ms
+    assert first.parsed_json["elements"][0] == other.parsed_json["elements"][0]
+    assert first.parsed_json["elements"][-1] != other.parsed_json["elements"][-1]
+    assert first.tokens_cached > 0 and first.model == "fake"
+
+    batch = provider.call("system", '[{"element_no": 1}, {"element_no": 2}, {"element_no": 3}]')
+    assert [a["element_no"] for a in batch.parsed_json["assessments"]] == [1, 2, 3]
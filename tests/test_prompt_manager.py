@@ -0,0 +1,71 @@
+"""Tests for the compiled prompt registry."""
+
+from pathlib import Path
+
+import pytest
+
+from app.llm.prompt_manager import (
+    PromptManager,
+    SerializationMemo,
+    get_prompt_registry,
+    reload_prompts,
+)
+
+
+def _write_prompts(root: Path, user_prompt: str, prompt_id: str = "10_test") -> None:
+    (root / "c_analyze").mkdir(parents=True, exist_ok=True)
+    (root / "00_common_system_prompt.yaml").write_text("content: COMMON\n", encoding="utf-8")
+    (root / "c_analyze" / "10_test.yaml").write_text(
+        f"id: {prompt_id}\nsystem_prompt: '{{{{common_system_prompt}}}} / {{{{today}}}}'\n"
+        f"user_prompt: '{user_prompt}'\n",
+        encoding="utf-8",
+    )
+
+
+def test_render_substitutes_compact_values_and_keeps_unknown(tmp_path: Path) -> None:
+    _write_prompts(tmp_path, "claim={{claim}} facts={{facts}} missing={{missing}}")
+    manager = PromptManager(tmp_path)
+
+    system, user = manager.render(
+        "10_test", {"today": "2026-01-01", "claim": {"no": 1, "text": "端子"}, "facts": None}
+    )
+
+    assert system == "COMMON / 2026-01-01"
+    assert user == 'claim={"no":1,"text":"端子"} facts=null missing={{missing}}'
+
+
+def test_registry_is_shared_and_memo_reuses_serialization(tmp_path: Path) -> None:
+    _write_prompts(tmp_path, "{{claim}}")
+    assert PromptManager(tmp_path).registry is PromptManager(tmp_path).registry
+
+    claim = {"no": 1}
+    memo = SerializationMemo()
+    assert PromptManager(tmp_path).render("10_test", {"claim": claim}, memo)[1] == '{"no":1}'
+    assert memo.serialize(claim) is memo.serialize(claim)
+
+    # The registry holds compiled YAML until reloaded
+    version = PromptManager(tmp_path).prompt_version("10_test")
+    _write_prompts(tmp_path, "changed {{claim}}")
+    assert PromptManager(tmp_path).render("10_test", {"claim": claim})[1] == '{"no":1}'
+    reload_prompts()
+    assert PromptManager(tmp_path).render("10_test", {"claim": claim})[1] == 'changed {"no":1}'
+    assert PromptManager(tmp_path).prompt_version("10_test") != version
+
+
+def test_registry_rejects_mismatched_prompt_id(tmp_path: Path) -> None:
+    _write_prompts(tmp_path, "{{claim}}", prompt_id="11_other")
+
+    with pytest.raises(ValueError, match="does not match file name"):
+        get_prompt_registry(tmp_path)
+
+
+def test_render_with_prefix_moves_shared_values_to_the_prefix(tmp_path: Path) -> None:
+    _write_prompts(tmp_path, "product={{product}} claim={{claim}}")
+    product = {"name": "カメラ"}
+
+    _, prefix, user = PromptManager(tmp_path).render_with_prefix(
+        "10_test", {"product": product, "claim": {"no": 1}}, {"target_product": product}
+    )
+
+    assert prefix.endswith('target_product:\n{"name":"カメラ"}\n\n')
+    assert user == 'product=（共通コンテキストの target_product を参照） claim={"no":1}'
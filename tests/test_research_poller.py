@@ -0,0 +1,94 @@
+"""Tests for the persistent Deep Research poller."""
+
+import asyncio
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from app.db.models import AnalysisJob
+from app.db.session import SessionLocal
+from app.llm.deep_research import DeepResearchProvider
+from app.services.research_poller import DeepResearchPoller, poll_delay
+
+
+class FakeResearchProvider(DeepResearchProvider):
+    """Background responses that report ``statuses`` one poll at a time."""
+
+    def __init__(self, statuses: list[str]) -> None:
+        self.model = "o3-deep-research"
+        self.statuses = statuses
+        self.submitted: list[str] = []
+        self.polled: list[str] = []
+
+    async def submit(self, patent_number, claim_text=None, client=None) -> dict:
+        self.submitted.append(patent_number)
+        return {"response_id": f"resp_{patent_number}", "status": "queued"}
+
+    async def retrieve(self, response_id, client=None) -> dict:
+        self.polled.append(response_id)
+        status = self.statuses.pop(0)
+        output = [{"type": "message", "content": [{"text": '{"title": "無線通信装置"}'}]}]
+        return {"id": response_id, "status": status, "output": output}
+
+
+def _research_job(started_at: datetime | None = None) -> uuid.UUID:
+    with SessionLocal() as db:
+        job = AnalysisJob(
+            patent_id=f"JP{uuid.uuid4().int % 10**7}B2",
+            pipeline="research",
+            status="researching",
+            search_type="deep_research",
+            started_at=started_at or datetime.now(UTC),
+        )
+        db.add(job)
+        db.commit()
+        return job.id
+
+
+def _make_due(job_id: uuid.UUID) -> None:
+    with SessionLocal() as db:
+        db.get(AnalysisJob, job_id).next_poll_at = datetime.now(UTC) - timedelta(seconds=1)
+        db.commit()
+
+
+def test_job_is_submitted_then_polled_to_completion_across_poller_instances() -> None:
+    job_id = _research_job()
+    provider = FakeResearchProvider(["in_progress", "completed"])
+
+    assert asyncio.run(DeepResearchPoller(provider).run_once(job_id))["submitted"] == 1
+    # Not due yet: nothing is polled
+    assert asyncio.run(DeepResearchPoller(provider).run_once(job_id))["checked"] == 0
+
+    _make_due(job_id)
+    asyncio.run(DeepResearchPoller(provider).run_once(job_id))
+    with SessionLocal() as db:
+        job = db.get(AnalysisJob, job_id)
+        assert job.status == "researching" and job.openai_response_id.startswith("resp_")
+        assert job.next_poll_at is not None
+
+    _make_due(job_id)
+    result = asyncio.run(DeepResearchPoller(provider).run_once(job_id))
+    assert result["completed"] == 1
+    assert len(provider.submitted) == 1 and len(provider.polled) == 2
+    with SessionLocal() as db:
+        job = db.get(AnalysisJob, job_id)
+        assert job.status == "completed"
+        assert job.research_results == {"title": "無線通信装置"}
+        assert job.next_poll_at is None
+
+
+def test_expired_job_fails_without_polling() -> None:
+    job_id = _research_job(started_at=datetime.now(UTC) - timedelta(hours=2))
+    provider = FakeResearchProvider([])
+
+    asyncio.run(DeepResearchPoller(provider).run_once(job_id))
+
+    assert provider.submitted == []
+    with SessionLocal() as db:
+        job = db.get(AnalysisJob, job_id)
+        assert job.status == "failed" and job.error_message == "Deep Research timeout"
+
+
+def test_poll_delay_grows_with_job_age() -> None:
+    assert poll_delay(0) == 10
+    assert poll_delay(300) == 30
+    assert poll_delay(3600) == 60
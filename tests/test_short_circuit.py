@@ -0,0 +1,148 @@
+"""Tests for claim dependency parsing and short-circuiting decided claims."""
+
+import json
+import random
+import re
+
+from app.core import settings
+from app.db.models import (
+    AnalysisResult,
+    Claim,
+    Company,
+    Document,
+    Evidence,
+    Product,
+    ProductDocument,
+)
+from app.db.session import SessionLocal
+from app.llm.providers import LLMResponse
+from app.services.analysis_service import AnalysisService
+from app.services.claim_dependencies import parse_claim_refs
+from app.services.short_circuit import blocking_elements
+from tests.test_analysis_service import FakeProvider
+
+
+def test_parse_claim_refs_reads_japanese_and_english_references() -> None:
+    assert parse_claim_refs("端子を備える装置", 1) == ()
+    assert parse_claim_refs("請求項１に記載の装置であって", 2) == (1,)
+    assert parse_claim_refs("請求項1又は2に記載の装置", 3) == (1, 2)
+    assert parse_claim_refs("請求項1から3のいずれか一項に記載の装置", 5) == (1, 2, 3)
+    assert parse_claim_refs("The device according to any one of claims 1 to 3", 4) == (1, 2, 3)
+    # References to later claims are not dependencies
+    assert parse_claim_refs("請求項3に記載の装置", 2) == ()
+
+
+def test_blocking_elements_need_confidence_and_product_evidence() -> None:
+    assessment = {
+        "assessments": [
+            {
+                "element_no": 1,
+                "status": "not_satisfied",
+                "confidence": 0.9,
+                "supporting_evidence": [{"evidence_id": "ev-1"}],
+            },
+            {
+                "element_no": 2,
+                "status": "not_satisfied",
+                "confidence": 0.5,
+                "supporting_evidence": [{"evidence_id": "ev-1"}],
+            },
+            {
+                "element_no": 3,
+                "status": "not_satisfied",
+                "confidence": 0.95,
+                "supporting_evidence": [{"evidence_id": "blog-post"}],
+            },
+            {"element_no": 4, "status": "unknown", "confidence": 0.99},
+        ]
+    }
+
+    assert blocking_elements(assessment, {"ev-1"}, 0.8) == [1]
+    assert blocking_elements(assessment, set(), 0.8) == []
+    assert blocking_elements(None, {"ev-1"}, 0.8) == []
+
+
+class ElementProvider(FakeProvider):
+    """One element per claim; elements mentioning ``absent_text`` are clearly not satisfied."""
+
+    def __init__(self, absent_text: str, evidence_id: str) -> None:
+        super().__init__(delay=0)
+        self.absent_text = absent_text
+        self.evidence_id = evidence_id
+
+    def call(
+        self, system_prompt: str, user_prompt: str, temperature: float = 0.0, prompt_prefix: str = ""
+    ) -> LLMResponse:
+        response = super().call(system_prompt, user_prompt, temperature, prompt_prefix)
+        claim_text = re.search(r"(端子|電池)を備える", user_prompt)
+        element = claim_text.group(0) if claim_text else "A"
+        assessments = [
+            {
+                "element_no": int(element_no),
+                "status": "not_satisfied" if self.absent_text in text else "satisfied",
+                "confidence": 0.9,
+                "supporting_evidence": [{"evidence_id": self.evidence_id, "quote": "端子なし"}],
+            }
+            for element_no, text in re.findall(
+                r'"element_no":\s*(\d+),\s*"quote_text":\s*"([^"]*)"', user_prompt
+            )
+        ]
+        response.parsed_json = {
+            "elements": [{"element_no": 1, "quote_text": element}],
+            "assessments": assessments,
+            "decision": "likely",
+            "open_items": [],
+        }
+        response.content = json.dumps(response.parsed_json, ensure_ascii=False)
+        return response
+
+
+def test_failed_claim_skips_aggregation_and_dependent_claims(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "analysis_short_circuit", "ordered")
+    suffix = random.randint(1000000, 9999999)
+    with SessionLocal() as db:
+        doc = Document(country="JP", doc_number=str(suffix), kind="B2", title="テスト特許")
+        company = Company(name=f"テスト株式会社{suffix}")
+        db.add_all([doc, company])
+        db.flush()
+        db.add_all(
+            [
+                Claim(document_id=doc.id, claim_no=1, claim_text="端子を備える装置"),
+                Claim(document_id=doc.id, claim_no=2, claim_text="請求項1に記載の装置であって"),
+                Claim(document_id=doc.id, claim_no=3, claim_text="電池を備える装置"),
+            ]
+        )
+        product = Product(company_id=company.id, name="カメラX")
+        evidence = Evidence(url=f"https://example.com/spec-{suffix}", title="仕様書")
+        db.add_all([product, evidence])
+        db.flush()
+        db.add(ProductDocument(product_id=product.id, evidence_id=evidence.id, doc_type="spec"))
+
+        provider = ElementProvider("端子", str(evidence.id))
+        service = AnalysisService(db, llm_provider=provider)
+        job = service.create_job(
+            patent_id=f"JP{suffix}B2", pipeline="C", product_id=product.id, force_refresh=True
+        )
+        service.run_job(job.id)
+        db.commit()
+
+        assert job.status == "completed"
+        results = {
+            r.stage: r for r in db.query(AnalysisResult).filter(AnalysisResult.job_id == job.id)
+        }
+
+    decision = results["14_claim_decision_aggregator:claim_1"]
+    assert decision.skip_reason == "element_not_satisfied: 1"
+    assert decision.output_data["literal_status"] == "fail"
+    for stage in (
+        "11_evidence_query_builder",
+        "12_product_fact_extractor",
+        "13_element_assessment",
+        "14_claim_decision_aggregator",
+    ):
+        assert results[f"{stage}:claim_2"].skip_reason == "parent_claim_failed: 1"
+        assert results[f"{stage}:claim_2"].llm_model is None
+    assert results["10_claim_element_extractor:claim_2"].skip_reason is None
+    assert results["14_claim_decision_aggregator:claim_3"].skip_reason is None
+    # Only claim 3 reached the aggregation prompt
+    assert sum("集約ルール" in call for call in provider.calls) == 1
@@ -0,0 +1,47 @@
+"""Tests for content-addressed stage input storage."""
+
+import pytest
+
+from app.core import settings
+from app.db.models import AnalysisInputBlob
+from app.db.session import SessionLocal
+from app.services.analysis_service import ALL_STAGES, AnalysisService
+from app.services.stage_inputs import decode_blob, encode_blob, load_inputs
+from tests.test_analysis_service import FakeProvider, _seed_patent
+
+
+def test_stage_inputs_are_stored_once_and_context_keeps_no_stage_outputs() -> None:
+    patent_id = _seed_patent(claim_count=2)
+    with SessionLocal() as db:
+        service = AnalysisService(db, llm_provider=FakeProvider())
+        job = service.create_job(patent_id=patent_id, pipeline="C", force_refresh=True)
+        service.run_job(job.id)
+        db.commit()
+
+        assert not [key for key in job.context_json if key.split(":", 1)[0] in ALL_STAGES]
+        assert [d["claim_no"] for d in job.context_json["claim_decisions"]] == [1, 2]
+
+        results = {r.stage: r for r in service.get_job_results(job.id)}
+        assert all(r.input_data is None and r.input_refs for r in results.values())
+        # Stages 11 and 13 render the same stage-10 elements from one blob
+        query_builder = results["11_evidence_query_builder:claim_1"]
+        assessment = results["13_element_assessment:claim_1"]
+        assert query_builder.input_refs["claim_elements"] == assessment.input_refs["claim_elements"]
+
+        inputs = load_inputs(db, assessment)
+        assert set(inputs) == set(assessment.input_refs)
+        assert inputs["claim_elements"] == [{"element_no": 1, "quote_text": "A"}]
+        blob = db.get(AnalysisInputBlob, assessment.input_refs["claim_elements"])
+        assert blob.encoding == "json"
+
+
+def test_large_blobs_are_zstd_compressed(monkeypatch) -> None:
+    pytest.importorskip("zstandard")
+    monkeypatch.setattr(settings, "analysis_blob_compression", "zstd")
+    text = '{"evidence":"' + "端子" * 4000 + '"}'
+
+    encoding, data = encode_blob(text)
+
+    assert encoding == "zstd" and len(data) < len(text.encode("utf-8")) / 10
+    assert decode_blob(encoding, data) == {"evidence": "端子" * 4000}
+    assert encode_blob("{}") == ("json", b"{}")